@@ -1,5 +1,7 @@
 import os
 from importlib import reload
+from pathlib import Path
+from typing import Any
 from unittest import mock
 
 import pytest
@@ -54,6 +56,43 @@ class Helpers:
 
         return Volume(data=data, frame=frame, anatomy_orientation=anatomy_orientation)
 
+    @staticmethod
+    def write_dicom_slice(
+        path: Path,
+        z: float,
+        pixels: Any,
+        series_instance_uid: str = "1.2.3.4",
+        rescale: tuple[float, float] | None = None,
+    ) -> None:
+        from pydicom.dataset import Dataset, FileMetaDataset
+        from pydicom.uid import CTImageStorage, ExplicitVRLittleEndian, generate_uid
+
+        ds = Dataset()
+        ds.file_meta = FileMetaDataset()
+        ds.file_meta.MediaStorageSOPClassUID = CTImageStorage
+        ds.file_meta.MediaStorageSOPInstanceUID = generate_uid()
+        ds.file_meta.TransferSyntaxUID = ExplicitVRLittleEndian
+        ds.SOPClassUID = CTImageStorage
+        ds.SOPInstanceUID = ds.file_meta.MediaStorageSOPInstanceUID
+        ds.StudyInstanceUID = "1.2.3"
+        ds.SeriesInstanceUID = series_instance_uid
+        ds.ImagePositionPatient = [-10.0, 20.0, z]
+        ds.ImageOrientationPatient = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0]
+        ds.PixelSpacing = [0.5, 0.75]
+        ds.Rows, ds.Columns = pixels.shape
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated = 8 * pixels.dtype.itemsize
+        ds.BitsStored = 8 * pixels.dtype.itemsize
+        ds.HighBit = 8 * pixels.dtype.itemsize - 1
+        ds.PixelRepresentation = 1 if pixels.dtype.kind == "i" else 0
+        ds.PixelData = pixels.astype(pixels.dtype.newbyteorder("<")).tobytes()
+        if rescale is not None:
+            ds.RescaleSlope, ds.RescaleIntercept = rescale
+        ds.is_little_endian = True
+        ds.is_implicit_VR = False
+        ds.save_as(str(path), write_like_original=False)
+
 
 @pytest.fixture
 def helpers():
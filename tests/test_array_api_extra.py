@@ -150,6 +150,39 @@ def test_clip(
     assert xp.all(actual_array == expected_array)
 
 
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "array, axis, expected",
+    [
+        ([1.0, 2.0, 3.0], 0, [1.0, 3.0, 6.0]),
+        ([[1.0, 2.0], [3.0, 4.0]], 0, [[1.0, 2.0], [4.0, 6.0]]),
+        ([[1.0, 2.0], [3.0, 4.0]], 1, [[1.0, 3.0], [3.0, 7.0]]),
+    ],
+)
+def test_cumsum(array: list[float], axis: int, expected: list[float]):
+    actual_array = xpe.cumsum(xp.asarray(array), axis=axis)
+    expected_array = xp.asarray(expected)
+    assert xp.all(actual_array == expected_array)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "shape, dtype, expected",
+    [((2, 3), "float64", 48), ((4, 4, 4), "int16", 128), ((5,), "bool", 5)],
+)
+def test_nbytes(shape: tuple[int, ...], dtype: str, expected: int):
+    assert xpe.nbytes(xp.zeros(shape, dtype=getattr(xp, dtype))) == expected
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_ascontiguous():
+    array = xp.reshape(xp.arange(24), (2, 3, 4))
+    permuted = xp.permute_dims(array, (2, 0, 1))
+    actual_array = xpe.ascontiguous(permuted)
+    assert actual_array.shape == (4, 2, 3)
+    assert xp.all(actual_array == permuted)
+
+
 @pytest.mark.usefixtures("array_api_backend")
 @pytest.mark.parametrize(
     "indices, shape, expected",
@@ -203,6 +236,28 @@ def test_sample(
     assert helpers.approx_equal(actual_sampled, expected_array)
 
 
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize("method", ["linear", "nearest"])
+@pytest.mark.parametrize("out_dtype", ["float32", "float64"])
+def test_sample_out(method: xpe.SamplingMethod, out_dtype: str, helpers: Any):
+    array = xp.asarray([[0.0, 1.0, 2.0], [3.0, 4.0, 5.0], [6.0, 7.0, 8.0]])
+    coords = xp.asarray([[0.1, 0.5], [1.2, 0.5], [2.5, 1.8], [-0.5, 0.0]])
+    out = xp.zeros(4, dtype=getattr(xp, out_dtype))
+    actual_sampled = xpe.sample(array, coordinates=coords, method=method, out=out)
+    expected_array = xpe.sample(array, coordinates=coords, method=method)
+    assert actual_sampled is out
+    assert helpers.approx_equal(xp.astype(out, xp.float64), expected_array)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize("method", ["linear", "nearest"])
+def test_sample_out_fail(method: xpe.SamplingMethod):
+    array = xp.asarray([[0.0, 1.0], [2.0, 3.0]])
+    coords = xp.asarray([[0.5, 0.5], [1.0, 0.0]])
+    with pytest.raises(ValueError):
+        xpe.sample(array, coordinates=coords, method=method, out=xp.zeros(3))
+
+
 @pytest.mark.usefixtures("array_api_backend")
 @pytest.mark.parametrize(
     "values, expected",
@@ -0,0 +1,226 @@
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from tests.conftest import Helpers
+from vanilla_roll.camera import ViewVolume, create_from_volume_coordinates
+from vanilla_roll.chunked import ArrayChunkSource, ChunkedArray
+from vanilla_roll.geometry.element import Frame, Orientation, Vector
+from vanilla_roll.io import BrickWriter, load_bricked_volume, save_bricked_volume
+from vanilla_roll.io.bricked import BrickChunkSource
+from vanilla_roll.rendering import convert_image_to_array, create_renderer
+from vanilla_roll.rendering.algorithm import Raycast, Sampling, ShearWarp
+from vanilla_roll.rendering.mode import VR
+from vanilla_roll.rendering.projection import Orthogoal
+from vanilla_roll.rendering.transfer_function import (
+    ColorControlPoint,
+    OpacityControlPoint,
+    make_transfer_function,
+)
+
+
+def _create_data() -> xp.Array:
+    data = xp.zeros((20, 24, 28), dtype=xp.int16)
+    data[4:12, 6:14, 2:10] = 100
+    data[10:14, 2:6, 20:26] = 50
+    return data
+
+
+def _create_frame() -> Frame:
+    return Frame(
+        origin=Vector(1.0, -2.0, 3.5),
+        orientation=Orientation(
+            Vector(0.5, 0.0, 0.0), Vector(0.0, 0.5, 0.1), Vector(0.0, 0.0, 2.0)
+        ),
+    )
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+@pytest.mark.parametrize("chunked", [False, True])
+def test_save_and_load_bricked_volume(
+    helpers: Helpers, tmp_path: Path, codec: Any, chunked: bool
+):
+    data = _create_data()
+    volume = helpers.create_volume(
+        data=(
+            ChunkedArray(ArrayChunkSource(xpe.asnumpy(data), (3, 5, 7)))
+            if chunked
+            else data
+        ),
+        origin=_create_frame().origin,
+        orientation=_create_frame().orientation,
+    )
+
+    save_bricked_volume(volume, tmp_path, brick_size=8, codec=codec, workers=4)
+    loaded = load_bricked_volume(tmp_path)
+
+    assert isinstance(loaded.data, ChunkedArray)
+    assert loaded.data.dtype == xp.int16
+    assert bool(xp.all(loaded.data[:, :, :] == data))
+    assert loaded.frame == volume.frame
+    assert loaded.anatomy_orientation == volume.anatomy_orientation
+
+    source = BrickChunkSource(tmp_path)
+    assert source.chunk_min.shape == (3, 3, 4)
+    assert int(source.chunk_max[0, 0, 0]) == 100
+    assert int(source.chunk_max[0, 0, 3]) == 0
+
+
+def test_brick_writer_in_parallel(tmp_path: Path):
+    data = xpe.asnumpy(_create_data())
+    with BrickWriter(tmp_path, data.shape, data.dtype, _create_frame(), None, 8) as w:
+        indices = [
+            (n0, n1, n2)
+            for n0 in range(w.grid_shape[0])
+            for n1 in range(w.grid_shape[1])
+            for n2 in range(w.grid_shape[2])
+        ]
+
+        def _write(offset: int) -> None:
+            for n0, n1, n2 in indices[offset::4]:
+                brick = data[
+                    n0 * 8 : (n0 + 1) * 8, n1 * 8 : (n1 + 1) * 8, n2 * 8 : (n2 + 1) * 8
+                ]
+                if 0 < brick.max():
+                    w.write_brick((n0, n1, n2), brick)
+
+        threads = [threading.Thread(target=_write, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    # bricks never written are regarded as 0
+    assert np.array_equal(
+        xpe.asnumpy(load_bricked_volume(tmp_path).data[:, :, :]), data
+    )
+
+
+def test_brick_writer_fail(tmp_path: Path):
+    with pytest.raises(ValueError):
+        BrickWriter(
+            tmp_path, (4, 4, 4), np.int16, _create_frame(), codec="bz2"  # type: ignore
+        )
+
+    with BrickWriter(tmp_path, (4, 4, 6), np.int16, _create_frame(), brick_size=4) as w:
+        with pytest.raises(IndexError):
+            w.write_brick((0, 0, 2), np.zeros((4, 4, 2)))
+        with pytest.raises(ValueError):
+            w.write_brick((0, 0, 1), np.zeros((4, 4, 4)))
+        w.write_brick((0, 0, 1), np.zeros((4, 4, 2)))
+        with pytest.raises(ValueError):
+            w.write_brick((0, 0, 1), np.zeros((4, 4, 2)))
+
+    (tmp_path / "volume.json").unlink()
+    with pytest.raises(ValueError):
+        load_bricked_volume(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "algorithm", [ShearWarp(), Sampling(step=1.0), Raycast(step=1.0)]
+)
+def test_render_bricked_volume_skips_transparent_bricks(
+    helpers: Helpers, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, algorithm: Any
+):
+    volume = helpers.create_volume(data=_create_data())
+    save_bricked_volume(volume, tmp_path, brick_size=4)
+    bricked_volume = load_bricked_volume(tmp_path)
+
+    read: set[tuple[int, int, int]] = set()
+    read_chunk = BrickChunkSource.read_chunk
+
+    def _read_chunk(self: BrickChunkSource, index: tuple[int, int, int]) -> xp.Array:
+        read.add(index)
+        return read_chunk(self, index)
+
+    monkeypatch.setattr(BrickChunkSource, "read_chunk", _read_chunk)
+
+    # only voxels of 100 are opaque
+    mode = VR(
+        make_transfer_function(
+            [
+                OpacityControlPoint(intensity=75.0, opacity=0.0),
+                OpacityControlPoint(intensity=100.0, opacity=0.5),
+            ],
+            [ColorControlPoint(intensity=0.0, r=1.0, g=1.0, b=1.0)],
+        )
+    )
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=14.0, j=12.0, k=-30.0),
+        forward=Vector(i=0.0, j=0.0, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=32.0, height=32.0, far=80.0, near=4.0),
+    )
+
+    expected = create_renderer(volume, Orthogoal(), mode, algorithm=algorithm)(
+        camera, spacing=1.0
+    )
+    actual = create_renderer(bricked_volume, Orthogoal(), mode, algorithm=algorithm)(
+        camera, spacing=1.0
+    )
+
+    assert helpers.approx_equal(
+        convert_image_to_array(actual.image), convert_image_to_array(expected.image)
+    )
+    # bricks of 50 and their neighbors are never decompressed
+    assert 0 < len(read)
+    assert all(i < 4 for _, _, i in read)
+
+
+def test_render_bricked_volume_skips_bricks_between_visible_bricks(
+    helpers: Helpers, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    data = xp.zeros((20, 24, 28), dtype=xp.int16)
+    data[4:12, 4:12, 0:4] = 100
+    data[4:12, 8:16, 24:28] = 100
+    volume = helpers.create_volume(data=data)
+    save_bricked_volume(volume, tmp_path, brick_size=4)
+    bricked_volume = load_bricked_volume(tmp_path)
+
+    read: set[tuple[int, int, int]] = set()
+    read_chunk = BrickChunkSource.read_chunk
+
+    def _read_chunk(self: BrickChunkSource, index: tuple[int, int, int]) -> xp.Array:
+        read.add(index)
+        return read_chunk(self, index)
+
+    monkeypatch.setattr(BrickChunkSource, "read_chunk", _read_chunk)
+
+    mode = VR(
+        make_transfer_function(
+            [
+                OpacityControlPoint(intensity=75.0, opacity=0.0),
+                OpacityControlPoint(intensity=100.0, opacity=0.5),
+            ],
+            [ColorControlPoint(intensity=0.0, r=1.0, g=1.0, b=1.0)],
+        )
+    )
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=14.0, j=12.0, k=-30.0),
+        forward=Vector(i=0.0, j=0.0, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=32.0, height=32.0, far=80.0, near=4.0),
+    )
+
+    expected = create_renderer(volume, Orthogoal(), mode, algorithm=ShearWarp())(
+        camera, spacing=1.0
+    )
+    actual = create_renderer(bricked_volume, Orthogoal(), mode, algorithm=ShearWarp())(
+        camera, spacing=1.0
+    )
+
+    assert helpers.approx_equal(
+        convert_image_to_array(actual.image), convert_image_to_array(expected.image)
+    )
+    # bricks between the two visible blocks and their neighbors are never
+    # decompressed
+    columns = {i for _, _, i in read}
+    assert {0, 6} <= columns
+    assert not columns & {2, 3, 4}
@@ -0,0 +1,178 @@
+import itertools
+import math
+from typing import Any
+
+import pytest
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from tests.conftest import Helpers
+from vanilla_roll.camera import ViewVolume, create_from_volume_coordinates
+from vanilla_roll.chunked import ArrayChunkSource, ChunkedArray, sample
+from vanilla_roll.geometry.element import Vector
+from vanilla_roll.rendering import convert_image_to_array, create_renderer
+from vanilla_roll.rendering.algorithm import Raycast, Sampling, ShearWarp
+from vanilla_roll.rendering.mode import MIP, VR, Mode
+from vanilla_roll.rendering.projection import Orthogoal, Perspective, Projection
+from vanilla_roll.rendering.transfer_function import (
+    ColorControlPoint,
+    OpacityControlPoint,
+    make_transfer_function,
+)
+
+
+class _CountingSource(ArrayChunkSource):
+    def __init__(self, array: Any, chunk_shape: tuple[int, int, int]) -> None:
+        super().__init__(array, chunk_shape)
+        self.read: set[tuple[int, int, int]] = set()
+
+    def read_chunk(self, index: tuple[int, int, int]) -> xp.Array:
+        self.read.add(index)
+        return super().read_chunk(index)
+
+
+def _create_data() -> xp.Array:
+    data = xp.zeros((20, 24, 28), dtype=xp.float64)
+    data[4:12, 6:18, 8:16] = 100.0
+    data[10:14, 2:6, 20:26] = 50.0
+    return data
+
+
+def test_chunked_array_indexing():
+    data = _create_data()
+    chunked = ChunkedArray(ArrayChunkSource(xpe.asnumpy(data), (8, 8, 8)), max_chunks=4)
+
+    assert chunked.shape == data.shape
+    assert chunked.dtype == data.dtype
+    assert bool(xp.all(chunked[:, :, :] == data))
+    assert bool(xp.all(chunked[3, 5:21, :] == data[3, 5:21, :]))
+    assert bool(xp.all(chunked[-1, -3:, 7] == data[-1, -3:, 7]))
+    assert chunked[2:2, :, :].shape == (0, 24, 28)
+
+    for order in [(0, 2, 1), (1, 2, 0), (2, 0, 1)]:
+        permuted = chunked.permute_dims(order)
+        expected = xp.permute_dims(data, order)
+        assert permuted.shape == expected.shape
+        assert bool(xp.all(permuted[5, 1:9, 3:17] == expected[5, 1:9, 3:17]))
+        assert bool(
+            xp.all(
+                permuted.permute_dims((2, 0, 1))[4:7, 0, :]
+                == xp.permute_dims(expected, (2, 0, 1))[4:7, 0, :]
+            )
+        )
+
+
+def test_chunked_array_indexing_fail():
+    chunked = ChunkedArray(ArrayChunkSource(xpe.asnumpy(_create_data()), (8, 8, 8)))
+    with pytest.raises(IndexError):
+        chunked[20, :, :]
+    with pytest.raises(IndexError):
+        chunked[::2, :, :]
+    with pytest.raises(IndexError):
+        chunked[0, 0, 0, 0]
+    with pytest.raises(ValueError):
+        ChunkedArray(
+            ArrayChunkSource(xpe.asnumpy(_create_data()), (8, 8, 8)), max_chunks=0
+        )
+
+
+@pytest.mark.parametrize("method", ["linear", "nearest"])
+def test_sample_decodes_touched_chunks(method: Any):
+    data = _create_data()
+    source = _CountingSource(xpe.asnumpy(data), (4, 4, 4))
+    t = xp.reshape(xp.linspace(0.0, 1.0, 200, dtype=xp.float64), (-1, 1))
+    coordinates = t * xp.asarray([19.0, 23.0, 27.0], dtype=xp.float64)
+
+    actual = sample(ChunkedArray(source), coordinates=coordinates, method=method)
+    expected = xpe.sample(data, coordinates=coordinates, method=method)
+
+    assert float(xp.max(xp.abs(actual - expected))) < 1e-9
+    # chunks of floor(x) and floor(x) + 1 on the diagonal, not its bounding box
+    touched = {
+        tuple(
+            min(math.floor(float(x)) + d, n - 1) // 4
+            for x, d, n in zip(c, ds, data.shape)
+        )
+        for c in xpe.asnumpy(coordinates)
+        for ds in itertools.product((0, 1), repeat=3)
+    }
+    assert source.read <= touched
+    assert len(source.read) < 5 * 6 * 7 // 4
+
+
+@pytest.mark.parametrize(
+    "projection, algorithm",
+    [
+        (Orthogoal(), ShearWarp()),
+        (Orthogoal(), ShearWarp(workers=2)),
+        (Orthogoal(), Sampling(step=1.0)),
+        (Orthogoal(), Raycast(step=1.0)),
+        (Perspective(), ShearWarp()),
+    ],
+)
+@pytest.mark.parametrize(
+    "mode",
+    [
+        MIP(),
+        VR(
+            make_transfer_function(
+                [
+                    OpacityControlPoint(intensity=0.0, opacity=0.0),
+                    OpacityControlPoint(intensity=100.0, opacity=0.5),
+                ],
+                [
+                    ColorControlPoint(intensity=0.0, r=1.0, g=1.0, b=1.0),
+                    ColorControlPoint(intensity=100.0, r=1.0, g=0.5, b=0.0),
+                ],
+            )
+        ),
+    ],
+)
+def test_render_chunked_volume(
+    helpers: Helpers, projection: Projection, algorithm: Any, mode: Mode
+):
+    volume = helpers.create_volume(data=_create_data())
+    chunked_volume = helpers.create_volume(
+        data=ChunkedArray(ArrayChunkSource(xpe.asnumpy(volume.data), (8, 8, 8)))
+    )
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=13.5, j=11.5, k=-30.0),
+        forward=Vector(i=0.1, j=0.2, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=32.0, height=32.0, far=80.0, near=4.0),
+    )
+
+    expected = create_renderer(volume, projection, mode, algorithm=algorithm)(
+        camera, spacing=1.0
+    )
+    actual = create_renderer(chunked_volume, projection, mode, algorithm=algorithm)(
+        camera, spacing=1.0
+    )
+
+    assert helpers.approx_equal(
+        convert_image_to_array(actual.image), convert_image_to_array(expected.image)
+    )
+
+
+@pytest.mark.parametrize("algorithm", [ShearWarp(), Sampling(step=1.0)])
+def test_render_chunked_volume_reads_touched_chunks(helpers: Helpers, algorithm: Any):
+    data = _create_data()
+    source = _CountingSource(xpe.asnumpy(data), (4, 4, 4))
+    volume = helpers.create_volume(data=ChunkedArray(source))
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=6.0, j=6.0, k=-10.0),
+        forward=Vector(i=0.0, j=0.0, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=6.0, height=6.0, far=40.0, near=0.0),
+    )
+
+    create_renderer(volume, Orthogoal(), MIP(), algorithm=algorithm)(
+        camera, spacing=1.0
+    )
+
+    # the view volume covers 3x3 of 6x7 columns of chunks
+    assert {(j, i) for _, j, i in source.read} == {
+        (j, i) for j in range(3) for i in range(3)
+    }
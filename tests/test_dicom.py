@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api_extra as xpe
+from tests.conftest import Helpers
+from vanilla_roll.geometry.element import Vector
+from vanilla_roll.io import read_dicom
+from vanilla_roll.io.dicom import DicomIOParams, read_dicom_header
+
+pydicom = pytest.importorskip("pydicom")
+
+
+def _create_pixels(n: int, dtype: Any) -> Any:
+    return (np.arange(4 * 6).reshape((4, 6)) + 10 * n).astype(dtype)
+
+
+@pytest.mark.parametrize("workers", [None, 1, 3])
+def test_read_dicom(helpers: Helpers, tmp_path: Path, workers: int | None):
+    paths = []
+    for n in range(5):
+        paths.append(tmp_path / f"{n}.dcm")
+        helpers.write_dicom_slice(paths[-1], 2.0 * n, _create_pixels(n, np.int16))
+
+    # slices are sorted by descending positions regardless of the order of paths
+    volume = read_dicom(reversed(paths), DicomIOParams(workers=workers))
+
+    data = xpe.asnumpy(volume.data)
+    assert data.shape == (5, 4, 6)
+    assert data.dtype == np.int16
+    for n in range(5):
+        assert np.array_equal(data[n], _create_pixels(4 - n, np.int16))
+    assert volume.frame.origin == Vector(i=-10.0, j=20.0, k=8.0)
+
+
+def test_read_dicom_from_headers(helpers: Helpers, tmp_path: Path):
+    paths = []
+    for n in range(3):
+        paths.append(tmp_path / f"{n}.dcm")
+        helpers.write_dicom_slice(paths[-1], float(n), _create_pixels(n, np.uint16))
+
+    headers = [read_dicom_header(path) for path in paths]
+
+    assert np.array_equal(
+        xpe.asnumpy(read_dicom(headers).data), xpe.asnumpy(read_dicom(paths).data)
+    )
+
+
+def test_read_dicom_promotes_dtype(helpers: Helpers, tmp_path: Path):
+    # mixed pixel representations are promoted to hold values of both
+    helpers.write_dicom_slice(
+        tmp_path / "0.dcm", 0.0, np.full((4, 6), 60000, np.uint16)
+    )
+    helpers.write_dicom_slice(tmp_path / "1.dcm", 1.0, np.full((4, 6), -1000, np.int16))
+    data = xpe.asnumpy(read_dicom(sorted(tmp_path.iterdir())).data)
+    assert data.dtype == np.int32
+    assert data[0, 0, 0] == -1000 and data[1, 0, 0] == 60000
+
+    # a rescaled slice promotes the volume to float64
+    helpers.write_dicom_slice(
+        tmp_path / "2.dcm", 2.0, np.full((4, 6), 10, np.int16), rescale=(2.0, -5.0)
+    )
+    data = xpe.asnumpy(read_dicom(sorted(tmp_path.iterdir())).data)
+    assert data.dtype == np.float64
+    assert data[0, 0, 0] == 15.0 and data[1, 0, 0] == -1000.0
+
+
+def test_read_dicom_fail(helpers: Helpers, tmp_path: Path):
+    with pytest.raises(ValueError):
+        read_dicom([])
+    with pytest.raises(ValueError):
+        DicomIOParams(workers=0)
+
+    helpers.write_dicom_slice(tmp_path / "0.dcm", 0.0, _create_pixels(0, np.int16))
+    helpers.write_dicom_slice(
+        tmp_path / "1.dcm", 1.0, _create_pixels(1, np.int16), "1.2.5"
+    )
+    with pytest.raises(ValueError):
+        read_dicom(sorted(tmp_path.iterdir()))
+
+    # headers missing fields of volumes are malformed
+    d = pydicom.dcmread(tmp_path / "0.dcm")
+    del d.PixelSpacing
+    d.save_as(tmp_path / "2.dcm")
+    with pytest.raises(ValueError):
+        read_dicom_header(tmp_path / "2.dcm")
@@ -0,0 +1,104 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api_extra as xpe
+from tests.conftest import Helpers
+from vanilla_roll.io import read_dicom
+from vanilla_roll.io.dicom_index import DicomIndex
+
+pydicom = pytest.importorskip("pydicom")
+
+
+def _create_series(
+    helpers: Helpers, path: Path, series_instance_uid: str, n: int
+) -> list[Path]:
+    path.mkdir(parents=True, exist_ok=True)
+    paths = [path / f"{i}.dcm" for i in range(n)]
+    for i, p in enumerate(paths):
+        pixels = (np.arange(4 * 6).reshape((4, 6)) + 10 * i).astype(np.int16)
+        helpers.write_dicom_slice(p, 2.0 * i, pixels, series_instance_uid)
+    return paths
+
+
+def test_scan(helpers: Helpers, tmp_path: Path):
+    _create_series(helpers, tmp_path / "a", "1.2.3.4", 3)
+    _create_series(helpers, tmp_path / "b", "1.2.3.5", 2)
+    (tmp_path / "note.txt").write_text("not a dicom file")
+    # files truncated at various lengths fail to be read in various ways, while
+    # ones truncated only in pixel data are indexed as a series
+    (content,) = [
+        p.read_bytes() for p in _create_series(helpers, tmp_path / "c", "1.2.3.6", 1)
+    ]
+    for n in range(0, len(content), 16):
+        (tmp_path / "c" / f"truncated_{n}.dcm").write_bytes(content[:n])
+
+    with DicomIndex(":memory:") as index:
+        index.scan(tmp_path, workers=2)
+        assert index.series() == ["1.2.3.4", "1.2.3.5", "1.2.3.6"]
+        headers = index.headers("1.2.3.4")
+        assert [Path(h.path).name for h in headers] == ["0.dcm", "1.dcm", "2.dcm"]
+        assert [h.ImagePositionPatient[2] for h in headers] == [0.0, 2.0, 4.0]
+        assert len(index.headers("1.2.3.5")) == 2
+        assert "0.dcm" in [Path(h.path).name for h in index.headers("1.2.3.6")]
+
+
+def test_scan_persists(helpers: Helpers, tmp_path: Path):
+    _create_series(helpers, tmp_path / "a", "1.2.3.4", 2)
+
+    with DicomIndex(tmp_path / "index.db") as index:
+        index.scan(tmp_path / "a")
+    with DicomIndex(tmp_path / "index.db") as index:
+        assert index.series() == ["1.2.3.4"]
+        assert len(index.headers("1.2.3.4")) == 2
+
+
+def test_rescan(helpers: Helpers, tmp_path: Path):
+    paths = _create_series(helpers, tmp_path, "1.2.3.4", 3)
+
+    with DicomIndex(":memory:") as index:
+        index.scan(tmp_path)
+
+        paths[2].unlink()
+        pixels = np.zeros((4, 6), dtype=np.int16)
+        helpers.write_dicom_slice(paths[1], 2.0, pixels, "1.2.3.5")
+        os.utime(paths[1], (0.0, 0.0))
+        index.scan(tmp_path)
+
+        assert index.series() == ["1.2.3.4", "1.2.3.5"]
+        assert [Path(h.path).name for h in index.headers("1.2.3.4")] == ["0.dcm"]
+        assert [h.mtime for h in index.headers("1.2.3.5")] == [0.0]
+
+
+def test_read_dicom_from_index(helpers: Helpers, tmp_path: Path):
+    _create_series(helpers, tmp_path, "1.2.3.4", 3)
+
+    with DicomIndex(":memory:") as index:
+        index.scan(tmp_path)
+        volume = read_dicom(index.headers("1.2.3.4"))
+
+    assert volume.shape == (3, 4, 6)
+    data = xpe.asnumpy(volume.data)
+    assert data[:, 0, 0].tolist() == [20, 10, 0]
+
+
+def test_read_dicom_from_stale_index(helpers: Helpers, tmp_path: Path):
+    paths = _create_series(helpers, tmp_path, "1.2.3.4", 3)
+
+    with DicomIndex(":memory:") as index:
+        index.scan(tmp_path)
+        headers = index.headers("1.2.3.4")
+
+    pixels = np.zeros((4, 6), dtype=np.int16)
+    helpers.write_dicom_slice(paths[0], 6.0, pixels)
+    os.utime(paths[0], (0.0, 0.0))
+    volume = read_dicom(headers)
+
+    data = xpe.asnumpy(volume.data)
+    assert data[:, 0, 0].tolist() == [0, 20, 10]
+
+    paths[1].unlink()
+    with pytest.raises(FileNotFoundError):
+        read_dicom(headers)
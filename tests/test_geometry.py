@@ -6,7 +6,7 @@ from typing import Any, Callable
 import pytest
 
 import vanilla_roll.array_api as xp
-from vanilla_roll.geometry.conversion import Permutation, Transformation
+from vanilla_roll.geometry.conversion import Composition, Permutation, Transformation
 from vanilla_roll.geometry.element import (
     Frame,
     Orientation,
@@ -296,6 +296,31 @@ def test_permutation(
     assert order == perm.order
 
 
+@pytest.mark.usefixtures("array_api_backend")
+def test_composition(helpers: Any):
+    src = Frame(
+        Vector(1.0, 2.0, 3.0),
+        Orientation(
+            Vector(1.0, 0.0, 0.0), Vector(0.0, 1.0, 0.0), Vector(0.0, 0.0, 1.0)
+        ),
+    )
+    dst = Frame(
+        Vector(2.0, 1.0, 0.5),
+        Orientation(
+            Vector(0.5, 0.5, 0.0), Vector(-0.5, 0.5, 0.0), Vector(0.0, 0.0, 1.0)
+        ),
+    )
+    transform = Transformation(src, dst)
+    perm = Permutation((1, 2, 0))
+    composition = Composition(transform, perm)
+
+    points = xp.asarray([[1.0, 2.0, -3.0], [0.5, 4.0, 2.0], [3.0, -1.0, 0.0]])
+    assert helpers.approx_equal(composition(points), perm(transform(points)))
+    assert helpers.approx_equal(composition.inverse(composition(points)), points)
+    assert helpers.approx_equal(transform.inverse(transform(points)), points)
+    assert perm.inverse(perm(Vector(1.0, 2.0, 3.0))) == Vector(1.0, 2.0, 3.0)
+
+
 def test_normalize_vector():
     nv = normalize_vector(Vector(1.0, 2.0, 3.0))
     assert pytest.approx(0.26726, 1e-5) == nv.i
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from tests.conftest import Helpers
+from vanilla_roll.chunked import ArrayChunkSource, ChunkedArray
+from vanilla_roll.geometry.element import Orientation, Vector
+from vanilla_roll.io import load_volume, save_volume
+from vanilla_roll.io.native import NativeIOParams
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_and_load_volume(
+    helpers: Helpers, tmp_path: Path, chunked: bool, mmap: bool
+):
+    data = xp.reshape(xp.arange(5 * 6 * 7, dtype=xp.int16), (5, 6, 7))
+    volume = helpers.create_volume(
+        data=(
+            ChunkedArray(ArrayChunkSource(xpe.asnumpy(data), (2, 4, 4)))
+            if chunked
+            else data
+        ),
+        origin=Vector(1.0, -2.0, 3.5),
+        orientation=Orientation(
+            Vector(0.5, 0.0, 0.0), Vector(0.0, 0.5, 0.1), Vector(0.0, 0.0, 2.0)
+        ),
+    )
+
+    save_volume(volume, tmp_path / "volume")
+    loaded = load_volume(tmp_path / "volume", NativeIOParams(mmap=mmap))
+
+    assert loaded.data.dtype == xp.int16
+    assert bool(xp.all(loaded.data == data))
+    assert loaded.frame == volume.frame
+    assert loaded.anatomy_orientation == volume.anatomy_orientation
+    assert isinstance(xpe.asnumpy(loaded.data).base, np.memmap) == mmap
+
+
+def test_load_volume_fail(helpers: Helpers, tmp_path: Path):
+    with pytest.raises(ValueError):
+        load_volume(tmp_path)
+
+    volume = helpers.create_volume(shape=(2, 2, 2))
+    save_volume(volume, tmp_path)
+    (tmp_path / "volume.json").write_text('{"version": 0}')
+    with pytest.raises(ValueError):
+        load_volume(tmp_path)
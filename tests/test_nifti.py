@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.chunked import ChunkedArray
+from vanilla_roll.io import read_nifti
+from vanilla_roll.io.nifti import NIFTIIOParams
+
+nib = pytest.importorskip("nibabel")
+
+
+def _write_nifti(path: Path, slope: float, inter: float) -> np.ndarray:
+    raw = np.arange(6 * 5 * 20, dtype=np.int16).reshape((6, 5, 20))
+    image = nib.Nifti1Image(raw, affine=np.diag([0.5, 0.75, 2.0, 1.0]))
+    image.header.set_slope_inter(slope, inter)
+    nib.save(image, str(path))
+    return raw
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_read_nifti_unscaled(tmp_path: Path, mmap: bool):
+    raw = _write_nifti(tmp_path / "image.nii", 1.0, 0.0)
+
+    volume = read_nifti(tmp_path / "image.nii", NIFTIIOParams(mmap=mmap))
+
+    assert volume.shape == raw.shape
+    assert np.array_equal(xpe.asnumpy(volume.data), raw)
+    if mmap:
+        # the memory map backs the data without copies
+        assert isinstance(xpe.asnumpy(volume.data).base, np.memmap)
+
+
+def test_read_nifti_scaled_mmap(tmp_path: Path):
+    raw = _write_nifti(tmp_path / "image.nii", 0.5, -10.0)
+
+    volume = read_nifti(tmp_path / "image.nii", NIFTIIOParams(mmap=True))
+
+    assert isinstance(volume.data, ChunkedArray)
+    assert volume.data.dtype == xp.float32
+    expected = raw.astype(np.float32) * 0.5 - 10.0
+    assert np.allclose(xpe.asnumpy(volume.data[2, :, 3:17]), expected[2, :, 3:17])
+    assert np.allclose(xpe.asnumpy(volume.data[:, :, :]), expected)
+    assert np.allclose(xpe.asnumpy(read_nifti(tmp_path / "image.nii").data), expected)
@@ -0,0 +1,99 @@
+import bz2
+import gzip
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.anatomy_orientation import CSA, Axial, Coronal, Sagittal
+from vanilla_roll.geometry.element import Orientation, Vector
+from vanilla_roll.io import read_nrrd
+from vanilla_roll.io.nrrd import NRRDIOParams
+
+_HEADER = """NRRD0004
+# Complete NRRD file format specification at:
+# http://teem.sourceforge.net/nrrd/format.html
+type: {type}
+dimension: 3
+space: left-posterior-superior
+sizes: 4 3 2
+space directions: (0.5,0,0) (0,0.75,0) (0,0,2)
+kinds: domain domain domain
+endian: {endian}
+encoding: {encoding}
+space origin: (-1,2.5,3)
+{extra}"""
+
+
+def _create_data(dtype: str) -> np.ndarray:
+    return np.arange(2 * 3 * 4, dtype=dtype).reshape((2, 3, 4))
+
+
+def _encode(data: np.ndarray, encoding: str) -> bytes:
+    match encoding:
+        case "raw":
+            return data.tobytes()
+        case "gzip":
+            return gzip.compress(data.tobytes())
+        case "bzip2":
+            return bz2.compress(data.tobytes())
+        case _:
+            return " ".join(str(v) for v in data.ravel()).encode()
+
+
+@pytest.mark.parametrize("encoding", ["raw", "gzip", "bzip2", "ascii"])
+@pytest.mark.parametrize("dtype, type", [("<i2", "short"), ("<f4", "float")])
+@pytest.mark.parametrize("mmap", [True, False])
+def test_read_nrrd(tmp_path: Path, encoding: str, dtype: str, type: str, mmap: bool):
+    data = _create_data(dtype)
+    header = _HEADER.format(type=type, endian="little", encoding=encoding, extra="")
+    path = tmp_path / "volume.nrrd"
+    path.write_bytes(header.encode() + b"\n" + _encode(data, encoding))
+
+    volume = read_nrrd(path, NRRDIOParams(mmap=mmap))
+
+    assert np.array_equal(xpe.asnumpy(volume.data), data)
+    assert volume.frame.origin == Vector(i=-1.0, j=2.5, k=3.0)
+    assert volume.frame.orientation == Orientation(
+        i=Vector(i=0.5, j=0.0, k=0.0),
+        j=Vector(i=0.0, j=0.75, k=0.0),
+        k=Vector(i=0.0, j=0.0, k=2.0),
+    )
+    assert volume.anatomy_orientation == CSA(
+        Coronal.LEFT, Sagittal.POSTERIOR, Axial.SUPERIOR
+    )
+
+
+@pytest.mark.parametrize("encoding", ["raw", "gzip"])
+def test_read_detached_nrrd(tmp_path: Path, encoding: str):
+    data = _create_data(">u2")
+    extra = "byte skip: 3\ndata file: volume.raw\n"
+    header = _HEADER.format(type="ushort", endian="big", encoding=encoding, extra=extra)
+    (tmp_path / "volume.nhdr").write_text(header)
+    payload = data.tobytes()
+    if encoding == "gzip":
+        (tmp_path / "volume.raw").write_bytes(gzip.compress(b"xyz" + payload))
+    else:
+        (tmp_path / "volume.raw").write_bytes(b"xyz" + payload)
+
+    volume = read_nrrd(tmp_path / "volume.nhdr")
+
+    assert np.array_equal(xpe.asnumpy(volume.data), data.astype("<u2"))
+
+
+def test_read_nrrd_fail(tmp_path: Path):
+    path = tmp_path / "volume.nrrd"
+    path.write_bytes(b"P5\n")
+    with pytest.raises(ValueError):
+        read_nrrd(path)
+
+    header = _HEADER.format(type="short", endian="little", encoding="raw", extra="")
+    path.write_bytes(header.encode() + b"\n" + b"\0" * 10)
+    with pytest.raises(ValueError):
+        read_nrrd(path, NRRDIOParams(mmap=False))
+
+    header = _HEADER.format(type="block", endian="little", encoding="raw", extra="")
+    path.write_bytes(header.encode() + b"\n")
+    with pytest.raises(NotImplementedError):
+        read_nrrd(path)
@@ -0,0 +1,857 @@
+import math
+import tracemalloc
+from typing import Any
+
+import pytest
+
+import vanilla_roll.array_api as xp
+from tests.conftest import Helpers
+from vanilla_roll.anatomy_orientation import Axial, Coronal, Sagittal
+from vanilla_roll.camera import (
+    ViewVolume,
+    create_from_anatomy_axis,
+    create_from_volume_coordinates,
+)
+from vanilla_roll.geometry.element import Vector
+from vanilla_roll.rendering import (
+    convert_image_to_array,
+    create_batch_renderer,
+    create_renderer,
+    render_in_processes,
+    render_progressive,
+)
+from vanilla_roll.rendering.algorithm import Raycast, Sampling, ShearWarp
+from vanilla_roll.rendering.composition import AccMean, AccVR, Slice2d
+from vanilla_roll.rendering.empty_space import (
+    Occupancy,
+    find_visible_bricks,
+    find_visible_levels,
+)
+from vanilla_roll.rendering.mode import MIP, VR, Average, MinP
+from vanilla_roll.rendering.orthogonal_raycast import (
+    create_renderer as create_orthogonal_raycast,
+)
+from vanilla_roll.rendering.orthogonal_sampling import (
+    _BYTES_PER_SAMPLE,  # pyright: ignore[reportPrivateUsage]
+)
+from vanilla_roll.rendering.orthogonal_sampling import (
+    create_renderer as create_orthogonal_sampling,
+)
+from vanilla_roll.rendering.orthogonal_shear_warp import (
+    _calc_update_region_slice,  # pyright: ignore[reportPrivateUsage]
+)
+from vanilla_roll.rendering.orthogonal_shear_warp import (
+    create_renderer as create_orthogonal_shear_warp,
+)
+from vanilla_roll.rendering.projection import Orthogoal, Perspective
+from vanilla_roll.rendering.transfer_function import (
+    ColorControlPoint,
+    OpacityControlPoint,
+    Preset,
+    Result,
+    TransferFunctionTable,
+    get_preset,
+    make_transfer_function,
+    tabulate,
+)
+from vanilla_roll.rendering.types import ColorImage, MonoImage
+
+
+def _create_opaque_transfer_function() -> Any:
+    return make_transfer_function(
+        [
+            OpacityControlPoint(intensity=-1.0, opacity=1.0),
+            OpacityControlPoint(intensity=2.0, opacity=1.0),
+        ],
+        [
+            ColorControlPoint(intensity=-1.0, r=1.0, g=1.0, b=1.0),
+            ColorControlPoint(intensity=2.0, r=1.0, g=1.0, b=1.0),
+        ],
+    )
+
+
+def _create_threshold_transfer_function() -> Any:
+    return make_transfer_function(
+        [
+            OpacityControlPoint(intensity=0.0, opacity=0.0),
+            OpacityControlPoint(intensity=50.0, opacity=0.0),
+            OpacityControlPoint(intensity=100.0, opacity=0.5),
+            OpacityControlPoint(intensity=200.0, opacity=0.5),
+        ],
+        [
+            ColorControlPoint(intensity=0.0, r=1.0, g=0.5, b=0.0),
+            ColorControlPoint(intensity=200.0, r=1.0, g=0.5, b=0.0),
+        ],
+    )
+
+
+def _create_cube_volume(helpers: Helpers) -> Any:
+    data = xp.zeros((32, 32, 32), dtype=xp.float64)
+    data[4:12, 20:28, 8:16] = 100.0
+    return helpers.create_volume(data=data)
+
+
+class _CountingAccVR(AccVR):
+    composited: int = 0
+
+    def add(
+        self,
+        image: xp.Array,
+        thickness: float,
+        /,
+        *,
+        mask: xp.Array | None = None,
+        slice: Slice2d | None = None,
+    ) -> None:
+        _CountingAccVR.composited += (
+            int(xp.sum(xp.astype(mask, xp.int64)))
+            if mask is not None
+            else image.shape[0] * image.shape[1]
+        )
+        super().add(image, thickness, mask=mask, slice=slice)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_raycast_mip_matches_sampling(helpers: Helpers):
+    j = xp.reshape(xp.arange(16, dtype=xp.float64), (1, 16, 1))
+    i = xp.reshape(xp.arange(16, dtype=xp.float64), (1, 1, 16))
+    data = xp.ones((16, 16, 16), dtype=xp.float64) * (j + 16.0 * i)
+    volume = helpers.create_volume(data=data)
+    camera = create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR)
+
+    expected = create_renderer(
+        volume, Orthogoal(), MIP(), algorithm=Sampling(step=1.0), precision="float64"
+    )(camera, spacing=1.0)
+    actual = create_renderer(
+        volume, Orthogoal(), MIP(), algorithm=Raycast(step=1.0), precision="float64"
+    )(camera, spacing=1.0)
+
+    assert isinstance(actual.image, MonoImage)
+    assert isinstance(expected.image, MonoImage)
+    assert helpers.approx_equal(actual.image.l, expected.image.l)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_raycast_early_ray_termination(helpers: Helpers):
+    volume = helpers.create_volume(data=xp.ones((16, 16, 16), dtype=xp.float64))
+    camera = create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR)
+    transfer_function = _create_opaque_transfer_function()
+
+    def _count(termination_threshold: float) -> int:
+        _CountingAccVR.composited = 0
+        render = create_orthogonal_raycast(
+            volume,
+            step=1.0,
+            termination_threshold=termination_threshold,
+            accumulator_constructor=lambda shape: _CountingAccVR(
+                shape, transfer_function
+            ),
+            sampling_method="linear",
+        )
+        render(camera, spacing=1.0)
+        return _CountingAccVR.composited
+
+    assert 4 * _count(0.9) < _count(1.0)
+
+
+@pytest.mark.parametrize("step, termination_threshold", [(0.0, 0.9), (1.0, 1.5)])
+def test_raycast_create_fail(step: float, termination_threshold: float):
+    with pytest.raises(ValueError):
+        Raycast(step=step, termination_threshold=termination_threshold)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_find_visible_bricks(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    visible = find_visible_bricks(
+        volume.macrocells.level(0), _create_threshold_transfer_function()
+    )
+
+    assert visible.shape == (4, 4, 4)
+    assert int(xp.sum(xp.astype(visible, xp.int64))) == 8
+    assert bool(xp.all(visible[0:2, 2:4, 0:2]))
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_find_visible_bricks_narrow_spike(helpers: Helpers):
+    data = xp.reshape(xp.arange(32**3, dtype=xp.float64), (32, 32, 32)) / 32.0
+    volume = helpers.create_volume(data=data)
+
+    def _spike(x: xp.Array) -> Result:
+        opacity = xp.astype((100.5 <= x) & (x < 100.51), xp.float64)
+        return Result(r=opacity, g=opacity, b=opacity, opacity=opacity)
+
+    visible = find_visible_bricks(volume.macrocells.level(0), _spike)
+
+    # the brick of voxel (3, 4, 16), whose intensity is 100.5
+    assert bool(visible[0, 0, 2])
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_find_visible_levels(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    transfer_function = _create_threshold_transfer_function()
+
+    levels = find_visible_levels(volume.macrocells, transfer_function)
+
+    assert [v.shape for v in levels] == [(4, 4, 4), (2, 2, 2), (1, 1, 1)]
+    expected = find_visible_bricks(volume.macrocells.level(0), transfer_function)
+    assert bool(xp.all(levels[0] == expected))
+    assert int(xp.sum(xp.astype(levels[1], xp.int64))) == 1
+    assert bool(levels[1][0, 1, 0])
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_occupancy_traverses_coarse_levels():
+    fine = xp.ones((4, 4, 4), dtype=xp.bool)
+
+    def _find(coarse: xp.Array) -> Any:
+        occupancy = Occupancy(levels=(fine, coarse), brick_size=8)
+        return occupancy.find_slice_region(0, (32, 32))
+
+    # bricks of transparent coarse bricks are not searched
+    assert _find(xp.zeros((2, 2, 2), dtype=xp.bool)) is None
+    coarse = xp.zeros((2, 2, 2), dtype=xp.bool)
+    coarse[0, 1, 0] = True
+    found = _find(coarse)
+    assert found is not None
+    assert found[0] == Slice2d(j=slice(16, 32), i=slice(0, 16))
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "face, up",
+    [
+        (Sagittal.ANTERIOR, Axial.SUPERIOR),
+        (Axial.SUPERIOR, Sagittal.ANTERIOR),
+    ],
+)
+def test_shear_warp_empty_space_skipping(
+    helpers: Helpers, face: Sagittal | Axial, up: Sagittal | Axial
+):
+    volume = _create_cube_volume(helpers)
+    camera = create_from_anatomy_axis(volume, face=face, up=up)
+    transfer_function = _create_threshold_transfer_function()
+
+    def _render(skip: bool) -> Any:
+        render = create_orthogonal_shear_warp(
+            volume,
+            accumulator_constructor=lambda shape: AccVR(shape, transfer_function),
+            sampling_method="linear",
+            transfer_function=transfer_function if skip else None,
+        )
+        return render(camera, spacing=1.0).image
+
+    expected = _render(skip=False)
+    actual = _render(skip=True)
+
+    assert isinstance(actual, ColorImage)
+    assert isinstance(expected, ColorImage)
+    assert 0.0 < float(xp.max(expected.r))
+    assert helpers.approx_equal(actual.r, expected.r)
+    assert helpers.approx_equal(actual.g, expected.g)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "face, up",
+    [
+        (Sagittal.ANTERIOR, Axial.SUPERIOR),
+        (Axial.SUPERIOR, Sagittal.ANTERIOR),
+    ],
+)
+def test_shear_warp_run_length_encoding(
+    helpers: Helpers, face: Sagittal | Axial, up: Sagittal | Axial
+):
+    volume = _create_cube_volume(helpers)
+    camera = create_from_anatomy_axis(volume, face=face, up=up)
+    transfer_function = _create_threshold_transfer_function()
+
+    def _render(encode: bool) -> tuple[int, Any]:
+        _CountingAccVR.composited = 0
+        render = create_orthogonal_shear_warp(
+            volume,
+            accumulator_constructor=lambda shape: _CountingAccVR(
+                shape, transfer_function
+            ),
+            sampling_method="linear",
+            classifier=transfer_function if encode else None,
+        )
+        image = render(camera, spacing=1.0).image
+        return _CountingAccVR.composited, image
+
+    expected_count, expected = _render(encode=False)
+    actual_count, actual = _render(encode=True)
+
+    assert isinstance(actual, ColorImage)
+    assert isinstance(expected, ColorImage)
+    assert actual_count <= 8 * 8 * 8 < expected_count
+    assert helpers.approx_equal(actual.r, expected.r)
+    assert helpers.approx_equal(actual.g, expected.g)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_shear_warp_early_termination(helpers: Helpers):
+    volume = helpers.create_volume(data=xp.ones((16, 16, 16), dtype=xp.float64))
+    camera = create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR)
+    transfer_function = _create_opaque_transfer_function()
+
+    def _render(termination_threshold: float) -> tuple[int, Any]:
+        _CountingAccVR.composited = 0
+        render = create_orthogonal_shear_warp(
+            volume,
+            accumulator_constructor=lambda shape: _CountingAccVR(
+                shape, transfer_function
+            ),
+            sampling_method="linear",
+            termination_threshold=termination_threshold,
+        )
+        image = render(camera, spacing=1.0).image
+        return _CountingAccVR.composited, image
+
+    terminated_count, terminated = _render(0.9)
+    full_count, full = _render(1.0)
+
+    assert 4 * terminated_count < full_count
+    assert isinstance(terminated, ColorImage)
+    assert isinstance(full, ColorImage)
+    assert float(xp.max(xp.abs(terminated.r - full.r))) < 0.1
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_shear_warp_view_volume_clipping(helpers: Helpers):
+    volume = helpers.create_volume(data=xp.ones((16, 16, 16), dtype=xp.float64))
+    transfer_function = _create_threshold_transfer_function()
+
+    def _count(view_volume: ViewVolume) -> int:
+        _CountingAccVR.composited = 0
+        render = create_orthogonal_shear_warp(
+            volume,
+            accumulator_constructor=lambda shape: _CountingAccVR(
+                shape, transfer_function
+            ),
+            sampling_method="linear",
+        )
+        camera = create_from_volume_coordinates(
+            volume,
+            position=Vector(i=8.5, j=8.5, k=-2.5),
+            forward=Vector(i=0.0, j=0.0, k=1.0),
+            up=Vector(i=0.0, j=-1.0, k=0.0),
+            view_volume=view_volume,
+        )
+        render(camera, spacing=1.0)
+        return _CountingAccVR.composited
+
+    # slices 0 to 3 in the slab and 4 x 6 voxels of each in the screen
+    assert _count(ViewVolume(width=4.0, height=6.0, far=7.0, near=1.0)) == 4 * 4 * 6
+    assert _count(ViewVolume(width=32.0, height=32.0, far=32.0, near=0.0)) == 16**3
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize("algorithm", [ShearWarp(), Raycast(step=1.0)])
+def test_view_volume_clipping_average(helpers: Helpers, algorithm: Any):
+    volume = helpers.create_volume(data=10.0 * xp.ones((16, 16, 16), dtype=xp.float64))
+    render = create_renderer(volume, Orthogoal(), Average(), algorithm=algorithm)
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=8.5, j=8.5, k=-2.5),
+        forward=Vector(i=0.0, j=0.0, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=4.0, height=6.0, far=7.0, near=1.0),
+    )
+
+    image = render(camera, spacing=1.0).image
+
+    # steps through the volume clipped by the view volume are counted in the mean
+    assert isinstance(image, MonoImage)
+    assert float(xp.max(image.l)) == pytest.approx(10.0 * 4 / 16)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "face, up",
+    [(Axial.SUPERIOR, Sagittal.ANTERIOR), (Coronal.LEFT, Axial.SUPERIOR)],
+)
+def test_average_across_algorithms(helpers: Helpers, face: Any, up: Any):
+    volume = helpers.create_volume(data=10.0 * xp.ones((16, 16, 16), dtype=xp.float64))
+    camera = create_from_anatomy_axis(volume, face=face, up=up)
+
+    # the view volume is deeper than the volume, whose steps are counted alone
+    for algorithm in [Sampling(step=1.0), Raycast(step=1.0), ShearWarp()]:
+        image = create_renderer(
+            volume,
+            Orthogoal(),
+            Average(),
+            sampling_method="nearest",
+            algorithm=algorithm,
+        )(camera, spacing=1.0).image
+        assert isinstance(image, MonoImage)
+        center = image.l[image.l.shape[0] // 2, image.l.shape[1] // 2]
+        assert float(center) == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize(
+    "termination_threshold, max_permuted_bytes, workers",
+    [(0.0, None, 1), (0.9, -1, 1), (0.9, None, 0)],
+)
+def test_shear_warp_create_fail(
+    termination_threshold: float, max_permuted_bytes: int | None, workers: int
+):
+    with pytest.raises(ValueError):
+        ShearWarp(
+            termination_threshold=termination_threshold,
+            max_permuted_bytes=max_permuted_bytes,
+            workers=workers,
+        )
+
+
+def test_shear_warp_offsets_snap_to_integers():
+    # offsets of exact views may be computed off by rounding errors
+    shearing = Vector(i=1.0 - 1e-12, j=-1.0 - 1e-12, k=0.0)
+    translation = Vector(i=0.0, j=3.0 + 1e-12, k=0.0)
+    region = Slice2d(j=slice(0, 4), i=slice(0, 4))
+
+    updated = _calc_update_region_slice(3, shearing, translation, region)
+
+    assert updated == Slice2d(j=slice(0, 4), i=slice(3, 7))
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize("projection", [Orthogoal(), Perspective()])
+def test_shear_warp_depth_slabs(helpers: Helpers, projection: Any):
+    k = xp.reshape(xp.arange(16, dtype=xp.float64), (16, 1, 1))
+    i = xp.reshape(xp.arange(16, dtype=xp.float64), (1, 1, 16))
+    volume = helpers.create_volume(data=xp.ones((16, 16, 16), dtype=xp.float64) * k * i)
+    camera = create_from_volume_coordinates(
+        volume,
+        position=Vector(i=6.0, j=7.0, k=-12.0),
+        forward=Vector(i=0.2, j=0.1, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=12.0, height=12.0, far=40.0, near=4.0),
+    )
+    table = tabulate(
+        make_transfer_function(
+            [
+                OpacityControlPoint(intensity=0.0, opacity=0.0),
+                OpacityControlPoint(intensity=225.0, opacity=0.3),
+            ],
+            [
+                ColorControlPoint(intensity=0.0, r=1.0, g=0.5, b=0.0),
+                ColorControlPoint(intensity=225.0, r=0.0, g=0.5, b=1.0),
+            ],
+        ),
+        (0.0, 225.0),
+    )
+
+    for mode in [MIP(), MinP(), Average(), VR(table), VR(table, pre_integrated=True)]:
+        expected, actual = (
+            convert_image_to_array(
+                create_renderer(
+                    volume,
+                    projection,
+                    mode,
+                    algorithm=ShearWarp(workers=workers),
+                    precision="float64",
+                )(camera, spacing=1.0).image
+            )
+            for workers in [1, 4]
+        )
+        assert helpers.approx_equal(actual, expected)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize("projection", [Orthogoal(), Perspective()])
+def test_shear_warp_permuted_copies(helpers: Helpers, projection: Any):
+    data = xp.zeros((16, 16, 16), dtype=xp.float64)
+    data[4:12, 6:10, 2:14] = 1.0
+    volume = helpers.create_volume(data=data)
+    cameras = [
+        create_from_volume_coordinates(
+            volume,
+            position=position,
+            forward=forward,
+            up=up,
+            view_volume=ViewVolume(width=8.0, height=8.0, far=100.0, near=8.0),
+        )
+        for position, forward, up in [
+            (
+                Vector(i=8.0, j=8.0, k=-16.0),
+                Vector(i=0.0, j=0.0, k=1.0),
+                Vector(i=0.0, j=-1.0, k=0.0),
+            ),
+            (
+                Vector(i=8.0, j=-16.0, k=8.0),
+                Vector(i=0.0, j=1.0, k=0.0),
+                Vector(i=0.0, j=0.0, k=1.0),
+            ),
+            (
+                Vector(i=32.0, j=8.0, k=8.0),
+                Vector(i=-1.0, j=0.0, k=0.0),
+                Vector(i=0.0, j=0.0, k=1.0),
+            ),
+        ]
+    ]
+
+    def _render(max_permuted_bytes: int | None) -> list[Any]:
+        render = create_renderer(
+            volume,
+            projection,
+            MIP(),
+            algorithm=ShearWarp(max_permuted_bytes=max_permuted_bytes),
+        )
+        return [render(camera, spacing=1.0).image for camera in cameras]
+
+    for budget in (0, 16 * 16 * 16 * 8):
+        for actual, expected in zip(_render(budget), _render(None)):
+            assert isinstance(actual, MonoImage)
+            assert isinstance(expected, MonoImage)
+            assert helpers.approx_equal(actual.l, expected.l)
+
+
+def _create_perspective_camera(
+    volume: Any, position: Vector, near: float, width: float
+) -> Any:
+    return create_from_volume_coordinates(
+        volume,
+        position=position,
+        forward=Vector(i=0.0, j=0.0, k=1.0),
+        up=Vector(i=0.0, j=-1.0, k=0.0),
+        view_volume=ViewVolume(width=width, height=width, far=100.0, near=near),
+    )
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_perspective_shear_warp_inside_volume(helpers: Helpers):
+    volume = helpers.create_volume(data=xp.ones((32, 32, 32), dtype=xp.float64))
+    camera = _create_perspective_camera(
+        volume, Vector(i=16.0, j=16.0, k=4.5), near=1.0, width=1.0
+    )
+    render = create_renderer(volume, Perspective(), MIP(), algorithm=ShearWarp())
+
+    result = render(camera, spacing=1.0 / 16)
+
+    assert isinstance(result.image, MonoImage)
+    assert result.image.l.shape == (16, 16)
+    assert helpers.approx_equal(result.image.l, xp.ones((16, 16), dtype=xp.float64))
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_perspective_shear_warp_foreshortening(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    render = create_renderer(volume, Perspective(), MIP(), algorithm=ShearWarp())
+
+    def _count_hits(distance: float) -> int:
+        camera = _create_perspective_camera(
+            volume, Vector(i=12.0, j=24.0, k=4.0 - distance), near=4.0, width=16.0
+        )
+        image = render(camera, spacing=0.25).image
+        assert isinstance(image, MonoImage)
+        return int(xp.sum(xp.astype(50.0 < image.l, xp.int64)))
+
+    near_hits, far_hits = _count_hits(8.0), _count_hits(16.0)
+    assert 0 < far_hits
+    assert 3 * far_hits < near_hits
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_perspective_shear_warp_fail_without_near(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    camera = _create_perspective_camera(
+        volume, Vector(i=12.0, j=24.0, k=-8.0), near=0.0, width=16.0
+    )
+    render = create_renderer(volume, Perspective(), MIP(), algorithm=ShearWarp())
+
+    with pytest.raises(ValueError):
+        render(camera)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_sampling_slab_streaming(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    camera = create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR)
+    mode = VR(_create_threshold_transfer_function())
+
+    def _render(max_slab_bytes: int) -> Any:
+        render = create_renderer(
+            volume,
+            Orthogoal(),
+            mode,
+            algorithm=Sampling(step=1.0, max_slab_bytes=max_slab_bytes),
+        )
+        return render(camera, spacing=1.0).image
+
+    expected = _render(2**30)
+    actual = _render(1)
+
+    assert isinstance(actual, ColorImage)
+    assert isinstance(expected, ColorImage)
+    assert 0.0 < float(xp.max(expected.r))
+    assert helpers.approx_equal(actual.r, expected.r)
+    assert helpers.approx_equal(actual.b, expected.b)
+
+
+@pytest.mark.parametrize("dtype", ["float64", "int16"])
+def test_sampling_slab_memory(helpers: Helpers, dtype: str):
+    # numpy allocations are traced by tracemalloc, while those of others are not
+    data = xp.reshape(xp.arange(64**3, dtype=xp.int64) % 200, (64, 64, 64))
+    volume = helpers.create_volume(data=xp.astype(data, getattr(xp, dtype)))
+    max_slab_bytes = 8 * 48 * 48 * _BYTES_PER_SAMPLE
+
+    def _peak(far: float) -> int:
+        render = create_orthogonal_sampling(
+            volume,
+            step=1.0,
+            max_slab_bytes=max_slab_bytes,
+            accumulator_constructor=lambda shape: AccMean(shape),
+            sampling_method="linear",
+        )
+        # every sample point is in the volume
+        camera = create_from_volume_coordinates(
+            volume,
+            position=Vector(i=32.0, j=32.0, k=4.0),
+            forward=Vector(i=0.0, j=0.0, k=1.0),
+            up=Vector(i=0.0, j=-1.0, k=0.0),
+            view_volume=ViewVolume(width=48.0, height=48.0, far=far, near=0.0),
+        )
+        tracemalloc.start()
+        try:
+            render(camera, spacing=1.0)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    assert _peak(24.0) < max_slab_bytes
+    assert _peak(56.0) < max_slab_bytes
+
+
+def test_sampling_create_fail():
+    with pytest.raises(ValueError):
+        Sampling(step=1.0, max_slab_bytes=0)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_transfer_function_table():
+    transfer_function = _create_threshold_transfer_function()
+    ret = transfer_function(
+        xp.asarray([[-10.0, 25.0, 75.0], [150.0, 199.0, 300.0]], dtype=xp.float64)
+    )
+
+    assert isinstance(transfer_function, TransferFunctionTable)
+    assert ret.opacity.shape == (2, 3)
+    expected = xp.asarray([[0.0, 0.0, 0.25], [0.5, 0.5, 0.0]], dtype=xp.float64)
+    assert bool(xp.all(xp.abs(ret.opacity - expected) < 1e-3))
+    assert bool(xp.all(xp.abs(ret.g[:, 1:2] - 0.5) < 1e-3))
+    assert float(ret.r[0, 0]) == 0.0
+    assert float(ret.r[1, 2]) == 0.0
+
+
+def test_get_preset_cached():
+    assert get_preset(Preset.CT_BONE) is get_preset(Preset.CT_BONE)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_pre_integrated_vr_thin_feature(helpers: Helpers):
+    k = xp.reshape(xp.arange(16, dtype=xp.float64), (16, 1, 1))
+    volume = helpers.create_volume(data=xp.ones((16, 4, 4), dtype=xp.float64) * k)
+    camera = create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR)
+    # a spike between samples 7 and 8 whose integrated opacity is 0.3
+    transfer_function = make_transfer_function(
+        [
+            OpacityControlPoint(intensity=0.0, opacity=0.0),
+            OpacityControlPoint(intensity=7.4, opacity=0.0),
+            OpacityControlPoint(intensity=7.5, opacity=1.0),
+            OpacityControlPoint(intensity=7.7, opacity=1.0),
+            OpacityControlPoint(intensity=7.8, opacity=0.0),
+            OpacityControlPoint(intensity=16.0, opacity=0.0),
+        ],
+        [
+            ColorControlPoint(intensity=0.0, r=1.0, g=1.0, b=1.0),
+            ColorControlPoint(intensity=16.0, r=1.0, g=1.0, b=1.0),
+        ],
+    )
+
+    def _render(pre_integrated: bool) -> float:
+        render = create_renderer(
+            volume,
+            Orthogoal(),
+            VR(transfer_function, pre_integrated=pre_integrated),
+            algorithm=ShearWarp(),
+        )
+        image = render(camera, spacing=1.0).image
+        assert isinstance(image, ColorImage)
+        return float(image.r[8, 8])
+
+    expected = 1.0 - math.exp(-0.3)
+    assert _render(pre_integrated=False) < 0.01
+    assert abs(_render(pre_integrated=True) - expected) < 0.01
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [ShearWarp(), Sampling(step=3.0), Sampling(step=4.0), Raycast(step=4.0)],
+)
+def test_pre_integrated_vr_transparent_boundary(helpers: Helpers, algorithm: Any):
+    # segments across the boundary of transparent and opaque bricks pass the spike
+    data = xp.zeros((32, 32, 32), dtype=xp.float64)
+    data[9:, :, :] = 1000.0
+    volume = helpers.create_volume(data=data)
+    camera = create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR)
+    transfer_function = make_transfer_function(
+        [
+            OpacityControlPoint(intensity=0.0, opacity=0.0),
+            OpacityControlPoint(intensity=400.0, opacity=0.0),
+            OpacityControlPoint(intensity=450.0, opacity=1.0),
+            OpacityControlPoint(intensity=550.0, opacity=1.0),
+            OpacityControlPoint(intensity=600.0, opacity=0.0),
+            OpacityControlPoint(intensity=1000.0, opacity=0.0),
+        ],
+        [
+            ColorControlPoint(intensity=0.0, r=1.0, g=1.0, b=1.0),
+            ColorControlPoint(intensity=1000.0, r=1.0, g=1.0, b=1.0),
+        ],
+    )
+
+    render = create_renderer(
+        volume,
+        Orthogoal(),
+        VR(transfer_function, pre_integrated=True),
+        algorithm=algorithm,
+    )
+    image = render(camera, spacing=1.0).image
+
+    assert isinstance(image, ColorImage)
+    assert 0.1 < float(xp.max(image.r))
+
+
+@pytest.mark.usefixtures("array_api_backend")
+@pytest.mark.parametrize(
+    "algorithm", [ShearWarp(), Sampling(step=1.0), Raycast(step=1.0)]
+)
+def test_rendering_precision(helpers: Helpers, algorithm: Any):
+    k = xp.reshape(xp.arange(16, dtype=xp.float64), (16, 1, 1))
+    j = xp.reshape(xp.arange(16, dtype=xp.float64), (1, 16, 1))
+    volume = helpers.create_volume(data=xp.ones((16, 16, 16), dtype=xp.float64) * k * j)
+    camera = create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR)
+    table = tabulate(
+        make_transfer_function(
+            [
+                OpacityControlPoint(intensity=0.0, opacity=0.0),
+                OpacityControlPoint(intensity=225.0, opacity=0.2),
+            ],
+            [
+                ColorControlPoint(intensity=0.0, r=1.0, g=0.5, b=0.0),
+                ColorControlPoint(intensity=225.0, r=0.0, g=0.5, b=1.0),
+            ],
+        ),
+        (0.0, 225.0),
+    )
+
+    for mode in [MIP(), VR(table), VR(table, pre_integrated=True)]:
+        images = {
+            precision: convert_image_to_array(
+                create_renderer(
+                    volume, Orthogoal(), mode, algorithm=algorithm, precision=precision
+                )(camera, spacing=1.0).image
+            )
+            for precision in ["float32", "float64"]
+        }
+        assert images["float32"].dtype == xp.float32
+        assert images["float64"].dtype == xp.float64
+        scale = max(1.0, float(xp.max(xp.abs(images["float64"]))))
+        difference = xp.abs(
+            xp.astype(images["float32"], xp.float64) - images["float64"]
+        )
+        assert float(xp.max(difference)) < 1e-4 * scale
+
+
+def test_pre_integrated_vr_create_fail():
+    with pytest.raises(ValueError):
+        VR(lambda x: _create_threshold_transfer_function()(x), pre_integrated=True)
+
+
+@pytest.mark.usefixtures("array_api_backend")
+def test_batch_renderer(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    cameras = [
+        create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR),
+        create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR),
+        create_from_anatomy_axis(volume, face=Coronal.LEFT, up=Axial.SUPERIOR),
+        create_from_anatomy_axis(volume, face=Sagittal.POSTERIOR, up=Axial.SUPERIOR),
+    ]
+    mode = VR(_create_threshold_transfer_function())
+
+    render = create_renderer(volume, Orthogoal(), mode)
+    render_batch = create_batch_renderer(volume, Orthogoal(), mode)
+    results = render_batch(cameras, spacing=1.0)
+
+    assert len(results) == len(cameras)
+    for camera, actual in zip(cameras, results):
+        expected = render(camera, spacing=1.0)
+        assert isinstance(actual.image, ColorImage)
+        assert isinstance(expected.image, ColorImage)
+        assert helpers.approx_equal(actual.image.r, expected.image.r)
+
+
+def test_render_in_processes(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    cameras = [
+        create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR),
+        create_from_anatomy_axis(volume, face=Axial.SUPERIOR, up=Sagittal.ANTERIOR),
+        create_from_anatomy_axis(volume, face=Coronal.LEFT, up=Axial.SUPERIOR),
+    ]
+    mode = VR(_create_threshold_transfer_function())
+
+    render = create_renderer(volume, Orthogoal(), mode)
+    results = list(
+        render_in_processes(
+            volume, cameras, Orthogoal(), mode, spacing=1.0, processes=2
+        )
+    )
+
+    assert len(results) == len(cameras)
+    for camera, actual in zip(cameras, results):
+        expected = render(camera, spacing=1.0)
+        assert isinstance(actual.image, ColorImage)
+        assert isinstance(expected.image, ColorImage)
+        assert helpers.approx_equal(actual.image.r, expected.image.r)
+        assert actual.origin == expected.origin
+
+
+@pytest.mark.parametrize("spacing, level", [(1.0, 0), (2.0, 1), (4.0, 2), (7.0, 2)])
+def test_renderer_multi_resolution(helpers: Helpers, spacing: float, level: int):
+    # a checkerboard is smoothed out by any level but 0
+    kss, jss, iss = xp.meshgrid(
+        xp.arange(32), xp.arange(32), xp.arange(32), indexing="ij"
+    )
+    data = 100.0 * xp.astype((kss + jss + iss) % 2, xp.float64)
+    volume = helpers.create_volume(data=data)
+    camera = create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR)
+
+    render = create_renderer(volume, Orthogoal(), MIP())
+    render_level = create_renderer(
+        volume.level(level), Orthogoal(), MIP(), multi_resolution=False
+    )
+    actual = render(camera, spacing=spacing)
+    expected = render_level(camera, spacing=spacing)
+
+    assert isinstance(actual.image, MonoImage)
+    assert isinstance(expected.image, MonoImage)
+    assert actual.image.l.shape == expected.image.l.shape
+    assert helpers.approx_equal(actual.image.l, expected.image.l)
+    assert (float(xp.max(actual.image.l)) == 100.0) == (level == 0)
+
+
+def test_render_progressive(helpers: Helpers):
+    volume = _create_cube_volume(helpers)
+    camera = create_from_anatomy_axis(volume, face=Sagittal.ANTERIOR, up=Axial.SUPERIOR)
+    render = create_renderer(volume, Orthogoal(), MIP())
+
+    results = list(render_progressive(render, camera, spacing=1.0, steps=3))
+
+    assert [r.spacing.i for r in results if r.spacing is not None] == [4.0, 2.0, 1.0]
+    expected = render(camera, spacing=1.0)
+    assert isinstance(results[-1].image, MonoImage)
+    assert isinstance(expected.image, MonoImage)
+    assert helpers.approx_equal(results[-1].image.l, expected.image.l)
+    with pytest.raises(ValueError):
+        next(render_progressive(render, camera, steps=0))
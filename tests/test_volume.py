@@ -0,0 +1,66 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+import vanilla_roll.array_api as xp
+from tests.conftest import Helpers
+from vanilla_roll.geometry.conversion import Transformation
+from vanilla_roll.geometry.element import Orientation, Vector, world_frame
+from vanilla_roll.io import load_volume, save_volume
+from vanilla_roll.io.native import NativeIOParams
+
+
+def test_volume_level(helpers: Helpers):
+    data = xp.reshape(xp.arange(5 * 6 * 8, dtype=xp.float64), (5, 6, 8))
+    volume = helpers.create_volume(
+        data=data,
+        origin=Vector(1.0, 2.0, 3.0),
+        orientation=Orientation(
+            Vector(0.5, 0.0, 0.0), Vector(0.0, 1.0, 0.0), Vector(0.0, 0.0, 2.0)
+        ),
+    )
+
+    level = volume.level(1)
+    assert level is volume.downsampled
+    assert level.shape == (3, 3, 4)
+    assert level.spacing == Vector(1.0, 2.0, 4.0)
+    assert helpers.approx_equal(
+        level.data[0, 0, 0], xp.mean(volume.data[0:2, 0:2, 0:2])
+    )
+
+    # centers of downsampled voxels are the centers of the averaged voxels
+    to_world = Transformation(src=volume.frame, dst=world_frame)
+    level_to_world = Transformation(src=level.frame, dst=world_frame)
+    assert level_to_world(Vector(0.0, 0.0, 0.0)) == to_world(Vector(0.5, 0.5, 0.5))
+    assert volume.level(0) is volume
+    assert volume.level(2).shape == (2, 2, 2)
+
+
+def test_volume_level_fail(helpers: Helpers):
+    volume = helpers.create_volume(shape=(4, 4, 4))
+    with pytest.raises(ValueError):
+        volume.level(-1)
+
+
+def test_volume_level_memmap(helpers: Helpers, tmp_path: Path):
+    data = xp.reshape(xp.arange(256 * 64 * 64, dtype=xp.int64) % 1000, (256, 64, 64))
+    save_volume(
+        helpers.create_volume(data=xp.astype(data, xp.int16)), tmp_path / "volume"
+    )
+    volume = load_volume(tmp_path / "volume", NativeIOParams(mmap=True))
+    nbytes = 256 * 64 * 64 * 2
+
+    # pages of the memory map are not traced, while numpy allocations are
+    tracemalloc.start()
+    try:
+        level = volume.level(1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < nbytes
+    assert level.data.dtype == xp.int16
+    assert int(level.data[0, 0, 1]) == int(
+        xp.round(xp.mean(xp.astype(data[0:2, 0:2, 2:4], xp.float64)))
+    )
@@ -8,7 +8,15 @@ try:
 except PackageNotFoundError:
     __version__: str = "unknown"
 
-from . import anatomy_orientation, camera, camera_sequence, io, rendering, volume
+from . import (
+    anatomy_orientation,
+    camera,
+    camera_sequence,
+    chunked,
+    io,
+    rendering,
+    volume,
+)
 from .usecase import render, render_horizontal_rotations, render_vertical_rotations
 
 __all__ = [
@@ -21,4 +29,5 @@ __all__ = [
     "rendering",
     "camera_sequence",
     "volume",
+    "chunked",
 ]
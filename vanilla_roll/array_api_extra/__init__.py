@@ -1,19 +1,54 @@
-import itertools
-from typing import TYPE_CHECKING, Sequence
+from typing import TYPE_CHECKING, Any, Sequence
 
 import vanilla_roll.array_api as xp
 from vanilla_roll.backend import ArrayApiBackend, get_array_api_backend
 
-from .type import Number, SamplingMethod
+from .type import Number, Precision, SamplingMethod
 
 if TYPE_CHECKING:
-    from .numpy import asnumpy, clip, put, take
+    from .numpy import (
+        ascontiguous,
+        asnumpy,
+        clip,
+        cumsum,
+        from_numpy,
+        nbytes,
+        put,
+        take,
+    )
 elif get_array_api_backend() == ArrayApiBackend.NUMPY:
-    from .numpy import asnumpy, clip, put, take
+    from .numpy import (
+        ascontiguous,
+        asnumpy,
+        clip,
+        cumsum,
+        from_numpy,
+        nbytes,
+        put,
+        take,
+    )
 elif get_array_api_backend() == ArrayApiBackend.PYTORCH:
-    from .pytorch import asnumpy, clip, put, take
+    from .pytorch import (
+        ascontiguous,
+        asnumpy,
+        clip,
+        cumsum,
+        from_numpy,
+        nbytes,
+        put,
+        take,
+    )
 elif get_array_api_backend() == ArrayApiBackend.CUPY:
-    from .cupy import asnumpy, clip, put, take
+    from .cupy import (
+        ascontiguous,
+        asnumpy,
+        clip,
+        cumsum,
+        from_numpy,
+        nbytes,
+        put,
+        take,
+    )
 else:
     raise OSError("No array API backend found")
 
@@ -43,45 +78,111 @@ def assign(array: xp.Array, /, *, indices: xp.Array, values: xp.Array) -> xp.Arr
     return new_array
 
 
-def sample_nearest(array: xp.Array, /, *, coordinates: xp.Array) -> xp.Array:
-    coordinates = clip(
-        coordinates, a_min=xp.zeros(3), a_max=xp.asarray(array.shape) - 1
-    )
-    coordinates = xp.astype(xp.reshape(coordinates, (-1, 3)), xp.int64)
-    indices = ravel_index(coordinates.T, array.shape)
-    return take(array, indices=indices)
+def get_dtype(precision: Precision) -> Any:
+    """Return the floating point dtype of precision.
 
+    >>> get_dtype("float32") == xp.float32
+    True
+    """
+    match precision:
+        case "float32":
+            return xp.float32
+        case "float64":
+            return xp.float64
 
-def sample_linear(array: xp.Array, /, *, coordinates: xp.Array) -> xp.Array:
-    def _create_mask(array: xp.Array, coordinates: xp.Array) -> xp.Array:
-        mask = xp.logical_and(0 <= coordinates, coordinates < xp.asarray(array.shape))
 
-        ret = xp.logical_and(mask[:, 0], mask[:, 1])
-        if array.ndim == 3:
-            ret = xp.logical_and(ret, mask[:, 2])
-        return ret
+def _check_out(out: xp.Array, shape: tuple[int, ...]) -> None:
+    if out.shape != shape:
+        raise ValueError(f"Expected out of shape {shape}, got {out.shape}")
 
-    ret = xp.zeros(coordinates.shape[0])
-    org = xp.astype(xp.floor(coordinates), xp.int32)
-    diff = coordinates - xp.astype(org, xp.float64)
-    shape = array.shape
 
-    for s in itertools.product(*([[0, 1]] * org.shape[-1])):
-        step = xp.asarray(s)
-        cur = org + step
+def _write(result: xp.Array, out: xp.Array | None) -> xp.Array:
+    if out is None:
+        return result
+    _check_out(out, result.shape)
+    out[...] = xp.astype(result, out.dtype)
+    return out
 
-        mask = _create_mask(array, cur)
 
-        cur_indices = ravel_index(cur.T, shape)
-        step = xp.astype(step, xp.float64)
-        cur_weight = xp.prod((1 - step) - (1 - 2 * step) * diff, axis=-1)
+def _sum_corners(weighted: xp.Array, out: xp.Array | None) -> xp.Array:
+    # corners are summed by halves in place, and the last sum is written into out
+    corners = weighted.shape[0]
+    while 2 < corners:
+        corners //= 2
+        weighted[:corners, :] += weighted[corners : 2 * corners, :]
+    if out is None:
+        return weighted[0, :] + weighted[1, :]
 
-        indices = cur_indices[mask]
-        weight = cur_weight[mask]
+    _check_out(out, weighted.shape[1:])
+    if out.dtype != weighted.dtype:
+        out[...] = xp.astype(weighted[0, :] + weighted[1, :], out.dtype)
+        return out
+    out[...] = weighted[0, :]
+    out += weighted[1, :]
+    return out
 
-        values = take(array, indices=indices)
-        ret[mask] += weight * xp.astype(values, xp.float64)
-    return ret
+
+def sample_nearest(
+    array: xp.Array, /, *, coordinates: xp.Array, out: xp.Array | None = None
+) -> xp.Array:
+    coordinates = clip(
+        coordinates, a_min=xp.zeros(array.ndim), a_max=xp.asarray(array.shape) - 1
+    )
+    coordinates = xp.astype(xp.reshape(coordinates, (-1, array.ndim)), xp.int64)
+    indices = ravel_index(coordinates.T, array.shape)
+    return _write(take(array, indices=indices), out)
+
+
+def sample_linear(
+    array: xp.Array,
+    /,
+    *,
+    coordinates: xp.Array,
+    out: xp.Array | None = None,
+    precision: Precision = "float64",
+) -> xp.Array:
+    """Sample array at coordinates by bilinear or trilinear interpolation.
+
+    Corners outside of array contribute nothing. All corners of all coordinates
+    are gathered by a single take, and they are interpolated in precision. Corners
+    are weighted and summed in place, and the sum is written into out if given,
+    so that no array of the samples is allocated besides out.
+
+    >>> array = xp.asarray([[0.0, 1.0], [2.0, 3.0]])
+    >>> sample_linear(array, coordinates=xp.asarray([[0.5, 0.5], [0.0, 1.5]]))
+    Array([1.5, 0.5], dtype=float64)
+    """
+    dtype = get_dtype(precision)
+    ndim = array.ndim
+    n = coordinates.shape[0]
+    org = xp.floor(coordinates)
+    frac = xp.astype(coordinates - org, dtype)
+    org = xp.astype(org, xp.int64)
+
+    # offsets and weights of the lower and the upper corner along each axis
+    # are combined by broadcasting into those of all 2 ** ndim corners
+    indices = xp.zeros((1,) * ndim + (n,), dtype=xp.int64)
+    weights = xp.ones((1,) * ndim + (n,), dtype=dtype)
+    stride = 1
+    for axis in reversed(range(ndim)):
+        lower = org[:, axis]
+        corner_indices = xp.stack([lower, lower + 1])
+        valid = xp.logical_and(0 <= corner_indices, corner_indices < array.shape[axis])
+        corner_indices = clip(corner_indices, a_min=0, a_max=array.shape[axis] - 1)
+        corner_weights = xp.stack([1.0 - frac[:, axis], frac[:, axis]])
+        corner_weights = corner_weights * xp.astype(valid, dtype)
+
+        broadcast_shape = (1,) * axis + (2,) + (1,) * (ndim - axis - 1) + (n,)
+        indices = indices + stride * xp.reshape(corner_indices, broadcast_shape)
+        weights = weights * xp.reshape(corner_weights, broadcast_shape)
+        stride *= array.shape[axis]
+
+    values = take(array, indices=xp.reshape(indices, (-1,)))
+    if values.dtype != dtype:
+        values = xp.astype(values, dtype)
+    weighted = xp.reshape(weights, (2**ndim, n))
+    weighted *= xp.reshape(values, (2**ndim, n))
+    return _sum_corners(weighted, out)
 
 
 def sample(
@@ -90,23 +191,38 @@ def sample(
     *,
     coordinates: xp.Array,
     method: type.SamplingMethod = "linear",
+    out: xp.Array | None = None,
+    precision: Precision = "float64",
 ) -> xp.Array:
+    """Sample array at coordinates.
+
+    Linear interpolation is calculated in precision, and nearest samples keep
+    the dtype of array.
+    """
     match method:
         case "linear":
-            return sample_linear(array, coordinates=coordinates)
+            return sample_linear(
+                array, coordinates=coordinates, out=out, precision=precision
+            )
         case "nearest":
-            return sample_nearest(array, coordinates=coordinates)
+            return sample_nearest(array, coordinates=coordinates, out=out)
 
 
 __all__ = [
     "asnumpy",
+    "from_numpy",
     "take",
     "put",
     "assign",
     "clip",
+    "cumsum",
+    "nbytes",
+    "ascontiguous",
     "sample",
     "ravel_index",
     "diag",
     "Number",
     "SamplingMethod",
+    "Precision",
+    "get_dtype",
 ]
@@ -46,7 +46,25 @@ def clip(
     return xp.asarray(raw_array.clip(raw_a_min, raw_a_max))  # type: ignore
 
 
+def cumsum(array: xp.Array, /, *, axis: int = 0) -> xp.Array:
+    raw_array = _get_raw_array(array)
+    return xp.asarray(raw_array.cumsum(axis=axis))
+
+
+def nbytes(array: xp.Array) -> int:
+    return int(_get_raw_array(array).nbytes)
+
+
+def ascontiguous(array: xp.Array) -> xp.Array:
+    raw_array = _get_raw_array(array)
+    return xp.asarray(cupy.ascontiguousarray(raw_array))
+
+
 def asnumpy(array: xp.Array) -> npt.NDArray[Any]:
     return cupy.asnumpy(
         _get_raw_array(array)
     )  # pyright: ignore [reportGeneralTypeIssues]
+
+
+def from_numpy(array: npt.NDArray[Any]) -> xp.Array:
+    return xp.asarray(cupy.asarray(array))
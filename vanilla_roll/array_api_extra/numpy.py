@@ -1,5 +1,6 @@
 from typing import Any
 
+import numpy as np
 import numpy.typing as npt
 
 import vanilla_roll.array_api as xp
@@ -40,5 +41,23 @@ def clip(
     return xp.asarray(raw_array.clip(raw_a_min, raw_a_max))  # type: ignore
 
 
+def cumsum(array: xp.Array, /, *, axis: int = 0) -> xp.Array:
+    raw_array = _get_raw_array(array)
+    return xp.asarray(raw_array.cumsum(axis=axis))
+
+
+def nbytes(array: xp.Array) -> int:
+    return int(_get_raw_array(array).nbytes)
+
+
+def ascontiguous(array: xp.Array) -> xp.Array:
+    raw_array = _get_raw_array(array)
+    return xp.asarray(np.ascontiguousarray(raw_array))
+
+
 def asnumpy(array: xp.Array) -> npt.NDArray[Any]:
     return _get_raw_array(array)
+
+
+def from_numpy(array: npt.NDArray[Any]) -> xp.Array:
+    return xp.asarray(array)
@@ -48,6 +48,25 @@ def clip(
     return xp.asarray(torch.clamp(raw_array, min=raw_a_min, max=raw_a_max))
 
 
+def cumsum(array: xp.Array, /, *, axis: int = 0) -> xp.Array:
+    raw_array = cast(torch.Tensor, array)
+    return xp.asarray(torch.cumsum(raw_array, dim=axis))
+
+
+def nbytes(array: xp.Array) -> int:
+    raw_array = cast(torch.Tensor, array)
+    return raw_array.element_size() * raw_array.numel()
+
+
+def ascontiguous(array: xp.Array) -> xp.Array:
+    raw_array = cast(torch.Tensor, array)
+    return xp.asarray(raw_array.contiguous())
+
+
 def asnumpy(array: xp.Array) -> npt.NDArray[Any]:
     raw_array = _get_raw_array(array)
     return raw_array.to("cpu").detach().numpy()
+
+
+def from_numpy(array: npt.NDArray[Any]) -> xp.Array:
+    return xp.asarray(torch.from_numpy(array))
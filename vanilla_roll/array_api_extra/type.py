@@ -2,3 +2,4 @@ from typing import Literal
 
 Number = float | int | bool
 SamplingMethod = Literal["linear"] | Literal["nearest"]
+Precision = Literal["float32"] | Literal["float64"]
@@ -9,6 +9,7 @@ def affine_transform(
     /,
     *,
     method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
 ) -> xp.Array:
     iss, jss = xp.meshgrid(
         xp.arange(output_shape[1]), xp.arange(output_shape[0]), indexing="xy"
@@ -17,7 +18,44 @@ def affine_transform(
         xp.reshape(xp.stack([jss, iss, xp.ones_like(iss)], axis=2), (-1, 3)), xp.float32
     )
     input_coords = output_coords @ mat
-    warped_pixels = xpe.sample(image, coordinates=input_coords[:, :2], method=method)
+    warped_pixels = xpe.sample(
+        image, coordinates=input_coords[:, :2], method=method, precision=precision
+    )
+    return xp.reshape(warped_pixels, output_shape)
+
+
+def projective_transform(
+    image: xp.Array,
+    mat: xp.Array,
+    output_shape: tuple[int, int],
+    /,
+    *,
+    method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
+) -> xp.Array:
+    """Warp image by a homography.
+
+    Homogeneous output coordinates (j, i, 1) are mapped by mat to (j * w, i * w, w),
+    and pixels mapped to w <= 0 are filled by 0.
+    """
+    iss, jss = xp.meshgrid(
+        xp.arange(output_shape[1]), xp.arange(output_shape[0]), indexing="xy"
+    )
+    output_coords = xp.astype(
+        xp.reshape(xp.stack([jss, iss, xp.ones_like(iss)], axis=2), (-1, 3)),
+        mat.dtype,
+    )
+    input_coords = output_coords @ mat
+    valid = 0.0 < input_coords[:, 2]
+    warped_pixels = xp.zeros(input_coords.shape[0], dtype=xpe.get_dtype(precision))
+    if xp.any(valid):
+        valid_coords = input_coords[valid]
+        warped_pixels[valid] = xpe.sample(
+            image,
+            coordinates=valid_coords[:, :2] / valid_coords[:, 2:],
+            method=method,
+            precision=precision,
+        )
     return xp.reshape(warped_pixels, output_shape)
 
 
@@ -27,6 +65,7 @@ def resize(
     /,
     *,
     method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
 ) -> xp.Array:
     mat = xp.asarray(
         [
@@ -35,4 +74,27 @@ def resize(
             [0, 0, 1],
         ]
     )
-    return affine_transform(image, mat, output_shape, method=method)
+    return affine_transform(
+        image, mat, output_shape, method=method, precision=precision
+    )
+
+
+def downsample(array: xp.Array, /) -> xp.Array:
+    """Halve array along every axis by averaging 2 neighboring elements.
+
+    The last element of an odd axis is averaged with itself.
+
+    >>> downsample(xp.asarray([[0.0, 2.0, 4.0], [2.0, 4.0, 6.0]]))
+    Array([[2., 5.]], dtype=float64)
+    """
+    if array.dtype not in (xp.float32, xp.float64):
+        array = xp.astype(array, xp.float32)
+    for axis in range(array.ndim):
+        n = array.shape[axis]
+        if n % 2 == 1:
+            last = xp.take(array, xp.asarray([n - 1]), axis=axis)
+            array = xp.concat([array, last], axis=axis)
+        even = xp.take(array, xp.arange(0, array.shape[axis], 2), axis=axis)
+        odd = xp.take(array, xp.arange(1, array.shape[axis], 2), axis=axis)
+        array = (even + odd) / 2
+    return array
@@ -0,0 +1,341 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Protocol, runtime_checkable
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.macrocell import (
+    MacrocellHierarchy,
+    build_macrocell_hierarchy_from_bounds,
+)
+
+DEFAULT_MAX_CHUNKS = 64
+
+
+class ChunkSource(Protocol):
+    """ChunkSource decodes chunks of a 3D array on demand.
+
+    Chunk (n0, n1, n2) covers [n * chunk_shape, (n + 1) * chunk_shape) along each
+    axis, which is cropped by shape at the end.
+    """
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        ...
+
+    @property
+    def chunk_shape(self) -> tuple[int, int, int]:
+        ...
+
+    @property
+    def dtype(self) -> Any:
+        ...
+
+    def read_chunk(self, index: tuple[int, int, int]) -> xp.Array:
+        ...
+
+
+@runtime_checkable
+class BoundedChunkSource(ChunkSource, Protocol):
+    """BoundedChunkSource knows min/max values of chunks without decoding them.
+
+    chunk_min and chunk_max are arrays of the shape of the grid of chunks.
+    """
+
+    @property
+    def chunk_min(self) -> xp.Array:
+        ...
+
+    @property
+    def chunk_max(self) -> xp.Array:
+        ...
+
+
+class ArrayChunkSource(ChunkSource):
+    """Chunks of an array-like of numpy basic indexing, e.g. numpy.memmap."""
+
+    _array: Any
+    _chunk_shape: tuple[int, int, int]
+
+    def __init__(self, array: Any, chunk_shape: tuple[int, int, int]) -> None:
+        if len(array.shape) != 3:
+            raise ValueError(f"Expected 3D array, got {len(array.shape)}D array")
+        self._array = array
+        self._chunk_shape = chunk_shape
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self._array.shape
+
+    @property
+    def chunk_shape(self) -> tuple[int, int, int]:
+        return self._chunk_shape
+
+    @property
+    def dtype(self) -> Any:
+        return xpe.from_numpy(self._array[:0, :0, :0]).dtype
+
+    def read_chunk(self, index: tuple[int, int, int]) -> xp.Array:
+        slices = tuple(
+            slice(n * c, (n + 1) * c) for n, c in zip(index, self._chunk_shape)
+        )
+        return xpe.from_numpy(self._array[slices].copy())
+
+
+class _ChunkCache:
+    """Decoded chunks of a source, of which the least recently used are dropped."""
+
+    source: ChunkSource
+    _max_chunks: int
+    _chunks: OrderedDict[tuple[int, int, int], xp.Array]
+    _lock: threading.Lock
+
+    def __init__(self, source: ChunkSource, max_chunks: int) -> None:
+        if max_chunks < 1:
+            raise ValueError(f"max_chunks must be greater than 0, got {max_chunks}")
+        self.source = source
+        self._max_chunks = max_chunks
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, index: tuple[int, int, int]) -> xp.Array:
+        with self._lock:
+            if index in self._chunks:
+                self._chunks.move_to_end(index)
+                return self._chunks[index]
+
+        # chunks are decoded without the lock, so that threads decode in parallel
+        chunk = self.source.read_chunk(index)
+        with self._lock:
+            self._chunks[index] = chunk
+            while self._max_chunks < len(self._chunks):
+                self._chunks.popitem(last=False)
+        return chunk
+
+
+def _normalize_key(key: Any, shape: tuple[int, ...]) -> list[tuple[int, int, bool]]:
+    keys = key if isinstance(key, tuple) else (key,)
+    if len(shape) < len(keys):
+        raise IndexError(f"Too many indices for array of {len(shape)} dimensions")
+    keys = keys + (slice(None),) * (len(shape) - len(keys))
+
+    ranges: list[tuple[int, int, bool]] = []
+    for k, n in zip(keys, shape):
+        match k:
+            case int():
+                if not -n <= k < n:
+                    raise IndexError(f"Index {k} is out of bounds of size {n}")
+                start = k % n
+                ranges.append((start, start + 1, True))
+            case slice():
+                start, stop, step = k.indices(n)
+                if step != 1:
+                    raise IndexError("Only slices of step 1 are supported")
+                ranges.append((start, max(start, stop), False))
+            case _:
+                raise IndexError(f"Unsupported index: {k}")
+    return ranges
+
+
+class ChunkedArray:
+    """ChunkedArray is a 3D array whose data is decoded from a source lazily.
+
+    Basic indexing by integers and slices of step 1 decodes only chunks which
+    overlap the result. Decoded chunks are cached up to max_chunks, and the cache
+    is shared by permuted views.
+    """
+
+    _cache: _ChunkCache
+    _order: tuple[int, int, int]
+
+    def __init__(
+        self,
+        source: ChunkSource,
+        /,
+        *,
+        max_chunks: int = DEFAULT_MAX_CHUNKS,
+    ) -> None:
+        self._cache = _ChunkCache(source, max_chunks)
+        self._order = (0, 1, 2)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        shape = self._cache.source.shape
+        return (shape[self._order[0]], shape[self._order[1]], shape[self._order[2]])
+
+    @property
+    def chunk_shape(self) -> tuple[int, int, int]:
+        chunk_shape = self._cache.source.chunk_shape
+        return (
+            chunk_shape[self._order[0]],
+            chunk_shape[self._order[1]],
+            chunk_shape[self._order[2]],
+        )
+
+    @property
+    def ndim(self) -> int:
+        return 3
+
+    @property
+    def dtype(self) -> Any:
+        return self._cache.source.dtype
+
+    @property
+    def bounded(self) -> bool:
+        """Whether macrocells are available without decoding chunks."""
+        chunk_shape = self._cache.source.chunk_shape
+        return isinstance(self._cache.source, BoundedChunkSource) and (
+            chunk_shape[0] == chunk_shape[1] == chunk_shape[2]
+        )
+
+    def macrocells(self) -> MacrocellHierarchy:
+        """Build macrocells from min/max values of cubic chunks of the source."""
+        source = self._cache.source
+        if not self.bounded or not isinstance(source, BoundedChunkSource):
+            raise ValueError("Source does not bound cubic chunks")
+        return build_macrocell_hierarchy_from_bounds(
+            xp.permute_dims(source.chunk_min, self._order),
+            xp.permute_dims(source.chunk_max, self._order),
+            source.chunk_shape[0],
+        )
+
+    def permute_dims(self, order: tuple[int, int, int]) -> "ChunkedArray":
+        view = ChunkedArray.__new__(ChunkedArray)
+        view._cache = self._cache
+        view._order = (
+            self._order[order[0]],
+            self._order[order[1]],
+            self._order[order[2]],
+        )
+        return view
+
+    def __getitem__(self, key: Any) -> xp.Array:
+        ranges = _normalize_key(key, self.shape)
+        source_ranges = [(0, 0)] * 3
+        for axis, (start, stop, _) in zip(self._order, ranges):
+            source_ranges[axis] = (start, stop)
+
+        block = xp.zeros(
+            tuple(stop - start for start, stop in source_ranges), dtype=self.dtype
+        )
+        chunk_shape = self._cache.source.chunk_shape
+        chunk_ranges = [
+            range(start // c, math.ceil(stop / c)) if start < stop else range(0)
+            for (start, stop), c in zip(source_ranges, chunk_shape)
+        ]
+        for n0 in chunk_ranges[0]:
+            for n1 in chunk_ranges[1]:
+                for n2 in chunk_ranges[2]:
+                    chunk = self._cache.get((n0, n1, n2))
+                    dst: list[slice] = []
+                    src: list[slice] = []
+                    for n, c, (start, stop) in zip(
+                        (n0, n1, n2), chunk_shape, source_ranges
+                    ):
+                        lower = max(start, n * c)
+                        upper = min(stop, (n + 1) * c)
+                        dst.append(slice(lower - start, upper - start))
+                        src.append(slice(lower - n * c, upper - n * c))
+                    block[tuple(dst)] = chunk[tuple(src)]
+
+        block = xp.permute_dims(block, self._order)
+        return block[tuple(0 if squeeze else slice(None) for _, _, squeeze in ranges)]
+
+
+def permute_dims(
+    data: xp.Array | ChunkedArray, order: tuple[int, int, int]
+) -> xp.Array | ChunkedArray:
+    """Permute data, which stays lazy if it is chunked."""
+    if isinstance(data, ChunkedArray):
+        return data.permute_dims(order)
+    return xp.permute_dims(data, order)
+
+
+def asarray(data: xp.Array | ChunkedArray) -> xp.Array:
+    """Materialize data, which decodes all chunks if it is chunked."""
+    if isinstance(data, ChunkedArray):
+        return data[:, :, :]
+    return data
+
+
+def sample(
+    data: xp.Array | ChunkedArray,
+    /,
+    *,
+    coordinates: xp.Array,
+    method: xpe.SamplingMethod = "linear",
+    out: xp.Array | None = None,
+    precision: xpe.Precision = "float64",
+) -> xp.Array:
+    """Sample data at coordinates like array_api_extra.sample.
+
+    Coordinates are grouped by the chunks they fall in, so that only chunks
+    touched by sampling are decoded.
+    """
+    if not isinstance(data, ChunkedArray):
+        return xpe.sample(
+            data, coordinates=coordinates, method=method, out=out, precision=precision
+        )
+
+    if coordinates.shape[0] == 0:
+        return xpe.sample(
+            data[:1, :1, :1],
+            coordinates=coordinates,
+            method=method,
+            out=out,
+            precision=precision,
+        )
+
+    # neighbors of linear and nearest sampling are within floor(x) + 1
+    floors = xp.astype(xp.floor(coordinates), xp.int64)
+    chunk_shape = data.chunk_shape
+    grid_shape = [math.ceil(n / c) for n, c in zip(data.shape, chunk_shape)]
+    chunk_indices = xpe.clip(
+        floors // xp.asarray(chunk_shape, dtype=xp.int64),
+        a_min=xp.zeros(3, dtype=xp.int64),
+        a_max=xp.asarray(grid_shape, dtype=xp.int64) - 1,
+    )
+    ids = xpe.ravel_index(chunk_indices.T, tuple(grid_shape))
+    order = xp.argsort(ids)
+    _, counts = xp.unique_counts(xpe.take(ids, indices=order))
+
+    parts: list[xp.Array] = []
+    begin = 0
+    for count in (int(c) for c in counts):
+        indices = order[begin : begin + count]
+        begin += count
+        group = xp.stack(
+            [xpe.take(coordinates[:, axis], indices=indices) for axis in range(3)],
+            axis=1,
+        )
+        group_floors = xp.stack(
+            [xpe.take(floors[:, axis], indices=indices) for axis in range(3)], axis=1
+        )
+        lowers: list[int] = []
+        uppers: list[int] = []
+        for axis, (n, c) in enumerate(zip(data.shape, chunk_shape)):
+            lower = int(chunk_indices[int(indices[0]), axis]) * c
+            upper = int(xp.max(group_floors[:, axis])) + 2
+            lowers.append(lower)
+            uppers.append(min(max(upper, lower + 1), n))
+        block = data[tuple(slice(lower, upper) for lower, upper in zip(lowers, uppers))]
+        offset = xp.asarray(lowers, dtype=coordinates.dtype)
+        parts.append(
+            xpe.sample(
+                block,
+                coordinates=group - offset,
+                method=method,
+                precision=precision,
+            )
+        )
+
+    samples = xp.concat(parts)
+    if out is None:
+        out = xp.empty(coordinates.shape[0], dtype=samples.dtype)
+    elif out.shape != (coordinates.shape[0],):
+        raise ValueError(
+            f"Expected out of shape {(coordinates.shape[0],)}, got {out.shape}"
+        )
+    xpe.put(out, indices=order, values=xp.astype(samples, out.dtype))
+    return out
@@ -1,13 +1,8 @@
+from functools import cached_property
 from typing import Protocol, overload
 
 import vanilla_roll.array_api as xp
-from vanilla_roll.geometry.element import (
-    Frame,
-    Orientation,
-    Vector,
-    as_array,
-    to_homogeneous,
-)
+from vanilla_roll.geometry.element import Frame, Orientation, Vector, as_array
 
 
 class Conversion(Protocol):
@@ -32,59 +27,117 @@ class Conversion(Protocol):
     ) -> Vector | Orientation | Frame | xp.Array:
         ...
 
+    @property
+    def matrix(self) -> xp.Array:
+        """Affine matrix of homogeneous (k, j, i, 1) coordinates in float64."""
+        ...
 
-def _transform_vector(
-    target: Vector, src_frame_mat: xp.Array, dst_frame_mat: xp.Array
-) -> Vector:
-    homogeneous_target = to_homogeneous(as_array(target))
-    return Vector.of_array(
-        xp.linalg.solve(dst_frame_mat, src_frame_mat @ homogeneous_target)[:3]
-    )
+    @property
+    def inverse(self) -> "Conversion":
+        ...
 
 
-def _transform_orientation(
-    target: Orientation, src_frame_mat: xp.Array, dst_frame_mat: xp.Array
-) -> Orientation:
-    src_rot_mat = xp.eye(4, dtype=src_frame_mat.dtype)
-    src_rot_mat[:3, :3] = src_frame_mat[:3, :3]
-    dst_rot_mat = xp.eye(4, dtype=dst_frame_mat.dtype)
-    dst_rot_mat[:3, :3] = dst_frame_mat[:3, :3]
+def _convert_vector(target: Vector, matrix: xp.Array) -> Vector:
+    target_array = xp.astype(as_array(target), xp.float64)
+    return Vector.of_array(matrix[:3, :3] @ target_array + matrix[:3, 3])
+
+
+def _convert_orientation(target: Orientation, matrix: xp.Array) -> Orientation:
+    # orientations are directions, which are not translated
+    rotation_mat = matrix[:3, :3]
     return Orientation(
-        i=_transform_vector(target.i, src_rot_mat, dst_rot_mat),
-        j=_transform_vector(target.j, src_rot_mat, dst_rot_mat),
-        k=_transform_vector(target.k, src_rot_mat, dst_rot_mat),
+        i=Vector.of_array(rotation_mat @ xp.astype(as_array(target.i), xp.float64)),
+        j=Vector.of_array(rotation_mat @ xp.astype(as_array(target.j), xp.float64)),
+        k=Vector.of_array(rotation_mat @ xp.astype(as_array(target.k), xp.float64)),
     )
 
 
-def _transform_frame(
-    target: Frame, src_frame_mat: xp.Array, dst_frame_mat: xp.Array
-) -> Frame:
+def _convert_frame(target: Frame, matrix: xp.Array) -> Frame:
     return Frame(
-        _transform_vector(target.origin, src_frame_mat, dst_frame_mat),
-        _transform_orientation(target.orientation, src_frame_mat, dst_frame_mat),
+        _convert_vector(target.origin, matrix),
+        _convert_orientation(target.orientation, matrix),
     )
 
 
-def _transoform_array(
-    target: xp.Array, src_frame_mat: xp.Array, dst_frame_mat: xp.Array
-) -> xp.Array:
+def _convert_array(target: xp.Array, matrix: xp.Array) -> xp.Array:
     org_shape = target.shape
     if target.shape == (3,):
         target = xp.reshape(target, (3, 1))
     if target.ndim != 2 or target.shape[0] != 3:
         raise ValueError("Target array must be a 3xN matrix.")
-    if src_frame_mat.dtype != target.dtype:
-        src_frame_mat = xp.astype(src_frame_mat, target.dtype)
-    if dst_frame_mat.dtype != target.dtype:
-        dst_frame_mat = xp.astype(dst_frame_mat, target.dtype)
-
-    homogeneous_target = to_homogeneous(target)
-    result = xp.linalg.solve(dst_frame_mat, src_frame_mat @ homogeneous_target)[:3, :]
+    if matrix.dtype != target.dtype:
+        matrix = xp.astype(matrix, target.dtype)
 
+    result = matrix[:3, :3] @ target + matrix[:3, 3:]
     return xp.reshape(result, org_shape)
 
 
-class Transformation(Conversion):
+def _convert(
+    target: Vector | Orientation | Frame | xp.Array, matrix: xp.Array
+) -> Vector | Orientation | Frame | xp.Array:
+    match target:
+        case Vector():
+            return _convert_vector(target, matrix)
+        case Orientation():
+            return _convert_orientation(target, matrix)
+        case Frame():
+            return _convert_frame(target, matrix)
+        case xp.Array():
+            return _convert_array(target, matrix)
+    raise ValueError(f"Unknown data type: {type(target)}")
+
+
+class Affine(Conversion):
+    """Create a conversion by an affine matrix of homogeneous (k, j, i, 1) coordinates.
+
+    >>> affine = Affine(xp.asarray([\
+            [1.0, 0.0, 0.0, 1.0],\
+            [0.0, 2.0, 0.0, 0.0],\
+            [0.0, 0.0, 1.0, 0.0],\
+            [0.0, 0.0, 0.0, 1.0],\
+        ]))
+    >>> affine(Vector(1.0, 2.0, 3.0))
+    Vector(i=1.0, j=4.0, k=4.0)
+    >>> affine.inverse(Vector(1.0, 4.0, 4.0))
+    Vector(i=1.0, j=2.0, k=3.0)
+    """
+
+    _matrix: xp.Array
+
+    def __init__(self, matrix: xp.Array) -> None:
+        if matrix.shape != (4, 4):
+            raise ValueError(f"Expected 4x4 matrix, got {matrix.shape}")
+        self._matrix = xp.astype(matrix, xp.float64)
+
+    @overload
+    def __call__(self, target: Vector) -> Vector:
+        ...
+
+    @overload
+    def __call__(self, target: Orientation) -> Orientation:
+        ...
+
+    @overload
+    def __call__(self, target: Frame) -> Frame:
+        ...
+
+    @overload
+    def __call__(self, target: xp.Array) -> xp.Array:
+        ...
+
+    def __call__(self, target: Vector | Orientation | Frame | xp.Array):
+        return _convert(target, self._matrix)
+
+    @property
+    def matrix(self) -> xp.Array:
+        return self._matrix
+
+    @cached_property
+    def inverse(self) -> "Affine":
+        return Affine(xp.linalg.inv(self._matrix))
+
+
+class Transformation(Affine):
     """Create a transformation from src frame to dst frame.
 
     >>> src = Frame(\
@@ -107,48 +160,14 @@ class Transformation(Conversion):
     Frame(origin=Vector(i=3.0, j=3.0, k=5.5), orientation=Orientation(i=Vector(i=1.0, j=-1.0, k=0.0), j=Vector(i=1.0, j=1.0, k=0.0), k=Vector(i=0.0, j=0.0, k=1.0)))
     """  # noqa: E501
 
-    _src_frame_mat: xp.Array
-    _dst_frame_mat: xp.Array
-
     def __init__(self, src: Frame, dst: Frame) -> None:
-        self._src_frame_mat = as_array(src)
-        self._dst_frame_mat = as_array(dst)
-
-    @overload
-    def __call__(self, target: Vector) -> Vector:
-        ...
-
-    @overload
-    def __call__(self, target: Orientation) -> Orientation:
-        ...
-
-    @overload
-    def __call__(self, target: Frame) -> Frame:
-        ...
-
-    @overload
-    def __call__(self, target: xp.Array) -> xp.Array:
-        ...
-
-    def __call__(self, target: Vector | Orientation | Frame | xp.Array):
-        match target:
-            case Vector():
-                return _transform_vector(
-                    target, self._src_frame_mat, self._dst_frame_mat
-                )
-            case Orientation():
-                return _transform_orientation(
-                    target, self._src_frame_mat, self._dst_frame_mat
-                )
-            case Frame():
-                return _transform_frame(
-                    target, self._src_frame_mat, self._dst_frame_mat
-                )
-            case xp.Array():
-                return _transoform_array(
-                    target, self._src_frame_mat, self._dst_frame_mat
-                )
-        raise ValueError(f"Unknown data type: {type(target)}")
+        # src to dst is compiled into a matrix at once
+        super().__init__(
+            xp.linalg.solve(
+                xp.astype(as_array(dst), xp.float64),
+                xp.astype(as_array(src), xp.float64),
+            )
+        )
 
 
 def _permutate_vector(target: Vector, order: tuple[int, int, int]) -> Vector:
@@ -234,14 +253,34 @@ class Permutation(Conversion):
     def order(self) -> tuple[int, int, int]:
         return self._order
 
+    @cached_property
+    def matrix(self) -> xp.Array:
+        matrix = xp.zeros((4, 4), dtype=xp.float64)
+        for row, column in enumerate(self._order):
+            matrix[row, column] = 1.0
+        matrix[3, 3] = 1.0
+        return matrix
 
-class Composition(Conversion):
-    _lhs: Conversion
-    _rhs: Conversion
+    @cached_property
+    def inverse(self) -> "Permutation":
+        order = [0, 0, 0]
+        for row, column in enumerate(self._order):
+            order[column] = row
+        return Permutation((order[0], order[1], order[2]))
 
-    def __init__(self, lhs: Conversion, rhs: Conversion) -> None:
-        self._lhs = lhs
-        self._rhs = rhs
 
-    def __call__(self, target: Vector | Orientation | Frame | xp.Array):
-        return self._rhs(self._lhs(target))
+class Composition(Affine):
+    """Create a conversion applying lhs and then rhs.
+
+    Both conversions are folded into a single affine matrix.
+
+    >>> perm = Permutation((1, 2, 0))
+    >>> composition = Composition(perm, perm)
+    >>> composition(Vector(1.0, 2.0, 3.0))
+    Vector(i=2.0, j=3.0, k=1.0)
+    >>> composition.inverse(Vector(i=2.0, j=3.0, k=1.0))
+    Vector(i=1.0, j=2.0, k=3.0)
+    """
+
+    def __init__(self, lhs: Conversion, rhs: Conversion) -> None:
+        super().__init__(rhs.matrix @ lhs.matrix)
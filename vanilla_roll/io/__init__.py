@@ -1,5 +1,20 @@
+from .bricked import BrickWriter, load_bricked_volume, save_bricked_volume
 from .dicom import read_dicom
+from .dicom_index import DicomIndex
 from .mha import read_mha
+from .native import load_volume, save_volume
 from .nifti import read_nifti
+from .nrrd import read_nrrd
 
-__all__ = ["read_dicom", "read_mha", "read_nifti"]  # type: ignore
+__all__ = [
+    "read_dicom",
+    "read_mha",
+    "read_nifti",
+    "read_nrrd",
+    "DicomIndex",
+    "save_volume",
+    "load_volume",
+    "BrickWriter",
+    "save_bricked_volume",
+    "load_bricked_volume",
+]  # type: ignore
@@ -0,0 +1,317 @@
+import json
+import lzma
+import math
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Literal
+
+import numpy as np
+import numpy.typing as npt
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.anatomy_orientation import AnatomyOrientation
+from vanilla_roll.chunked import (
+    DEFAULT_MAX_CHUNKS,
+    BoundedChunkSource,
+    ChunkedArray,
+    asarray,
+)
+from vanilla_roll.geometry.element import Frame
+from vanilla_roll.io.sidecar import decode_geometry, encode_geometry
+from vanilla_roll.volume import Volume
+
+Codec = Literal["zlib", "lzma"]
+
+DEFAULT_BRICK_SIZE = 32
+
+_FORMAT_VERSION = 1
+_BRICKS_FILE = "bricks.bin"
+_INDEX_FILE = "index.npy"
+_SIDECAR_FILE = "volume.json"
+
+# bricks of zero length are not written and regarded as 0
+_INDEX_DTYPE = np.dtype(
+    [("offset", "<u8"), ("length", "<u8"), ("min", "<f8"), ("max", "<f8")]
+)
+
+
+@dataclass(frozen=True)
+class BrickedIOParams:
+    """Parameters of loading bricked volumes.
+
+    Up to max_bricks decompressed bricks are cached.
+    """
+
+    max_bricks: int = DEFAULT_MAX_CHUNKS
+
+    def __post_init__(self) -> None:
+        if self.max_bricks < 1:
+            raise ValueError(
+                f"max_bricks must be greater than 0, got {self.max_bricks}"
+            )
+
+
+def _compress(data: bytes, codec: Codec) -> bytes:
+    match codec:
+        case "zlib":
+            return zlib.compress(data)
+        case "lzma":
+            return lzma.compress(data)
+
+
+def _decompress(data: bytes, codec: Codec) -> bytes:
+    match codec:
+        case "zlib":
+            return zlib.decompress(data)
+        case "lzma":
+            return lzma.decompress(data)
+
+
+def _get_grid_shape(
+    shape: tuple[int, int, int], brick_size: int
+) -> tuple[int, int, int]:
+    return (
+        math.ceil(shape[0] / brick_size),
+        math.ceil(shape[1] / brick_size),
+        math.ceil(shape[2] / brick_size),
+    )
+
+
+def _get_brick_shape(
+    index: tuple[int, int, int], shape: tuple[int, int, int], brick_size: int
+) -> tuple[int, int, int]:
+    return (
+        min(brick_size, shape[0] - index[0] * brick_size),
+        min(brick_size, shape[1] - index[1] * brick_size),
+        min(brick_size, shape[2] - index[2] * brick_size),
+    )
+
+
+class BrickWriter:
+    """BrickWriter writes a volume into a directory as compressed bricks.
+
+    Bricks of brick_size voxels along each axis may be written by threads in
+    parallel and in any order, and ones never written are regarded as 0.
+    Compression runs without the lock, which zlib and lzma release the GIL for.
+    The index and the sidecar are written on close, so that a directory without
+    the sidecar is regarded as incomplete.
+    """
+
+    _path: Path
+    _shape: tuple[int, int, int]
+    _dtype: np.dtype[Any]
+    _geometry: dict[str, Any]
+    _brick_size: int
+    _codec: Codec
+    _index: npt.NDArray[Any]
+    _file: IO[bytes]
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        path: str | Path,
+        shape: tuple[int, int, int],
+        dtype: Any,
+        frame: Frame,
+        anatomy_orientation: AnatomyOrientation | None = None,
+        brick_size: int = DEFAULT_BRICK_SIZE,
+        codec: Codec = "zlib",
+    ) -> None:
+        if brick_size < 1:
+            raise ValueError(f"brick_size must be greater than 0, got {brick_size}")
+        if codec not in ("zlib", "lzma"):
+            raise ValueError(f"Unsupported codec: {codec}")
+
+        self._path = Path(path)
+        self._shape = shape
+        self._dtype = np.dtype(dtype).newbyteorder("<")
+        self._geometry = encode_geometry(frame, anatomy_orientation)
+        self._brick_size = brick_size
+        self._codec = codec
+        self._index = np.zeros(_get_grid_shape(shape, brick_size), dtype=_INDEX_DTYPE)
+        self._lock = threading.Lock()
+
+        self._path.mkdir(parents=True, exist_ok=True)
+        (self._path / _SIDECAR_FILE).unlink(missing_ok=True)
+        self._file = open(self._path / _BRICKS_FILE, "wb")
+
+    def __enter__(self) -> "BrickWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    @property
+    def grid_shape(self) -> tuple[int, int, int]:
+        return self._index.shape
+
+    def write_brick(self, index: tuple[int, int, int], brick: Any) -> None:
+        """Write brick of given index, which is a numpy array-like."""
+        if not all(0 <= n < g for n, g in zip(index, self.grid_shape)):
+            raise IndexError(f"Brick {index} is out of grid {self.grid_shape}")
+        array = np.asarray(brick, dtype=self._dtype)
+        expected = _get_brick_shape(index, self._shape, self._brick_size)
+        if array.shape != expected:
+            raise ValueError(f"Expected brick of shape {expected}, got {array.shape}")
+
+        compressed = _compress(array.tobytes(), self._codec)
+        with self._lock:
+            if self._index[index]["length"] != 0:
+                raise ValueError(f"Brick {index} is already written")
+            offset = self._file.tell()
+            self._file.write(compressed)
+            self._index[index] = (
+                offset,
+                len(compressed),
+                float(array.min()),
+                float(array.max()),
+            )
+
+    def close(self) -> None:
+        """Write the index and the sidecar."""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            np.save(self._path / _INDEX_FILE, self._index)
+            sidecar: dict[str, Any] = {
+                "version": _FORMAT_VERSION,
+                "shape": list(self._shape),
+                "dtype": self._dtype.str,
+                "brick_size": self._brick_size,
+                "codec": self._codec,
+                **self._geometry,
+            }
+            (self._path / _SIDECAR_FILE).write_text(json.dumps(sidecar))
+
+
+class BrickChunkSource(BoundedChunkSource):
+    """Bricks of a directory written by BrickWriter.
+
+    A brick is read and decompressed only when it is requested, while min/max
+    values of bricks are known from the index beforehand.
+    """
+
+    _path: Path
+    _shape: tuple[int, int, int]
+    _dtype: np.dtype[Any]
+    _native_dtype: np.dtype[Any]
+    _brick_size: int
+    _codec: Codec
+    _index: npt.NDArray[Any]
+    sidecar: dict[str, Any]
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        if not (self._path / _SIDECAR_FILE).exists():
+            raise ValueError(f"Not a bricked volume: {str(path)}")
+        sidecar = json.loads((self._path / _SIDECAR_FILE).read_text())
+        if sidecar.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported version: {sidecar.get('version')}")
+
+        shape = sidecar["shape"]
+        self._shape = (shape[0], shape[1], shape[2])
+        self._dtype = np.dtype(sidecar["dtype"])
+        # array api backends know dtypes of native byte order by name
+        self._native_dtype = np.dtype(self._dtype.name)
+        self._brick_size = sidecar["brick_size"]
+        self._codec = sidecar["codec"]
+        self._index = np.load(self._path / _INDEX_FILE)
+        self.sidecar = sidecar
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self._shape
+
+    @property
+    def chunk_shape(self) -> tuple[int, int, int]:
+        return (self._brick_size, self._brick_size, self._brick_size)
+
+    @property
+    def dtype(self) -> Any:
+        return xpe.from_numpy(np.zeros(0, dtype=self._native_dtype)).dtype
+
+    @property
+    def chunk_min(self) -> xp.Array:
+        return xpe.from_numpy(np.ascontiguousarray(self._index["min"]))
+
+    @property
+    def chunk_max(self) -> xp.Array:
+        return xpe.from_numpy(np.ascontiguousarray(self._index["max"]))
+
+    def read_chunk(self, index: tuple[int, int, int]) -> xp.Array:
+        shape = _get_brick_shape(index, self._shape, self._brick_size)
+        entry = self._index[index]
+        if entry["length"] == 0:
+            return xpe.from_numpy(np.zeros(shape, dtype=self._native_dtype))
+
+        with open(self._path / _BRICKS_FILE, "rb") as f:
+            f.seek(int(entry["offset"]))
+            compressed = f.read(int(entry["length"]))
+        data = np.frombuffer(_decompress(compressed, self._codec), dtype=self._dtype)
+        return xpe.from_numpy(np.reshape(data, shape).astype(self._native_dtype))
+
+
+def save_bricked_volume(
+    volume: Volume,
+    path: str | Path,
+    brick_size: int = DEFAULT_BRICK_SIZE,
+    codec: Codec = "zlib",
+    workers: int | None = None,
+) -> None:
+    """Save volume into directory path as bricks compressed by codec.
+
+    Volume data is read by layers of bricks, whose bricks are compressed by
+    workers threads in parallel.
+    """
+    first = xpe.asnumpy(asarray(volume.data[:1, :1, :1]))
+    with BrickWriter(
+        path,
+        volume.shape,
+        first.dtype,
+        volume.frame,
+        volume.anatomy_orientation,
+        brick_size=brick_size,
+        codec=codec,
+    ) as writer:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            grid_shape = writer.grid_shape
+            for n0 in range(grid_shape[0]):
+                k0 = n0 * brick_size
+                k1 = min(k0 + brick_size, volume.shape[0])
+                layer = xpe.asnumpy(asarray(volume.data[k0:k1, :, :]))
+                futures = [
+                    executor.submit(
+                        writer.write_brick,
+                        (n0, n1, n2),
+                        layer[
+                            :,
+                            n1 * brick_size : (n1 + 1) * brick_size,
+                            n2 * brick_size : (n2 + 1) * brick_size,
+                        ],
+                    )
+                    for n1 in range(grid_shape[1])
+                    for n2 in range(grid_shape[2])
+                ]
+                for future in futures:
+                    future.result()
+
+
+def load_bricked_volume(
+    path: str | Path, params: BrickedIOParams = BrickedIOParams()
+) -> Volume:
+    """Load volume saved as bricks, which are decompressed on demand."""
+    source = BrickChunkSource(path)
+    frame, anatomy_orientation = decode_geometry(source.sidecar)
+    return Volume(
+        ChunkedArray(source, max_chunks=params.max_bricks),
+        frame=frame,
+        anatomy_orientation=anatomy_orientation,
+    )
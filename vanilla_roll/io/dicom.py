@@ -1,10 +1,13 @@
 # pyright: reportUnknownMemberType=false
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Any, Iterable
 
 import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
 from vanilla_roll.anatomy_orientation import CSA, Axial, Coronal, Sagittal
 from vanilla_roll.geometry.element import Frame, Orientation, Vector
 from vanilla_roll.geometry.linalg import normalize_vector
@@ -14,6 +17,7 @@ try:
     import numpy as np
     import pydicom  # type: ignore
     import pydicom.dicomdir
+    import pydicom.multival
 
     HAS_PYDICOM = True
 except ImportError:
@@ -22,6 +26,7 @@ except ImportError:
         import numpy as np
         import pydicom
         import pydicom.dicomdir
+        import pydicom.multival
 
 
 @dataclass(frozen=True)
@@ -31,19 +36,120 @@ class SliceIntervalStat:
     avg: float
 
 
+@dataclass(frozen=True)
+class DicomHeader:
+    """Fields of a DICOM file header which volumes are built from.
+
+    Fields of the header are named by their DICOM keywords.
+    """
+
+    path: str
+    mtime: float
+    SeriesInstanceUID: str
+    StudyInstanceUID: str
+    ImagePositionPatient: tuple[float, float, float]
+    ImageOrientationPatient: tuple[float, float, float, float, float, float]
+    PixelSpacing: tuple[float, float]
+    Rows: int
+    Columns: int
+    BitsAllocated: int
+    PixelRepresentation: int
+    rescaled: bool
+
+
+_HEADER_KEYWORDS = (
+    "SeriesInstanceUID",
+    "StudyInstanceUID",
+    "ImagePositionPatient",
+    "ImageOrientationPatient",
+    "PixelSpacing",
+    "Rows",
+    "Columns",
+    "BitsAllocated",
+    "PixelRepresentation",
+)
+
+
+def _read_floats(d: Any, keyword: str, n: int, path: str | Path) -> list[float]:
+    value = d.get(keyword)
+    values = value if isinstance(value, pydicom.multival.MultiValue) else [value]
+    if len(values) != n:
+        raise ValueError(
+            f"Expected {n} values of {keyword}, got {len(values)}: {str(path)}"
+        )
+    return [float(v) for v in values]
+
+
+def read_dicom_header(path: str | Path) -> DicomHeader:
+    """Read the header of a DICOM file without its pixel data.
+
+    Raises ValueError if the file is not an image or its header is malformed.
+    """
+    if not HAS_PYDICOM:
+        raise RuntimeError("pydicom is not installed")
+
+    d = pydicom.dcmread(path, stop_before_pixels=True)
+    if isinstance(d, pydicom.dicomdir.DicomDir):
+        raise ValueError(f"DicomDir is not supported: {str(path)}")
+    missing = [k for k in _HEADER_KEYWORDS if k not in d or d[k].is_empty]
+    if 0 < len(missing):
+        raise ValueError(f"Missing {', '.join(missing)}: {str(path)}")
+
+    position = _read_floats(d, "ImagePositionPatient", 3, path)
+    orientation = _read_floats(d, "ImageOrientationPatient", 6, path)
+    spacing = _read_floats(d, "PixelSpacing", 2, path)
+    return DicomHeader(
+        path=str(path),
+        mtime=os.stat(path).st_mtime,
+        SeriesInstanceUID=str(d.SeriesInstanceUID),
+        StudyInstanceUID=str(d.StudyInstanceUID),
+        ImagePositionPatient=(position[0], position[1], position[2]),
+        ImageOrientationPatient=(
+            orientation[0],
+            orientation[1],
+            orientation[2],
+            orientation[3],
+            orientation[4],
+            orientation[5],
+        ),
+        PixelSpacing=(spacing[0], spacing[1]),
+        Rows=int(d.Rows),
+        Columns=int(d.Columns),
+        BitsAllocated=int(d.BitsAllocated),
+        PixelRepresentation=int(d.PixelRepresentation),
+        rescaled="RescaleSlope" in d and "RescaleIntercept" in d,
+    )
+
+
 @dataclass(frozen=True)
 class DicomIOParams:
+    """Parameters of reading DICOM.
+
+    Headers are read and pixel data is decoded by workers threads, where None is
+    the default of ThreadPoolExecutor.
+    """
+
     acceptable_slice_interval_error: float = 0.05
+    workers: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.workers is not None and self.workers < 1:
+            raise ValueError(f"workers must be greater than 0, got {self.workers}")
 
 
 def read_dicom(
-    paths: Iterable[str | Path], params: DicomIOParams = DicomIOParams()
+    paths: Iterable[str | Path | DicomHeader], params: DicomIOParams = DicomIOParams()
 ) -> Volume:
+    """Read a volume from DICOM files of a series.
+
+    Headers given instead of paths, e.g. by DicomIndex, are not read again unless
+    their files are modified since.
+    """
     if not HAS_PYDICOM:
         raise RuntimeError("pydicom is not installed")
 
     def _calc_slice_interval_stats(
-        sorted_dcms: list[pydicom.FileDataset],
+        sorted_dcms: list[DicomHeader],
     ) -> SliceIntervalStat:
         zs = xp.asarray([d.ImagePositionPatient[2] for d in sorted_dcms])
         slice_intervals = zs[1:] - zs[:-1]
@@ -52,7 +158,7 @@ def read_dicom(
         avg_interval = float(xp.mean(slice_intervals))
         return SliceIntervalStat(max=max_interval, min=min_interval, avg=avg_interval)
 
-    def _has_same_attributes(dcms: list[pydicom.FileDataset], attr: str) -> bool:
+    def _has_same_attributes(dcms: list[DicomHeader], attr: str) -> bool:
         return all(getattr(d, attr) == getattr(dcms[0], attr) for d in dcms)
 
     def _has_uniform_slice_interval(
@@ -61,7 +167,7 @@ def read_dicom(
         return (interval_stat.max - interval_stat.min) < acceptable_slice_interval_error
 
     def _is_orthogonal_volume(
-        sorted_dcms: list[pydicom.FileDataset], criteria: float = 1e-6
+        sorted_dcms: list[DicomHeader], criteria: float = 1e-6
     ) -> bool:
         base_dcm = sorted_dcms[0]
         orientation = _calc_orientation(base_dcm, 1.0)
@@ -89,7 +195,7 @@ def read_dicom(
                 return False
         return True
 
-    def _calc_orientation(dcm: pydicom.FileDataset, interval: float) -> Orientation:
+    def _calc_orientation(dcm: DicomHeader, interval: float) -> Orientation:
         axis_i = np.array(dcm.ImageOrientationPatient[:3], dtype=np.float64)
         axis_j = np.array(dcm.ImageOrientationPatient[3:], dtype=np.float64)
         axis_k = np.cross(axis_j, axis_i)
@@ -105,7 +211,7 @@ def read_dicom(
         )
 
     def _validate(
-        dcms: list[pydicom.FileDataset],
+        dcms: list[DicomHeader],
         interval_stat: SliceIntervalStat,
         acceptable_slice_interval_error: float,
     ) -> None:
@@ -131,25 +237,59 @@ def read_dicom(
             if not _has_same_attributes(dcms, attr):
                 raise ValueError(f"Attribute {attr} is not uniform")
 
-    def _array_from_dcm(dcm: pydicom.FileDataset) -> xp.Array:
-        pixel_array = pydicom.pixel_data_handlers.apply_rescale(dcm.pixel_array, dcm)  # type: ignore
-        return xp.from_dlpack(pixel_array)  # type: ignore
+    def _read_header(path: str | Path | DicomHeader) -> DicomHeader:
+        if isinstance(path, DicomHeader):
+            # headers of files modified since they were read are stale
+            if os.stat(path.path).st_mtime == path.mtime:
+                return path
+            return read_dicom_header(path.path)
+        return read_dicom_header(path)
 
-    dcms: list[pydicom.FileDataset] = []
-    for p in paths:
-        d = pydicom.dcmread(p)
-        if isinstance(d, pydicom.dicomdir.DicomDir):
-            raise ValueError(f"DicomDir is not supported: {str(p)}")
-        dcms.append(d)
-    dcms.sort(key=lambda d: -d.ImagePositionPatient[2])
+    def _decode(path: str | Path) -> Any:
+        dcm = pydicom.dcmread(path)
+        return pydicom.pixel_data_handlers.apply_rescale(dcm.pixel_array, dcm)  # type: ignore
 
-    if len(dcms) == 0:
+    def _get_dtype(dcms: list[DicomHeader]) -> Any:
+        # slices of mixed pixel representations are promoted to hold all of them
+        if any(d.rescaled for d in dcms):
+            return np.dtype(np.float64)
+        return np.result_type(
+            *{
+                np.dtype(
+                    f"{'i' if d.PixelRepresentation == 1 else 'u'}"
+                    f"{max(d.BitsAllocated, 8) // 8}"
+                )
+                for d in dcms
+            }
+        )
+
+    def _read_data(
+        sorted_dcms: list[DicomHeader], executor: ThreadPoolExecutor
+    ) -> xp.Array:
+        data = np.empty(
+            (len(sorted_dcms), sorted_dcms[0].Rows, sorted_dcms[0].Columns),
+            dtype=_get_dtype(sorted_dcms),
+        )
+
+        def _decode_into(n: int) -> None:
+            data[n] = _decode(sorted_dcms[n].path)
+
+        list(executor.map(_decode_into, range(len(sorted_dcms))))
+        return xpe.from_numpy(data)
+
+    paths = list(paths)
+    if len(paths) == 0:
         raise ValueError("No dicom files are found")
 
-    interval_stat = _calc_slice_interval_stats(dcms)
-    _validate(dcms, interval_stat, params.acceptable_slice_interval_error)
+    with ThreadPoolExecutor(max_workers=params.workers) as executor:
+        # headers are sorted and validated before any pixel data is decoded
+        headers = list(executor.map(_read_header, paths))
+        dcms = sorted(headers, key=lambda d: -d.ImagePositionPatient[2])
+
+        interval_stat = _calc_slice_interval_stats(dcms)
+        _validate(dcms, interval_stat, params.acceptable_slice_interval_error)
 
-    data = xp.stack([_array_from_dcm(d) for d in dcms], axis=0)
+        data = _read_data(dcms, executor)
     return Volume(
         data=data,
         frame=Frame(
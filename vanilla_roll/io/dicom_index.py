@@ -0,0 +1,193 @@
+# pyright: reportUnknownMemberType=false
+
+import json
+import os
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from vanilla_roll.io.dicom import HAS_PYDICOM, DicomHeader, read_dicom_header
+
+try:
+    import pydicom.errors  # type: ignore
+except ImportError:
+    if TYPE_CHECKING:
+        import pydicom.errors
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    series_instance_uid TEXT,
+    header TEXT
+);
+CREATE INDEX IF NOT EXISTS files_series ON files (series_instance_uid);
+"""
+
+
+def _list_directory(path: str) -> list[tuple[str, bool, float]]:
+    entries: list[tuple[str, bool, float]] = []
+    with os.scandir(path) as it:
+        for e in it:
+            is_dir = e.is_dir(follow_symlinks=False)
+            entries.append((e.path, is_dir, 0.0 if is_dir else e.stat().st_mtime))
+    return entries
+
+
+def _list_files(root: str, executor: ThreadPoolExecutor) -> dict[str, float]:
+    # directories of the same depth are listed in parallel
+    files: dict[str, float] = {}
+    directories = [root]
+    while 0 < len(directories):
+        subdirectories: list[str] = []
+        for entries in executor.map(_list_directory, directories):
+            for path, is_dir, mtime in entries:
+                if is_dir:
+                    subdirectories.append(path)
+                else:
+                    files[path] = mtime
+        directories = subdirectories
+    return files
+
+
+def _try_read_header(path: str) -> DicomHeader | None:
+    # Non-image files, e.g. DICOMDIRs, and broken files are indexed without
+    # headers. Files truncated within an element fail to unpack its value.
+    try:
+        return read_dicom_header(path)
+    except (
+        pydicom.errors.InvalidDicomError,
+        pydicom.errors.BytesLengthException,
+        struct.error,
+        EOFError,
+        OSError,
+        ValueError,
+    ):
+        return None
+
+
+def _encode_header(header: DicomHeader) -> str:
+    return json.dumps(
+        {
+            "SeriesInstanceUID": header.SeriesInstanceUID,
+            "StudyInstanceUID": header.StudyInstanceUID,
+            "ImagePositionPatient": header.ImagePositionPatient,
+            "ImageOrientationPatient": header.ImageOrientationPatient,
+            "PixelSpacing": header.PixelSpacing,
+            "Rows": header.Rows,
+            "Columns": header.Columns,
+            "BitsAllocated": header.BitsAllocated,
+            "PixelRepresentation": header.PixelRepresentation,
+            "rescaled": header.rescaled,
+        }
+    )
+
+
+def _decode_header(path: str, mtime: float, encoded: str) -> DicomHeader:
+    fields: dict[str, Any] = json.loads(encoded)
+    return DicomHeader(
+        path=path,
+        mtime=mtime,
+        SeriesInstanceUID=fields["SeriesInstanceUID"],
+        StudyInstanceUID=fields["StudyInstanceUID"],
+        ImagePositionPatient=tuple(fields["ImagePositionPatient"]),
+        ImageOrientationPatient=tuple(fields["ImageOrientationPatient"]),
+        PixelSpacing=tuple(fields["PixelSpacing"]),
+        Rows=fields["Rows"],
+        Columns=fields["Columns"],
+        BitsAllocated=fields["BitsAllocated"],
+        PixelRepresentation=fields["PixelRepresentation"],
+        rescaled=fields["rescaled"],
+    )
+
+
+class DicomIndex:
+    """DicomIndex persists headers of DICOM files in a SQLite database.
+
+    Headers of a series are passed to read_dicom, which does not read them again
+    unless their files are modified since the last scan.
+
+    >>> with DicomIndex(":memory:") as index:
+    ...     index.series()
+    []
+    """
+
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str | Path) -> None:
+        self._connection = sqlite3.connect(str(path))
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self) -> "DicomIndex":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def scan(self, path: str | Path, workers: int | None = None) -> None:
+        """Index files under a directory, or under the parent directory of a file.
+
+        Only files which are new or modified since the last scan are read, and
+        files which no longer exist are dropped.
+        """
+        if not HAS_PYDICOM:
+            raise RuntimeError("pydicom is not installed")
+
+        root = Path(path).absolute()
+        if root.is_file():
+            root = root.parent
+        prefix = os.path.join(str(root), "")
+
+        indexed: dict[str, float] = dict(
+            self._connection.execute(
+                "SELECT path, mtime FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        )
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            files = _list_files(str(root), executor)
+            modified = [p for p, mtime in files.items() if indexed.get(p) != mtime]
+            headers = list(executor.map(_try_read_header, modified))
+
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM files WHERE path = ?",
+                [(p,) for p in indexed.keys() if p not in files],
+            )
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        p,
+                        files[p],
+                        None if h is None else h.SeriesInstanceUID,
+                        None if h is None else _encode_header(h),
+                    )
+                    for p, h in zip(modified, headers)
+                ],
+            )
+
+    def series(self) -> list[str]:
+        """Return SeriesInstanceUIDs of indexed series."""
+        rows = self._connection.execute(
+            "SELECT DISTINCT series_instance_uid FROM files "
+            "WHERE series_instance_uid IS NOT NULL ORDER BY series_instance_uid"
+        ).fetchall()
+        return [uid for uid, in rows]
+
+    def headers(self, series_instance_uid: str) -> list[DicomHeader]:
+        """Return headers of files of a series as of the last scan.
+
+        read_dicom reads headers of files modified since then again.
+        """
+        rows = self._connection.execute(
+            "SELECT path, mtime, header FROM files "
+            "WHERE series_instance_uid = ? ORDER BY path",
+            (series_instance_uid,),
+        ).fetchall()
+        return [_decode_header(path, mtime, header) for path, mtime, header in rows]
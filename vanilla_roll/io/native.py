@@ -0,0 +1,70 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.chunked import asarray
+from vanilla_roll.io.sidecar import decode_geometry, encode_geometry
+from vanilla_roll.volume import Volume
+
+_FORMAT_VERSION = 1
+_DATA_FILE = "data.npy"
+_SIDECAR_FILE = "volume.json"
+
+
+@dataclass(frozen=True)
+class NativeIOParams:
+    """Parameters of loading volumes saved by save_volume.
+
+    If mmap is True, data stays memory-mapped copy on write.
+    """
+
+    mmap: bool = True
+
+
+def save_volume(volume: Volume, path: str | Path) -> None:
+    """Save volume into directory path for load_volume.
+
+    Data is written slice by slice as an aligned .npy array. The sidecar of its
+    frame and anatomy orientation is written last, so that a directory without
+    it is regarded as incomplete.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / _SIDECAR_FILE).unlink(missing_ok=True)
+
+    first = xpe.asnumpy(asarray(volume.data[:1, :, :]))
+    data = np.lib.format.open_memmap(
+        path / _DATA_FILE, mode="w+", dtype=first.dtype, shape=volume.shape
+    )
+    data[0] = first[0]
+    for k in range(1, volume.shape[0]):
+        data[k] = xpe.asnumpy(asarray(volume.data[k : k + 1, :, :]))[0]
+    data.flush()
+    del data
+
+    sidecar: dict[str, Any] = {
+        "version": _FORMAT_VERSION,
+        **encode_geometry(volume.frame, volume.anatomy_orientation),
+    }
+    (path / _SIDECAR_FILE).write_text(json.dumps(sidecar))
+
+
+def load_volume(path: str | Path, params: NativeIOParams = NativeIOParams()) -> Volume:
+    """Load volume saved by save_volume."""
+    path = Path(path)
+    if not (path / _SIDECAR_FILE).exists():
+        raise ValueError(f"Not a saved volume: {str(path)}")
+
+    sidecar: dict[str, Any] = json.loads((path / _SIDECAR_FILE).read_text())
+    if sidecar.get("version") != _FORMAT_VERSION:
+        raise ValueError(f"Unsupported version: {sidecar.get('version')}")
+
+    data = np.load(path / _DATA_FILE, mmap_mode="c" if params.mmap else None)
+    frame, anatomy_orientation = decode_geometry(sidecar)
+    return Volume(
+        xpe.from_numpy(data), frame=frame, anatomy_orientation=anatomy_orientation
+    )
@@ -5,11 +5,13 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Any, cast
 
 import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
 from vanilla_roll.anatomy_orientation import AnatomyOrientation
 from vanilla_roll.anatomy_orientation import parse as parse_anatomy_orientation
+from vanilla_roll.chunked import ArrayChunkSource, ChunkedArray
 from vanilla_roll.geometry.element import Frame, Orientation, Vector
 from vanilla_roll.volume import Volume
 
@@ -31,9 +33,42 @@ except ImportError:
         from nibabel.spatialimages import SpatialImage
 
 
+# slices of the last axis, which are contiguous in the Fortran-ordered image
+SCALED_CHUNK_SLICES = 8
+
+
 @dataclass(frozen=True)
 class NIFTIIOParams:
-    pass
+    """Parameters of reading NIfTI.
+
+    If mmap is True, data of uncompressed images stays memory-mapped copy on write.
+    Scaled images are then scaled into float32 lazily by chunks of contiguous
+    slices. Otherwise images are loaded by the default of nibabel and read whole.
+    """
+
+    mmap: bool = False
+
+
+class _ScaledChunkSource(ArrayChunkSource):
+    """Chunks of an unscaled image, which are scaled by slope and intercept."""
+
+    _slope: float
+    _inter: float
+
+    def __init__(self, raw: Any, slope: float, inter: float) -> None:
+        super().__init__(
+            raw, (raw.shape[0], raw.shape[1], min(SCALED_CHUNK_SLICES, raw.shape[2]))
+        )
+        self._slope = slope
+        self._inter = inter
+
+    @property
+    def dtype(self) -> Any:
+        return xp.float32
+
+    def read_chunk(self, index: tuple[int, int, int]) -> xp.Array:
+        chunk = xp.astype(super().read_chunk(index), xp.float32)
+        return chunk * self._slope + self._inter
 
 
 def read_nifti(path: str | Path, params: NIFTIIOParams = NIFTIIOParams()) -> Volume:
@@ -61,15 +96,25 @@ def read_nifti(path: str | Path, params: NIFTIIOParams = NIFTIIOParams()) -> Vol
         return parse_anatomy_orientation("".join(axcodes[::-1]))
 
     def _get_data(nii: SpatialImage) -> xp.Array:
-        return xp.asarray(nii.get_data())
+        return xpe.from_numpy(np.asanyarray(nii.dataobj))
+
+    def _get_mapped_data(nii: SpatialImage) -> xp.Array | ChunkedArray:
+        dataobj = nii.dataobj
+        raw: npt.NDArray[np.generic] = dataobj.get_unscaled()
+        slope, inter = float(dataobj.slope), float(dataobj.inter)
+        if slope == 1.0 and inter == 0.0:
+            return xpe.from_numpy(raw)
+        return ChunkedArray(_ScaledChunkSource(raw, slope, inter))
 
     def _load_data(path: str | Path) -> SpatialImage:
-        image: SpatialImage = nib.load(path)
+        image: SpatialImage = (
+            nib.load(path, mmap="c") if params.mmap else nib.load(path)
+        )
         return cast(SpatialImage, image)
 
     nii = _load_data(path)
 
-    data = _get_data(nii)
+    data = _get_mapped_data(nii) if params.mmap else _get_data(nii)
     origin = _get_origin(nii)
     orientation = _get_orientation(nii)
     anatomy_orientation = _get_anatomy_orientation(nii)
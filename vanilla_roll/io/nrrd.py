@@ -0,0 +1,298 @@
+import bz2
+import gzip
+import math
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any
+
+import numpy as np
+import numpy.typing as npt
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.anatomy_orientation import AnatomyOrientation
+from vanilla_roll.anatomy_orientation import parse as parse_anatomy_orientation
+from vanilla_roll.geometry.element import Frame, Orientation, Vector
+from vanilla_roll.volume import Volume
+
+_TYPES: dict[str, str] = {
+    **dict.fromkeys(["signed char", "int8", "int8_t"], "i1"),
+    **dict.fromkeys(["uchar", "unsigned char", "uint8", "uint8_t"], "u1"),
+    **dict.fromkeys(
+        ["short", "short int", "signed short", "signed short int", "int16", "int16_t"],
+        "i2",
+    ),
+    **dict.fromkeys(
+        ["ushort", "unsigned short", "unsigned short int", "uint16", "uint16_t"],
+        "u2",
+    ),
+    **dict.fromkeys(["int", "signed int", "int32", "int32_t"], "i4"),
+    **dict.fromkeys(["uint", "unsigned int", "uint32", "uint32_t"], "u4"),
+    **dict.fromkeys(
+        [
+            "longlong",
+            "long long",
+            "long long int",
+            "signed long long",
+            "signed long long int",
+            "int64",
+            "int64_t",
+        ],
+        "i8",
+    ),
+    **dict.fromkeys(
+        [
+            "ulonglong",
+            "unsigned long long",
+            "unsigned long long int",
+            "uint64",
+            "uint64_t",
+        ],
+        "u8",
+    ),
+    "float": "f4",
+    "double": "f8",
+}
+
+# anatomical directions of the positive and negative side of each space axis
+_SPACES: dict[str, tuple[tuple[str, str], tuple[str, str], tuple[str, str]]] = {
+    **dict.fromkeys(
+        ["left-posterior-superior", "lps"], (("L", "R"), ("P", "A"), ("S", "I"))
+    ),
+    **dict.fromkeys(
+        ["right-anterior-superior", "ras"], (("R", "L"), ("A", "P"), ("S", "I"))
+    ),
+    **dict.fromkeys(
+        ["left-anterior-superior", "las"], (("L", "R"), ("A", "P"), ("S", "I"))
+    ),
+}
+
+_CHUNK_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class NRRDIOParams:
+    """Parameters of reading NRRD.
+
+    If mmap is True, raw encoded data in native byte order stays memory-mapped
+    copy on write.
+    """
+
+    mmap: bool = True
+
+
+@dataclass(frozen=True)
+class _Header:
+    fields: dict[str, str]
+    data_offset: int
+
+
+def _read_header(path: Path) -> _Header:
+    fields: dict[str, str] = {}
+    with open(path, "rb") as f:
+        magic = f.readline()
+        if not magic.startswith(b"NRRD000"):
+            raise ValueError(f"Not a NRRD file: {str(path)}")
+
+        for line in iter(f.readline, b""):
+            text = line.decode("latin-1").rstrip("\r\n")
+            if text == "":
+                break
+            if text.startswith("#") or ":=" in text:
+                continue
+            field, sep, value = text.partition(": ")
+            if sep == "":
+                raise ValueError(f"Invalid NRRD header line: {text}")
+            fields[field.strip().lower()] = value.strip()
+        return _Header(fields=fields, data_offset=f.tell())
+
+
+def _parse_vector(s: str) -> Vector | None:
+    if s == "none":
+        return None
+    values = [float(v) for v in s.strip("()").split(",")]
+    if len(values) != 3:
+        raise ValueError(f"Expected 3D vector, got {s}")
+    return Vector(i=values[0], j=values[1], k=values[2])
+
+
+def _get_dtype(fields: dict[str, str]) -> np.dtype[Any]:
+    try:
+        dtype = np.dtype(_TYPES[fields["type"].lower()])
+    except KeyError:
+        raise NotImplementedError(f"Unsupported type: {fields.get('type')}")
+    if 1 < dtype.itemsize:
+        endian = fields.get("endian", sys.byteorder)
+        dtype = dtype.newbyteorder("<" if endian == "little" else ">")
+    return dtype
+
+
+def _get_shape(fields: dict[str, str]) -> tuple[int, int, int]:
+    sizes = [int(s) for s in fields["sizes"].split()]
+    if int(fields["dimension"]) != 3 or len(sizes) != 3:
+        raise ValueError(f"Expected 3D volume, got sizes {fields['sizes']}")
+    # the first axis is the fastest one
+    return (sizes[2], sizes[1], sizes[0])
+
+
+def _get_orientation(fields: dict[str, str]) -> Orientation:
+    if "space directions" in fields:
+        directions = [
+            _parse_vector(s)
+            for s in re.findall(r"\([^)]*\)|none", fields["space directions"])
+        ]
+        if len(directions) != 3 or any(d is None for d in directions):
+            raise ValueError("Expected 3 space directions")
+        i, j, k = (d for d in directions if d is not None)
+        return Orientation(i=i, j=j, k=k)
+
+    spacings = [
+        1.0 if math.isnan(s) else s
+        for s in (float(v) for v in fields.get("spacings", "1 1 1").split())
+    ]
+    return Orientation(
+        i=Vector(i=spacings[0], j=0.0, k=0.0),
+        j=Vector(i=0.0, j=spacings[1], k=0.0),
+        k=Vector(i=0.0, j=0.0, k=spacings[2]),
+    )
+
+
+def _get_origin(fields: dict[str, str]) -> Vector:
+    if "space origin" in fields:
+        origin = _parse_vector(fields["space origin"])
+        if origin is not None:
+            return origin
+    return Vector(i=0.0, j=0.0, k=0.0)
+
+
+def _get_anatomy_orientation(
+    fields: dict[str, str], orientation: Orientation
+) -> AnatomyOrientation | None:
+    space = _SPACES.get(fields.get("space", "").lower())
+    if space is None:
+        return None
+
+    codes = ""
+    for axis in (orientation.i, orientation.j, orientation.k):
+        components = [axis.i, axis.j, axis.k]
+        dominant = max(range(3), key=lambda n: abs(components[n]))
+        codes += space[dominant][0 if 0.0 < components[dominant] else 1]
+    try:
+        return parse_anatomy_orientation(codes)
+    except ValueError:
+        return None
+
+
+def _get_data_path(path: Path, fields: dict[str, str]) -> Path | None:
+    data_file = fields.get("data file", fields.get("datafile"))
+    if data_file is None:
+        return None
+    if data_file.startswith("LIST") or 1 < len(data_file.split()):
+        raise NotImplementedError("Data split into multiple files is not supported")
+    return path.parent / data_file
+
+
+def _skip_lines(f: IO[bytes], lines: int) -> None:
+    for _ in range(lines):
+        f.readline()
+
+
+def _skip_bytes(f: IO[bytes], n: int) -> None:
+    # compressed streams are skipped by reading
+    while 0 < n:
+        skipped = len(f.read(min(n, _CHUNK_BYTES)))
+        if skipped == 0:
+            raise ValueError("NRRD data is truncated")
+        n -= skipped
+
+
+def _read_into(f: IO[bytes], data: npt.NDArray[Any]) -> None:
+    buffer = memoryview(data).cast("B")
+    position = 0
+    while position < len(buffer):
+        n = f.readinto(buffer[position : position + _CHUNK_BYTES])  # type: ignore
+        if not n:
+            raise ValueError("NRRD data is truncated")
+        position += n
+
+
+def _read_data(
+    path: Path,
+    offset: int,
+    fields: dict[str, str],
+    shape: tuple[int, int, int],
+    dtype: np.dtype[Any],
+    params: NRRDIOParams,
+) -> npt.NDArray[Any]:
+    encoding = fields.get("encoding", "raw").lower()
+    line_skip = int(fields.get("line skip", fields.get("lineskip", "0")))
+    byte_skip = int(fields.get("byte skip", fields.get("byteskip", "0")))
+    nbytes = math.prod(shape) * dtype.itemsize
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        _skip_lines(f, line_skip)
+        offset = f.tell()
+        match encoding:
+            case "raw":
+                if byte_skip == -1:
+                    offset = f.seek(0, 2) - nbytes
+                else:
+                    offset += byte_skip
+                if params.mmap and dtype.isnative:
+                    return np.memmap(
+                        path, dtype=dtype, mode="c", offset=offset, shape=shape
+                    )
+                data = np.empty(shape, dtype=dtype)
+                f.seek(offset)
+                _read_into(f, data)
+            case "gzip" | "gz" | "bzip2" | "bz2":
+                # compressed data is streamed into the destination array
+                stream: IO[bytes] = (
+                    gzip.GzipFile(fileobj=f, mode="rb")
+                    if encoding in ("gzip", "gz")
+                    else bz2.BZ2File(f, mode="rb")
+                )
+                with stream:
+                    _skip_bytes(stream, byte_skip)
+                    data = np.empty(shape, dtype=dtype)
+                    _read_into(stream, data)
+            case "ascii" | "text" | "txt":
+                values = np.array(f.read().split(), dtype=dtype.newbyteorder("="))
+                if values.size < math.prod(shape):
+                    raise ValueError("NRRD data is truncated")
+                return np.reshape(values[: math.prod(shape)], shape)
+            case _:
+                raise NotImplementedError(f"Unsupported encoding: {encoding}")
+    return data
+
+
+def read_nrrd(path: str | Path, params: NRRDIOParams = NRRDIOParams()) -> Volume:
+    """Read a volume from NRRD of attached (.nrrd) or detached (.nhdr) data."""
+    path = Path(path)
+    header = _read_header(path)
+    fields = header.fields
+
+    shape = _get_shape(fields)
+    dtype = _get_dtype(fields)
+    data_path = _get_data_path(path, fields)
+    array = _read_data(
+        path if data_path is None else data_path,
+        header.data_offset if data_path is None else 0,
+        fields,
+        shape,
+        dtype,
+        params,
+    )
+    if not array.dtype.isnative:
+        array = array.astype(array.dtype.newbyteorder("="))
+
+    orientation = _get_orientation(fields)
+    data: xp.Array = xpe.from_numpy(array)
+    return Volume(
+        data,
+        frame=Frame(_get_origin(fields), orientation),
+        anatomy_orientation=_get_anatomy_orientation(fields, orientation),
+    )
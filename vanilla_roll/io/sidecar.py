@@ -0,0 +1,60 @@
+from typing import Any
+
+from vanilla_roll.anatomy_orientation import AnatomyOrientation
+from vanilla_roll.anatomy_orientation import parse as parse_anatomy_orientation
+from vanilla_roll.geometry.element import Frame, Orientation, Vector
+
+
+def _encode_vector(vector: Vector) -> list[float]:
+    return [vector.i, vector.j, vector.k]
+
+
+def _decode_vector(values: list[float]) -> Vector:
+    return Vector(i=values[0], j=values[1], k=values[2])
+
+
+def encode_geometry(
+    frame: Frame, anatomy_orientation: AnatomyOrientation | None
+) -> dict[str, Any]:
+    """Encode frame and anatomy orientation into JSON sidecar fields."""
+    return {
+        "origin": _encode_vector(frame.origin),
+        "orientation": {
+            "i": _encode_vector(frame.orientation.i),
+            "j": _encode_vector(frame.orientation.j),
+            "k": _encode_vector(frame.orientation.k),
+        },
+        "anatomy_orientation": (
+            None
+            if anatomy_orientation is None
+            else "-".join(
+                axis.value
+                for axis in (
+                    anatomy_orientation.i,
+                    anatomy_orientation.j,
+                    anatomy_orientation.k,
+                )
+            )
+        ),
+    }
+
+
+def decode_geometry(sidecar: dict[str, Any]) -> tuple[Frame, AnatomyOrientation | None]:
+    """Decode frame and anatomy orientation from JSON sidecar fields."""
+    orientation = sidecar["orientation"]
+    anatomy_orientation = sidecar["anatomy_orientation"]
+    return (
+        Frame(
+            origin=_decode_vector(sidecar["origin"]),
+            orientation=Orientation(
+                i=_decode_vector(orientation["i"]),
+                j=_decode_vector(orientation["j"]),
+                k=_decode_vector(orientation["k"]),
+            ),
+        ),
+        (
+            None
+            if anatomy_orientation is None
+            else parse_anatomy_orientation(anatomy_orientation)
+        ),
+    )
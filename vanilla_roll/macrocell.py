@@ -0,0 +1,179 @@
+import math
+from dataclasses import dataclass
+from typing import Callable
+
+import vanilla_roll.array_api as xp
+
+DEFAULT_BRICK_SIZE = 8
+
+
+@dataclass(frozen=True)
+class Macrocells:
+    """Macrocells holds min/max values of each brick of a volume.
+
+    A brick covers brick_size voxels and one more voxel along each axis, so
+    that interpolating samples between neighboring bricks stay in its range.
+    Voxels out of the volume are regarded as 0 like array_api_extra.sample does.
+    """
+
+    brick_size: int
+    min: xp.Array
+    max: xp.Array
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.min.shape
+
+
+@dataclass(frozen=True)
+class MacrocellHierarchy:
+    """MacrocellHierarchy is a pyramid of macrocells.
+
+    Level n has bricks of brick_size * 2 ** n voxels.
+    """
+
+    levels: tuple[Macrocells, ...]
+
+    @property
+    def brick_size(self) -> int:
+        return self.levels[0].brick_size
+
+    def level(self, n: int) -> Macrocells:
+        return self.levels[n]
+
+
+def _minimum(lhs: xp.Array, rhs: xp.Array) -> xp.Array:
+    return xp.where(lhs < rhs, lhs, rhs)
+
+
+def _maximum(lhs: xp.Array, rhs: xp.Array) -> xp.Array:
+    return xp.where(lhs < rhs, rhs, lhs)
+
+
+def _reduce_first_axis(
+    array: xp.Array,
+    brick_size: int,
+    reducer: Callable[..., xp.Array],
+    combine: Callable[[xp.Array, xp.Array], xp.Array],
+    with_apron: bool,
+) -> xp.Array:
+    n = array.shape[0]
+    bricks = int(math.ceil(n / brick_size))
+    padding = bricks * brick_size + 1 - n
+    edge = xp.zeros_like(array[-1:, ...]) if with_apron else array[-1:, ...]
+    padded = xp.concat([array, *([edge] * padding)], axis=0)
+
+    body = xp.reshape(
+        padded[: bricks * brick_size, ...], (bricks, brick_size, *array.shape[1:])
+    )
+    reduced = reducer(body, axis=1)
+    if not with_apron:
+        return reduced
+    return combine(reduced, padded[brick_size::brick_size, ...])
+
+
+def _reduce(
+    array: xp.Array,
+    brick_size: int,
+    reducer: Callable[..., xp.Array],
+    combine: Callable[[xp.Array, xp.Array], xp.Array],
+    with_apron: bool = True,
+) -> xp.Array:
+    for _ in range(3):
+        array = _reduce_first_axis(array, brick_size, reducer, combine, with_apron)
+        array = xp.permute_dims(array, (1, 2, 0))
+    return array
+
+
+def build_macrocells(
+    data: xp.Array, brick_size: int = DEFAULT_BRICK_SIZE
+) -> Macrocells:
+    """Build macrocells of given brick size.
+
+    >>> data = xp.reshape(xp.arange(64, dtype=xp.float64), (4, 4, 4))
+    >>> macrocells = build_macrocells(data, brick_size=2)
+    >>> macrocells.shape
+    (2, 2, 2)
+    >>> float(macrocells.min[0, 0, 0]), float(macrocells.max[0, 0, 0])
+    (0.0, 42.0)
+    >>> float(macrocells.min[1, 1, 1]), float(macrocells.max[1, 1, 1])
+    (0.0, 63.0)
+    """
+    if brick_size < 1:
+        raise ValueError(f"brick_size must be greater than 0. Got {brick_size}")
+
+    return Macrocells(
+        brick_size=brick_size,
+        min=_reduce(data, brick_size, xp.min, _minimum),
+        max=_reduce(data, brick_size, xp.max, _maximum),
+    )
+
+
+def _coarsen(macrocells: Macrocells) -> Macrocells:
+    return Macrocells(
+        brick_size=2 * macrocells.brick_size,
+        min=_reduce(macrocells.min, 2, xp.min, _minimum, with_apron=False),
+        max=_reduce(macrocells.max, 2, xp.max, _maximum, with_apron=False),
+    )
+
+
+def _extend_apron(
+    bounds: xp.Array, combine: Callable[[xp.Array, xp.Array], xp.Array]
+) -> xp.Array:
+    # bounds of each brick are combined with those of the following bricks
+    for _ in range(3):
+        edge = xp.zeros_like(bounds[-1:, ...])
+        bounds = combine(bounds, xp.concat([bounds[1:, ...], edge], axis=0))
+        bounds = xp.permute_dims(bounds, (1, 2, 0))
+    return bounds
+
+
+def build_macrocell_hierarchy_from_bounds(
+    brick_min: xp.Array, brick_max: xp.Array, brick_size: int
+) -> MacrocellHierarchy:
+    """Build macrocells from min/max values of bricks without their aprons.
+
+    Aprons are covered by the bounds of the following bricks, so that the
+    macrocells are conservative without reading any voxel.
+
+    >>> brick_min = xp.reshape(xp.arange(1, 9, dtype=xp.float64), (2, 2, 2))
+    >>> brick_max = brick_min + 10.0
+    >>> hierarchy = build_macrocell_hierarchy_from_bounds(brick_min, brick_max, 2)
+    >>> [level.shape for level in hierarchy.levels]
+    [(2, 2, 2), (1, 1, 1)]
+    >>> float(hierarchy.level(0).min[0, 0, 0]), float(hierarchy.level(0).max[0, 0, 0])
+    (1.0, 18.0)
+    >>> float(hierarchy.level(0).min[1, 1, 1]), float(hierarchy.level(0).max[1, 1, 1])
+    (0.0, 18.0)
+    """
+    if brick_size < 1:
+        raise ValueError(f"brick_size must be greater than 0. Got {brick_size}")
+
+    levels = [
+        Macrocells(
+            brick_size=brick_size,
+            min=_extend_apron(brick_min, _minimum),
+            max=_extend_apron(brick_max, _maximum),
+        )
+    ]
+    while 1 < max(levels[-1].shape):
+        levels.append(_coarsen(levels[-1]))
+    return MacrocellHierarchy(levels=tuple(levels))
+
+
+def build_macrocell_hierarchy(
+    data: xp.Array, brick_size: int = DEFAULT_BRICK_SIZE
+) -> MacrocellHierarchy:
+    """Build macrocells and coarsen them until a single brick covers the volume.
+
+    >>> data = xp.reshape(xp.arange(64, dtype=xp.float64), (4, 4, 4))
+    >>> hierarchy = build_macrocell_hierarchy(data, brick_size=2)
+    >>> [level.shape for level in hierarchy.levels]
+    [(2, 2, 2), (1, 1, 1)]
+    >>> float(hierarchy.level(1).min[0, 0, 0]), float(hierarchy.level(1).max[0, 0, 0])
+    (0.0, 63.0)
+    """
+    levels = [build_macrocells(data, brick_size)]
+    while 1 < max(levels[-1].shape):
+        levels.append(_coarsen(levels[-1]))
+    return MacrocellHierarchy(levels=tuple(levels))
@@ -1,5 +1,11 @@
 from . import algorithm, composition, mode, projection, transfer_function, types
-from .rendering import convert_image_to_array, create_renderer
+from .process_pool import render_in_processes
+from .rendering import (
+    convert_image_to_array,
+    create_batch_renderer,
+    create_renderer,
+    render_progressive,
+)
 
 __all__ = [
     "types",
@@ -8,6 +14,9 @@ __all__ = [
     "composition",
     "projection",
     "create_renderer",
+    "create_batch_renderer",
+    "render_in_processes",
+    "render_progressive",
     "convert_image_to_array",
     "transfer_function",
 ]
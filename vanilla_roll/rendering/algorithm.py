@@ -1,14 +1,77 @@
 from dataclasses import dataclass
 
+from vanilla_roll.validation import (
+    IsFinite,
+    IsGreaterEqualThan,
+    IsGreaterThan,
+    IsLessEqualThan,
+    Validator,
+)
+
+DEFAULT_MAX_SLAB_BYTES = 256 * 2**20
+
 
 @dataclass(frozen=True)
 class Sampling:
+    """Sampling renders the view volume by slabs of at most max_slab_bytes.
+
+    The budget bounds memory allocated for sampling a slab, while buffers of the
+    image and decoded chunks of chunked data are not included.
+    """
+
     step: float
+    max_slab_bytes: int = DEFAULT_MAX_SLAB_BYTES
+
+    def __post_init__(self) -> None:
+        validator = Validator(rules=[IsGreaterThan(0)])
+        if exception := validator("max_slab_bytes", self.max_slab_bytes):
+            raise exception
+
+
+def _validate_termination_threshold(termination_threshold: float) -> None:
+    validator = Validator(rules=[IsGreaterThan(0.0), IsLessEqualThan(1.0)])
+    if exception := validator("termination_threshold", termination_threshold):
+        raise exception
 
 
 @dataclass(frozen=True)
 class ShearWarp:
-    pass
+    """ShearWarp composites slices along the principal axis of viewing directions.
+
+    Volumes permuted for the principal axes are copied to be contiguous, and
+    max_permuted_bytes bounds the total size of these copies if given.
+    Slices are split into depth slabs composited by workers threads in parallel.
+    """
+
+    termination_threshold: float = 0.99
+    max_permuted_bytes: int | None = None
+    workers: int = 1
+
+    def __post_init__(self) -> None:
+        _validate_termination_threshold(self.termination_threshold)
+
+        validator = Validator(rules=[IsGreaterEqualThan(0)])
+        if self.max_permuted_bytes is not None and (
+            exception := validator("max_permuted_bytes", self.max_permuted_bytes)
+        ):
+            raise exception
+
+        workers_validator = Validator(rules=[IsGreaterThan(0)])
+        if exception := workers_validator("workers", self.workers):
+            raise exception
+
+
+@dataclass(frozen=True)
+class Raycast:
+    step: float
+    termination_threshold: float = 0.99
+
+    def __post_init__(self) -> None:
+        step_validator = Validator(rules=[IsGreaterThan(0.0), IsFinite()])
+        if exception := step_validator("step", self.step):
+            raise exception
+
+        _validate_termination_threshold(self.termination_threshold)
 
 
-Algorithm = Sampling | ShearWarp
+Algorithm = Sampling | ShearWarp | Raycast
@@ -1,9 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Any, Callable, Protocol, Sequence
 
 import vanilla_roll.array_api as xp
 import vanilla_roll.array_api_extra as xpe
-from vanilla_roll.rendering.transfer_function import TransferFunction
+from vanilla_roll.rendering.transfer_function import (
+    Result,
+    TransferFunction,
+    TransferFunctionTable,
+)
 from vanilla_roll.rendering.types import ColorImage, Image, MonoImage
 
 
@@ -28,9 +33,33 @@ class Composer(Protocol):
     def compose(self) -> Image:
         ...
 
+    def skip(self, thickness: float, /) -> None:
+        """Count a slice which has no sample in view, e.g. one clipped away.
+
+        Only composers which normalize by the number of slices depend on it.
+        """
+
+    def merge(self, back: "Composer", /) -> None:
+        """Merge back, which holds samples behind those of this composer, into this.
+
+        Merging is associative, so that depth slabs can be composited separately.
+        """
+        ...
+
+    def saturated(
+        self, threshold: float, /, *, slice: Slice2d | None = None
+    ) -> xp.Array | None:
+        """Return the mask of pixels which further samples can no longer change.
+
+        If slice is given, only the mask of the region is returned.
+        None means that this composer never saturates.
+        """
+        ...
+
 
 class AccMax(Composer):
     _sampling_method: xpe.SamplingMethod
+    _dtype: Any
     _accumulation: xp.Array
 
     def __init__(
@@ -39,9 +68,11 @@ class AccMax(Composer):
         /,
         *,
         sampling_method: xpe.SamplingMethod = "linear",
+        precision: xpe.Precision = "float64",
     ) -> None:
         self._sampling_method = sampling_method
-        self._accumulation = -float("inf") * xp.ones(shape, dtype=xp.float64)
+        self._dtype = xpe.get_dtype(precision)
+        self._accumulation = -float("inf") * xp.ones(shape, dtype=self._dtype)
 
     def add(
         self,
@@ -72,9 +103,24 @@ class AccMax(Composer):
         luma[none_value_mask] = 0
         return MonoImage(l=luma)
 
+    def merge(self, back: Composer, /) -> None:
+        if not isinstance(back, AccMax):
+            raise TypeError(f"Cannot merge {type(back).__name__} into AccMax")
+        self._accumulation = xp.where(
+            self._accumulation < back._accumulation,
+            back._accumulation,
+            self._accumulation,
+        )
+
+    def saturated(
+        self, threshold: float, /, *, slice: Slice2d | None = None
+    ) -> xp.Array | None:
+        return None
+
 
 class AccMin(Composer):
     _sampling_method: xpe.SamplingMethod
+    _dtype: Any
     _accumulation: xp.Array
 
     def __init__(
@@ -83,9 +129,11 @@ class AccMin(Composer):
         /,
         *,
         sampling_method: xpe.SamplingMethod = "linear",
+        precision: xpe.Precision = "float64",
     ) -> None:
         self._sampling_method = sampling_method
-        self._accumulation = float("inf") * xp.ones(shape, dtype=xp.float64)
+        self._dtype = xpe.get_dtype(precision)
+        self._accumulation = float("inf") * xp.ones(shape, dtype=self._dtype)
 
     def add(
         self,
@@ -116,9 +164,24 @@ class AccMin(Composer):
         luma[none_value_mask] = 0
         return MonoImage(l=luma)
 
+    def merge(self, back: Composer, /) -> None:
+        if not isinstance(back, AccMin):
+            raise TypeError(f"Cannot merge {type(back).__name__} into AccMin")
+        self._accumulation = xp.where(
+            back._accumulation < self._accumulation,
+            back._accumulation,
+            self._accumulation,
+        )
+
+    def saturated(
+        self, threshold: float, /, *, slice: Slice2d | None = None
+    ) -> xp.Array | None:
+        return None
+
 
 class AccMean(Composer):
     _sampling_method: xpe.SamplingMethod
+    _dtype: Any
     _accumulation: xp.Array
     _acc_count: int
 
@@ -128,9 +191,11 @@ class AccMean(Composer):
         /,
         *,
         sampling_method: xpe.SamplingMethod = "linear",
+        precision: xpe.Precision = "float64",
     ) -> None:
         self._sampling_method = sampling_method
-        self._accumulation = xp.zeros(shape, dtype=xp.float64)
+        self._dtype = xpe.get_dtype(precision)
+        self._accumulation = xp.zeros(shape, dtype=self._dtype)
         self._acc_count = 0
 
     def add(
@@ -159,14 +224,29 @@ class AccMean(Composer):
 
     def compose(self) -> Image:
         if self._acc_count == 0:
-            return MonoImage(xp.zeros(self._accumulation.shape, dtype=xp.float64))
+            return MonoImage(xp.zeros(self._accumulation.shape, dtype=self._dtype))
 
         luma = self._accumulation / self._acc_count
         return MonoImage(l=luma)
 
+    def skip(self, thickness: float, /) -> None:
+        self._acc_count += 1
+
+    def merge(self, back: Composer, /) -> None:
+        if not isinstance(back, AccMean):
+            raise TypeError(f"Cannot merge {type(back).__name__} into AccMean")
+        self._accumulation += back._accumulation
+        self._acc_count += back._acc_count
+
+    def saturated(
+        self, threshold: float, /, *, slice: Slice2d | None = None
+    ) -> xp.Array | None:
+        return None
+
 
 class AccVR(Composer):
     _sampling_method: xpe.SamplingMethod
+    _dtype: Any
     _acc_r: xp.Array
     _acc_g: xp.Array
     _acc_b: xp.Array
@@ -180,12 +260,14 @@ class AccVR(Composer):
         /,
         *,
         sampling_method: xpe.SamplingMethod = "linear",
+        precision: xpe.Precision = "float64",
     ) -> None:
         self._sampling_method = sampling_method
-        self._acc_r = xp.zeros(shape, dtype=xp.float64)
-        self._acc_g = xp.zeros(shape, dtype=xp.float64)
-        self._acc_b = xp.zeros(shape, dtype=xp.float64)
-        self._acc_alpha = xp.zeros(shape, dtype=xp.float64)
+        self._dtype = xpe.get_dtype(precision)
+        self._acc_r = xp.zeros(shape, dtype=self._dtype)
+        self._acc_g = xp.zeros(shape, dtype=self._dtype)
+        self._acc_b = xp.zeros(shape, dtype=self._dtype)
+        self._acc_alpha = xp.zeros(shape, dtype=self._dtype)
         self._transfer_function = transfer_function
 
     def add(
@@ -200,6 +282,22 @@ class AccVR(Composer):
         if image.ndim != 2:
             raise ValueError("image must be 2d")
 
+        if mask is None:
+            classified = self._transfer_function(image)
+        else:
+            # classify only masked pixels, which are often a small part of image
+            classified = self._transfer_function(image[mask])
+        self._composite(classified, thickness, mask=mask, slice=slice)
+
+    def _composite(
+        self,
+        classified: Result,
+        thickness: float,
+        /,
+        *,
+        mask: xp.Array | None,
+        slice: Slice2d | None,
+    ) -> None:
         acc_r_region = self._acc_r if slice is None else self._acc_r[slice.j, slice.i]
         acc_g_region = self._acc_g if slice is None else self._acc_g[slice.j, slice.i]
         acc_b_region = self._acc_b if slice is None else self._acc_b[slice.j, slice.i]
@@ -207,20 +305,171 @@ class AccVR(Composer):
             self._acc_alpha if slice is None else self._acc_alpha[slice.j, slice.i]
         )
 
-        ret = self._transfer_function(image)
-        roi_alpha = 1.0 - xp.exp(-ret.opacity * thickness)
+        roi_alpha = 1.0 - xp.exp(-classified.opacity * thickness)
         if mask is not None:
-            cur_alpha = (1.0 - acc_alpha_region[mask]) * roi_alpha[mask]
-            acc_r_region[mask] += cur_alpha * ret.r[mask]
-            acc_g_region[mask] += cur_alpha * ret.g[mask]
-            acc_b_region[mask] += cur_alpha * ret.b[mask]
+            cur_alpha = (1.0 - acc_alpha_region[mask]) * roi_alpha
+            acc_r_region[mask] += cur_alpha * classified.r
+            acc_g_region[mask] += cur_alpha * classified.g
+            acc_b_region[mask] += cur_alpha * classified.b
             acc_alpha_region[mask] += cur_alpha
         else:
             cur_alpha = (1.0 - acc_alpha_region) * roi_alpha
-            acc_r_region += cur_alpha * ret.r
-            acc_g_region += cur_alpha * ret.g
-            acc_b_region += cur_alpha * ret.b
+            acc_r_region += cur_alpha * classified.r
+            acc_g_region += cur_alpha * classified.g
+            acc_b_region += cur_alpha * classified.b
             acc_alpha_region += cur_alpha
 
     def compose(self) -> Image:
         return ColorImage(r=self._acc_r, g=self._acc_g, b=self._acc_b)
+
+    def merge(self, back: Composer, /) -> None:
+        if not isinstance(back, AccVR):
+            raise TypeError(f"Cannot merge {type(back).__name__} into AccVR")
+        # colors are premultiplied by alpha, so back is simply composited under
+        transparency = 1.0 - self._acc_alpha
+        self._acc_r += transparency * back._acc_r
+        self._acc_g += transparency * back._acc_g
+        self._acc_b += transparency * back._acc_b
+        self._acc_alpha += transparency * back._acc_alpha
+
+    def saturated(
+        self, threshold: float, /, *, slice: Slice2d | None = None
+    ) -> xp.Array | None:
+        acc_alpha_region = (
+            self._acc_alpha if slice is None else self._acc_alpha[slice.j, slice.i]
+        )
+        return threshold <= acc_alpha_region
+
+
+class AccPreIntegratedVR(AccVR):
+    """AccPreIntegratedVR composites segments between consecutive samples of pixels.
+
+    Segments are classified by the pre-integrated table, so that thin features
+    between samples are not missed by large steps. The first sample of a pixel and
+    a sample following a masked one only start a new segment. The first samples
+    are kept to composite segments across depth slabs on merge.
+    """
+
+    _table: TransferFunctionTable
+    _previous: xp.Array
+    _stamp: xp.Array
+    _count: int
+    _leading: tuple[xp.Array, float, xp.Array, Slice2d | None] | None
+
+    def __init__(
+        self,
+        shape: tuple[int, int],
+        table: TransferFunctionTable,
+        /,
+        *,
+        sampling_method: xpe.SamplingMethod = "linear",
+        precision: xpe.Precision = "float64",
+    ) -> None:
+        super().__init__(
+            shape, table, sampling_method=sampling_method, precision=precision
+        )
+        self._table = table
+        self._previous = xp.zeros(shape, dtype=self._dtype)
+        self._stamp = -2 * xp.ones(shape, dtype=xp.int64)
+        self._count = 0
+        self._leading = None
+
+    def add(
+        self,
+        image: xp.Array,
+        thickness: float,
+        /,
+        *,
+        mask: xp.Array | None = None,
+        slice: Slice2d | None = None,
+    ) -> None:
+        if image.ndim != 2:
+            raise ValueError("image must be 2d")
+
+        previous_region = (
+            self._previous if slice is None else self._previous[slice.j, slice.i]
+        )
+        if mask is None:
+            mask = xp.ones(image.shape, dtype=xp.bool)
+        if self._count == 0:
+            self._leading = (image, thickness, mask, slice)
+
+        self._composite_segments(previous_region, image, thickness, mask, slice)
+        stamp_region = self._stamp if slice is None else self._stamp[slice.j, slice.i]
+        previous_region[mask] = xp.astype(image[mask], self._dtype)
+        stamp_region[mask] = self._count
+        self._count += 1
+
+    def _composite_segments(
+        self,
+        previous_region: xp.Array,
+        image: xp.Array,
+        thickness: float,
+        mask: xp.Array,
+        slice: Slice2d | None,
+    ) -> None:
+        stamp_region = self._stamp if slice is None else self._stamp[slice.j, slice.i]
+        segment_mask = mask & (stamp_region == self._count - 1)
+        if xp.any(segment_mask):
+            classified = self._table.pre_integrate(
+                previous_region[segment_mask],
+                xp.astype(image[segment_mask], self._dtype),
+            )
+            self._composite(classified, thickness, mask=segment_mask, slice=slice)
+
+    def merge(self, back: Composer, /) -> None:
+        if not isinstance(back, AccPreIntegratedVR):
+            raise TypeError(
+                f"Cannot merge {type(back).__name__} into AccPreIntegratedVR"
+            )
+
+        # segments from the last samples of this to the first samples of back
+        if back._leading is not None:
+            image, thickness, mask, slice = back._leading
+            previous_region = (
+                self._previous if slice is None else self._previous[slice.j, slice.i]
+            )
+            self._composite_segments(previous_region, image, thickness, mask, slice)
+        super().merge(back)
+
+        sampled = 0 <= back._stamp
+        self._previous[sampled] = back._previous[sampled]
+        self._stamp[sampled] = back._stamp[sampled] + self._count
+        if self._leading is None:
+            self._leading = back._leading
+        self._count += back._count
+
+
+def composite_in_slabs(
+    indices: Sequence[int],
+    workers: int,
+    accumulator_constructor: Callable[[], Composer],
+    composite: Callable[[Composer, Sequence[int]], None],
+) -> Composer:
+    """Composite slices of indices, which are in depth order, by composite.
+
+    Indices are split into up to workers contiguous depth slabs, which are composited
+    into their own composers on a thread pool and merged from front to back.
+    """
+    slabs = max(1, min(workers, len(indices)))
+    bounds = [len(indices) * n // slabs for n in range(slabs + 1)]
+
+    def _composite_slab(slab: Sequence[int]) -> Composer:
+        accumulator = accumulator_constructor()
+        composite(accumulator, slab)
+        return accumulator
+
+    if slabs == 1:
+        return _composite_slab(indices)
+
+    with ThreadPoolExecutor(max_workers=slabs) as executor:
+        partials = list(
+            executor.map(
+                _composite_slab,
+                [indices[begin:end] for begin, end in zip(bounds, bounds[1:])],
+            )
+        )
+    merged = partials[0]
+    for partial in partials[1:]:
+        merged.merge(partial)
+    return merged
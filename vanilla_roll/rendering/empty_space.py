@@ -0,0 +1,206 @@
+import math
+from dataclasses import dataclass
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.macrocell import MacrocellHierarchy, Macrocells
+from vanilla_roll.rendering.composition import Slice2d
+from vanilla_roll.rendering.transfer_function import (
+    TransferFunction,
+    TransferFunctionTable,
+)
+from vanilla_roll.volume import Volume
+
+
+def _find_positive_runs(positive: xp.Array) -> list[tuple[int, int]]:
+    """Find first and last indices of each run of True."""
+    boundary = xp.zeros(1, dtype=xp.bool)
+    previous = xp.concat([boundary, positive[:-1]])
+    following = xp.concat([positive[1:], boundary])
+    (begins,) = xp.nonzero(xp.logical_and(positive, xp.logical_not(previous)))
+    (ends,) = xp.nonzero(xp.logical_and(positive, xp.logical_not(following)))
+    return [(int(begins[n]), int(ends[n])) for n in range(begins.shape[0])]
+
+
+def _find_visible_intervals(
+    transfer_function: TransferFunction,
+) -> list[tuple[float, float]] | None:
+    """Find intervals of intensities of non-zero opacity from bins of the table.
+
+    Returns None for transfer functions other than tables, whose opacity may
+    spike anywhere, so that no intensity is known to be transparent.
+    """
+    if not isinstance(transfer_function, TransferFunctionTable):
+        return None
+
+    runs = _find_positive_runs(0.0 < transfer_function.opacity)
+    if transfer_function.step == 0.0:
+        # every intensity is looked up by the first entry
+        return [(-float("inf"), float("inf"))] if runs and runs[0][0] == 0 else []
+
+    lo = transfer_function.intensity_range[0]
+    half_step = transfer_function.step / 2.0
+    return [
+        (
+            lo + beg * transfer_function.step - half_step,
+            lo + end * transfer_function.step + half_step,
+        )
+        for beg, end in runs
+    ]
+
+
+def find_visible_bricks(
+    macrocells: Macrocells,
+    transfer_function: TransferFunction,
+    candidates: xp.Array | None = None,
+) -> xp.Array:
+    """Find bricks which have any intensity of non-zero opacity.
+
+    Bricks not found are fully transparent, so that they can be skipped. If
+    candidates is given, only bricks of its mask are tested and others are not
+    found.
+    """
+    intervals = _find_visible_intervals(transfer_function)
+    if intervals is None:
+        return (
+            xp.ones(macrocells.shape, dtype=xp.bool)
+            if candidates is None
+            else candidates
+        )
+
+    if candidates is None:
+        indices = xp.arange(math.prod(macrocells.shape))
+    else:
+        (indices,) = xp.nonzero(xp.reshape(candidates, (-1,)))
+    brick_min = xpe.take(
+        xp.astype(xp.reshape(macrocells.min, (-1,)), xp.float64), indices=indices
+    )
+    brick_max = xpe.take(
+        xp.astype(xp.reshape(macrocells.max, (-1,)), xp.float64), indices=indices
+    )
+
+    tested = xp.zeros(indices.shape, dtype=xp.bool)
+    for beg, end in intervals:
+        tested = tested | ((brick_min <= end) & (beg <= brick_max))
+
+    visible = xp.zeros(math.prod(macrocells.shape), dtype=xp.bool)
+    xpe.put(visible, indices=indices, values=tested)
+    return xp.reshape(visible, macrocells.shape)
+
+
+def _refine(coarse: xp.Array, shape: tuple[int, int, int]) -> xp.Array:
+    # each coarse brick covers two bricks along each axis
+    ks, js, iss = (xp.arange(n) // 2 for n in shape)
+    indices = (
+        xp.reshape(ks, (-1, 1, 1)) * coarse.shape[1] + xp.reshape(js, (1, -1, 1))
+    ) * coarse.shape[2] + xp.reshape(iss, (1, 1, -1))
+    mask = xpe.take(xp.reshape(coarse, (-1,)), indices=xp.reshape(indices, (-1,)))
+    return xp.reshape(mask, shape)
+
+
+def find_visible_levels(
+    hierarchy: MacrocellHierarchy, transfer_function: TransferFunction
+) -> tuple[xp.Array, ...]:
+    """Find visible bricks of each level of hierarchy from the coarsest level.
+
+    Bricks are tested only if the brick of the coarser level covering them is
+    visible, since bricks of transparent coarse bricks are transparent as well.
+    """
+    visible = [find_visible_bricks(hierarchy.levels[-1], transfer_function)]
+    for macrocells in reversed(hierarchy.levels[:-1]):
+        candidates = _refine(visible[-1], macrocells.shape)
+        if not xp.any(candidates):
+            visible.append(candidates)
+            continue
+        visible.append(find_visible_bricks(macrocells, transfer_function, candidates))
+    return tuple(reversed(visible))
+
+
+@dataclass(frozen=True)
+class Occupancy:
+    """Occupancy holds visible bricks of each level of a macrocell hierarchy.
+
+    Level n has bricks of brick_size * 2 ** n voxels, and bricks of transparent
+    coarse bricks are transparent as well.
+    """
+
+    levels: tuple[xp.Array, ...]
+    brick_size: int
+
+    @property
+    def visible(self) -> xp.Array:
+        return self.levels[0]
+
+    def permute(self, order: tuple[int, int, int]) -> "Occupancy":
+        return Occupancy(
+            levels=tuple(xp.permute_dims(v, order) for v in self.levels),
+            brick_size=self.brick_size,
+        )
+
+    def contains(self, coords: xp.Array) -> xp.Array:
+        """Test whether the bricks containing given Nx3 coordinates are visible."""
+        bricks = xp.astype(xp.floor(coords / self.brick_size), xp.int64)
+        bricks = xpe.clip(
+            bricks,
+            a_min=xp.zeros(3, dtype=xp.int64),
+            a_max=xp.asarray(self.visible.shape, dtype=xp.int64) - 1,
+        )
+        indices = xpe.ravel_index(bricks.T, self.visible.shape)
+        return xpe.take(self.visible, indices=indices)
+
+    def _find_layer(
+        self, level: int, index: int, rows: tuple[int, int], columns: tuple[int, int]
+    ) -> xp.Array:
+        visible = self.levels[level]
+        k = min(index // (self.brick_size * 2**level), visible.shape[0] - 1)
+        return visible[k, rows[0] : rows[1], columns[0] : columns[1]]
+
+    def find_slice_region(
+        self, index: int, shape: tuple[int, int]
+    ) -> tuple[Slice2d, xp.Array] | None:
+        """Find the bounding region of visible bricks on the index-th slice.
+
+        The region is narrowed from the coarsest level, so that only bricks of
+        visible coarse bricks are searched. Returns None if the slice has no
+        visible brick. Otherwise returns the region and the mask of visible
+        voxels in it.
+        """
+        top = self.levels[-1]
+        rows, columns = (0, top.shape[1]), (0, top.shape[2])
+        for level in reversed(range(len(self.levels))):
+            if level < len(self.levels) - 1:
+                visible = self.levels[level]
+                rows = (2 * rows[0], min(2 * rows[1], visible.shape[1]))
+                columns = (2 * columns[0], min(2 * columns[1], visible.shape[2]))
+            layer = self._find_layer(level, index, rows, columns)
+            (found_rows,) = xp.nonzero(xp.any(layer, axis=1))
+            if found_rows.shape[0] == 0:
+                return None
+            (found_columns,) = xp.nonzero(xp.any(layer, axis=0))
+            rows = (rows[0] + int(found_rows[0]), rows[0] + int(found_rows[-1]) + 1)
+            columns = (
+                columns[0] + int(found_columns[0]),
+                columns[0] + int(found_columns[-1]) + 1,
+            )
+
+        b = self.brick_size
+        (r0, r1), (c0, c1) = rows, columns
+        region = Slice2d(
+            j=slice(r0 * b, min(r1 * b, shape[0])),
+            i=slice(c0 * b, min(c1 * b, shape[1])),
+        )
+
+        jss = xp.arange(region.j.start, region.j.stop) // b - r0
+        iss = xp.arange(region.i.start, region.i.stop) // b - c0
+        indices = xp.reshape(jss, (-1, 1)) * (c1 - c0) + xp.reshape(iss, (1, -1))
+        layer = self._find_layer(0, index, rows, columns)
+        mask = xpe.take(layer, indices=xp.reshape(indices, (-1,)))
+        return region, xp.reshape(mask, indices.shape)
+
+
+def create_occupancy(volume: Volume, transfer_function: TransferFunction) -> Occupancy:
+    hierarchy = volume.macrocells
+    return Occupancy(
+        levels=find_visible_levels(hierarchy, transfer_function),
+        brick_size=hierarchy.brick_size,
+    )
@@ -11,16 +11,54 @@ def affine_image(
     /,
     *,
     method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
 ) -> Image:
     match image:
         case MonoImage(l):
             return MonoImage(
-                l=xpi.affine_transform(l, mat, output_shape, method=method)
+                l=xpi.affine_transform(
+                    l, mat, output_shape, method=method, precision=precision
+                )
             )
         case ColorImage(r, g, b):
-            r = xpi.affine_transform(r, mat, output_shape, method=method)
-            g = xpi.affine_transform(g, mat, output_shape, method=method)
-            b = xpi.affine_transform(b, mat, output_shape, method=method)
+            r = xpi.affine_transform(
+                r, mat, output_shape, method=method, precision=precision
+            )
+            g = xpi.affine_transform(
+                g, mat, output_shape, method=method, precision=precision
+            )
+            b = xpi.affine_transform(
+                b, mat, output_shape, method=method, precision=precision
+            )
+            return ColorImage(r=r, g=g, b=b)
+
+
+def projective_image(
+    image: Image,
+    mat: xp.Array,
+    output_shape: tuple[int, int],
+    /,
+    *,
+    method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
+) -> Image:
+    match image:
+        case MonoImage(l):
+            return MonoImage(
+                l=xpi.projective_transform(
+                    l, mat, output_shape, method=method, precision=precision
+                )
+            )
+        case ColorImage(r, g, b):
+            r = xpi.projective_transform(
+                r, mat, output_shape, method=method, precision=precision
+            )
+            g = xpi.projective_transform(
+                g, mat, output_shape, method=method, precision=precision
+            )
+            b = xpi.projective_transform(
+                b, mat, output_shape, method=method, precision=precision
+            )
             return ColorImage(r=r, g=g, b=b)
 
 
@@ -30,12 +68,15 @@ def resize_image(
     /,
     *,
     method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float64",
 ) -> Image:
     match image:
         case MonoImage(l):
-            return MonoImage(l=xpi.resize(l, output_shape, method=method))
+            return MonoImage(
+                l=xpi.resize(l, output_shape, method=method, precision=precision)
+            )
         case ColorImage(r, g, b):
-            r = xpi.resize(r, output_shape, method=method)
-            g = xpi.resize(g, output_shape, method=method)
-            b = xpi.resize(b, output_shape, method=method)
+            r = xpi.resize(r, output_shape, method=method, precision=precision)
+            g = xpi.resize(g, output_shape, method=method, precision=precision)
+            b = xpi.resize(b, output_shape, method=method, precision=precision)
             return ColorImage(r=r, g=g, b=b)
@@ -1,6 +1,9 @@
 from dataclasses import dataclass
 
-from vanilla_roll.rendering.transfer_function import TransferFunction
+from vanilla_roll.rendering.transfer_function import (
+    TransferFunction,
+    TransferFunctionTable,
+)
 
 
 @dataclass(frozen=True)
@@ -15,12 +18,32 @@ class MinP:
 
 @dataclass(frozen=True)
 class Average:
-    pass
+    """Average is the mean of samples over the steps through the volume.
+
+    Steps clipped by the view volume are counted as well, so that all algorithms
+    normalize by the same count.
+    """
 
 
 @dataclass(frozen=True)
 class VR:
+    """VR is volume rendering classified by the transfer function.
+
+    If pre_integrated is True, segments between samples are classified by the
+    pre-integrated table of the transfer function, which must be a lookup table.
+    """
+
     transfer_function: TransferFunction
+    pre_integrated: bool = False
+
+    def __post_init__(self) -> None:
+        if self.pre_integrated and not isinstance(
+            self.transfer_function, TransferFunctionTable
+        ):
+            raise ValueError(
+                "Pre-integration requires TransferFunctionTable. "
+                f"Got {type(self.transfer_function)}"
+            )
 
 
 Mode = MIP | MinP | Average | VR
@@ -0,0 +1,187 @@
+import math
+from typing import Callable
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+import vanilla_roll.chunked as chunked
+from vanilla_roll.camera import Camera
+from vanilla_roll.geometry.conversion import Transformation
+from vanilla_roll.geometry.element import Vector, as_array, world_frame
+from vanilla_roll.geometry.linalg import normalize_vector
+from vanilla_roll.rendering.composition import Composer
+from vanilla_roll.rendering.empty_space import Occupancy, create_occupancy
+from vanilla_roll.rendering.ray import calc_step_range
+from vanilla_roll.rendering.transfer_function import TransferFunction
+from vanilla_roll.rendering.types import Renderer, RenderingResult
+from vanilla_roll.volume import Volume
+
+
+def _calc_ray_origins(
+    transform: Transformation, camera: Camera, shape: tuple[int, int]
+) -> xp.Array:
+    rows, columns = shape
+    row_direction = as_array(normalize_vector(camera.screen_orientation.i))
+    row_space = xp.linspace(
+        -(camera.view_volume.width / 2.0), camera.view_volume.width / 2.0, columns
+    )
+    column_direction = as_array(normalize_vector(camera.screen_orientation.j))
+    column_space = xp.linspace(
+        -(camera.view_volume.height / 2.0), camera.view_volume.height / 2.0, rows
+    )
+
+    origins = (
+        as_array(camera.screen_center)
+        + xp.reshape(row_space, (1, -1, 1)) * xp.reshape(row_direction, (1, 1, 3))
+        + xp.reshape(column_space, (-1, 1, 1)) * xp.reshape(column_direction, (1, 1, 3))
+    )
+    return transform(xp.reshape(origins, (-1, 3)).T).T
+
+
+def _calc_ray_step(transform: Transformation, camera: Camera, step: float) -> xp.Array:
+    begin = as_array(camera.screen_center)
+    end = begin + step * as_array(normalize_vector(camera.forward))
+    points = transform(xp.astype(xp.stack([begin, end], axis=1), xp.float64))
+    return points[:, 1] - points[:, 0]
+
+
+def _create_mask(coords: xp.Array, /, shape: tuple[int, int, int]) -> xp.Array:
+    return xp.all(
+        xp.logical_and(
+            xp.zeros(3, dtype=coords.dtype) <= coords,
+            coords < xp.asarray(shape, dtype=coords.dtype),
+        ),
+        axis=-1,
+    )
+
+
+def _calc_steps(camera: Camera, step: float) -> int:
+    return max(
+        1, int(math.floor((camera.view_volume.far - camera.view_volume.near) / step))
+    )
+
+
+def _march_rays(
+    volume: Volume,
+    origins: xp.Array,
+    ray_step: xp.Array,
+    march_range: tuple[int, int],
+    accumulator: Composer,
+    image_shape: tuple[int, int],
+    thickness: float,
+    termination_threshold: float,
+    sampling_method: xpe.SamplingMethod,
+    occupancy: Occupancy | None,
+    precision: xpe.Precision = "float64",
+) -> None:
+    rays = origins.shape[0]
+    ray_indices = xp.arange(rays)
+    for d in range(*march_range):
+        coords = origins + float(d) * ray_step
+        inside = _create_mask(coords, shape=volume.data.shape)
+        if occupancy is not None:
+            inside = inside & occupancy.contains(coords)
+        if not xp.any(inside):
+            accumulator.skip(thickness)
+            continue
+
+        hit_indices = ray_indices[inside]
+        samples = xp.zeros(rays, dtype=xpe.get_dtype(precision))
+        if hit_indices.shape[0] == rays:
+            # steps of all rays in the volume are sampled into samples without a copy
+            chunked.sample(
+                volume.data,
+                coordinates=coords,
+                method=sampling_method,
+                out=samples,
+                precision=precision,
+            )
+        else:
+            xpe.put(
+                samples,
+                indices=hit_indices,
+                values=chunked.sample(
+                    volume.data,
+                    coordinates=coords[inside],
+                    method=sampling_method,
+                    precision=precision,
+                ),
+            )
+        mask = xp.zeros(rays, dtype=xp.bool)
+        xpe.put(
+            mask, indices=hit_indices, values=xp.ones_like(hit_indices, dtype=xp.bool)
+        )
+        accumulator.add(
+            xp.reshape(samples, image_shape),
+            thickness,
+            mask=xp.reshape(mask, image_shape),
+        )
+
+        saturated = accumulator.saturated(termination_threshold)
+        if saturated is None:
+            continue
+
+        alive = xp.logical_not(xpe.take(saturated, indices=ray_indices))
+        if not xp.any(alive):
+            break
+        if not xp.all(alive):
+            ray_indices = ray_indices[alive]
+            origins = origins[alive]
+
+
+def create_renderer(
+    volume: Volume,
+    /,
+    step: float,
+    termination_threshold: float,
+    accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    sampling_method: xpe.SamplingMethod,
+    transfer_function: TransferFunction | None = None,
+    precision: xpe.Precision = "float64",
+) -> Renderer:
+    occupancy = (
+        None
+        if transfer_function is None
+        else create_occupancy(volume, transfer_function)
+    )
+    transform = Transformation(src=world_frame, dst=volume.frame)
+
+    def _render(camera: Camera, spacing: float | None = None) -> RenderingResult:
+        if spacing is None:
+            spacing = step
+
+        shape = (
+            int(camera.view_volume.height / spacing),
+            int(camera.view_volume.width / spacing),
+        )
+
+        origins = _calc_ray_origins(transform, camera, shape)
+        ray_step = _calc_ray_step(transform, camera, step)
+        begin, end = calc_step_range(origins, ray_step, volume.data.shape)
+        march_range = (max(0, begin), min(_calc_steps(camera, step), end))
+
+        accumulator = accumulator_constructor(shape)
+        # steps through the volume clipped by the view volume are still counted
+        for _ in range((end - begin) - max(0, march_range[1] - march_range[0])):
+            accumulator.skip(step)
+        _march_rays(
+            volume,
+            origins,
+            ray_step,
+            march_range,
+            accumulator,
+            shape,
+            step,
+            termination_threshold,
+            sampling_method,
+            occupancy,
+            precision,
+        )
+
+        return RenderingResult(
+            image=accumulator.compose(),
+            spacing=Vector(i=spacing, j=spacing, k=step),
+            origin=camera.screen_origin,
+            orientation=camera.screen_orientation,
+        )
+
+    return _render
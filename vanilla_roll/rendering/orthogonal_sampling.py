@@ -3,15 +3,31 @@ from typing import Callable
 
 import vanilla_roll.array_api as xp
 import vanilla_roll.array_api_extra as xpe
+import vanilla_roll.chunked as chunked
 from vanilla_roll.camera import Camera
 from vanilla_roll.geometry.conversion import Transformation
 from vanilla_roll.geometry.element import Vector, as_array, world_frame
 from vanilla_roll.geometry.linalg import normalize_vector
+from vanilla_roll.rendering.algorithm import DEFAULT_MAX_SLAB_BYTES
 from vanilla_roll.rendering.composition import Composer
+from vanilla_roll.rendering.empty_space import Occupancy, create_occupancy
 from vanilla_roll.rendering.image_proc import resize_image
+from vanilla_roll.rendering.ray import calc_step_range
+from vanilla_roll.rendering.transfer_function import TransferFunction
 from vanilla_roll.rendering.types import Image, Renderer, RenderingResult
 from vanilla_roll.volume import Volume
 
+# Peak bytes allocated for each sample point of a slab, which linear sampling of
+# data other than float64 reaches:
+# - coordinates and the copy of those in the volume, 2 x 3 float64
+# - the mask and the sample, 1 + 8
+# - integer and fractional origins in sample_linear, 2 x 3 x 8
+# - indices, weights and converted values of 2 ** 3 corners, 3 x 2 ** 3 x 8,
+#   and values gathered before conversion, up to 2 ** 3 x 8
+# - indices and weights of 2 ** 2 corners while building those of 2 ** 3,
+#   2 x 2 ** 2 x 8
+_BYTES_PER_SAMPLE = 2 * 3 * 8 + 1 + 8 + 2 * 3 * 8 + 4 * 2**3 * 8 + 2 * 2**2 * 8
+
 
 def _direciton_aligned_linspace(
     direction: xp.Array,
@@ -23,12 +39,15 @@ def _direciton_aligned_linspace(
     return xp.reshape(direction, (-1, 1)) * xp.linspace(start, end, samples)
 
 
-def _calc_orthogonal_view_volume_coordinates(
+def _calc_screen_coordinates(
     transform: Transformation, camera: Camera, step: float
-) -> tuple[xp.Array, tuple[int, int, int]]:
+) -> tuple[xp.Array, xp.Array, tuple[int, int]]:
+    """Calculate coordinates of the screen at depth 0 and the depth direction.
+
+    Both are in the volume coordinates.
+    """
     columns = int(camera.view_volume.width / step)
     rows = int(camera.view_volume.height / step)
-    depth = _calc_layers(camera, step)
 
     row_direction = normalize_vector(camera.screen_orientation.i)
     row_space = _direciton_aligned_linspace(
@@ -46,22 +65,19 @@ def _calc_orthogonal_view_volume_coordinates(
         samples=rows,
     )
 
-    depth_direction = normalize_vector(camera.screen_orientation.k)
-    depth_space = _direciton_aligned_linspace(
-        as_array(depth_direction),
-        start=camera.view_volume.near,
-        end=camera.view_volume.far,
-        samples=depth,
-    )
-
+    origin = as_array(camera.frame.origin)
     coords = (
-        as_array(camera.frame.origin)
-        + xp.reshape(row_space.T, (1, 1, -1, 3))
-        + xp.reshape(column_space.T, (1, -1, 1, 3))
-        + xp.reshape(depth_space.T, (-1, 1, 1, 3))
+        origin
+        + xp.reshape(row_space.T, (1, -1, 3))
+        + xp.reshape(column_space.T, (-1, 1, 3))
     )
     coords = transform(xp.reshape(coords, (-1, 3)).T).T
-    return coords, (depth, rows, columns)
+
+    depth_direction = as_array(normalize_vector(camera.screen_orientation.k))
+    ends = transform(
+        xp.astype(xp.stack([origin, origin + depth_direction]), xp.float64).T
+    )
+    return coords, ends[:, 1] - ends[:, 0], (rows, columns)
 
 
 def _create_mask(coords: xp.Array, /, shape: tuple[int, int, int]) -> xp.Array:
@@ -77,19 +93,32 @@ def _create_mask(coords: xp.Array, /, shape: tuple[int, int, int]) -> xp.Array:
 def _extract_orthogonal_view_volume(
     volume: Volume,
     /,
-    camera: Camera,
-    step: float,
+    coords: xp.Array,
     sampling_method: xpe.SamplingMethod,
-) -> xp.Array:
-    transform = Transformation(src=world_frame, dst=volume.frame)
-    coords, shape = _calc_orthogonal_view_volume_coordinates(transform, camera, step)
-
+    occupancy: Occupancy | None,
+    precision: xpe.Precision = "float64",
+) -> tuple[xp.Array, xp.Array | None]:
     mask = _create_mask(coords, shape=volume.data.shape)
-    samples = xp.zeros(math.prod(mask.shape))
-    samples[mask] = xpe.sample(
-        volume.data, coordinates=coords[mask], method=sampling_method
-    )
-    return xp.reshape(samples, shape)
+    if occupancy is not None:
+        mask = mask & occupancy.contains(coords)
+    samples = xp.zeros(coords.shape[0], dtype=xpe.get_dtype(precision))
+    if xp.all(mask):
+        # slabs in the volume are sampled into samples without a copy
+        chunked.sample(
+            volume.data,
+            coordinates=coords,
+            method=sampling_method,
+            out=samples,
+            precision=precision,
+        )
+    else:
+        samples[mask] = chunked.sample(
+            volume.data,
+            coordinates=coords[mask],
+            method=sampling_method,
+            precision=precision,
+        )
+    return samples, None if occupancy is None else mask
 
 
 def _calc_layers(camera: Camera, step: float) -> int:
@@ -98,15 +127,83 @@ def _calc_layers(camera: Camera, step: float) -> int:
     )
 
 
+def _calc_slab_layers(shape: tuple[int, int], max_slab_bytes: int) -> int:
+    layer_bytes = shape[0] * shape[1] * _BYTES_PER_SAMPLE
+    return max(1, max_slab_bytes // max(1, layer_bytes))
+
+
 def _compose_view_volume_voxels(
     view_volume_voxels: xp.Array,
-    accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    view_volume_mask: xp.Array | None,
+    accumulator: Composer,
     spacing: float,
-) -> Image:
-    layers, rows, columns = view_volume_voxels.shape
-    accumulator = accumulator_constructor((rows, columns))
+) -> None:
+    layers = view_volume_voxels.shape[0]
     for k in range(layers):
-        accumulator.add(view_volume_voxels[k, :, :], spacing)
+        if view_volume_mask is None:
+            accumulator.add(view_volume_voxels[k, :, :], spacing)
+            continue
+
+        mask = view_volume_mask[k, :, :]
+        if xp.any(mask):
+            accumulator.add(view_volume_voxels[k, :, :], spacing, mask=mask)
+        else:
+            accumulator.skip(spacing)
+
+
+def _render_view_volume(
+    volume: Volume,
+    /,
+    camera: Camera,
+    step: float,
+    max_slab_bytes: int,
+    accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    sampling_method: xpe.SamplingMethod,
+    occupancy: Occupancy | None,
+    precision: xpe.Precision = "float64",
+) -> Image:
+    transform = Transformation(src=world_frame, dst=volume.frame)
+    screen_coords, depth_direction, shape = _calc_screen_coordinates(
+        transform, camera, step
+    )
+    layers = _calc_layers(camera, step)
+    depths = xp.linspace(
+        camera.view_volume.near, camera.view_volume.far, layers, dtype=xp.float64
+    )
+
+    # only layers through the volume are sampled, while those clipped by the view
+    # volume are still counted
+    layer_step = float(depths[1] - depths[0]) if 1 < layers else step
+    first, last = calc_step_range(
+        screen_coords + camera.view_volume.near * depth_direction,
+        layer_step * depth_direction,
+        volume.data.shape,
+    )
+    sampled = range(max(0, first), min(layers, last))
+
+    accumulator = accumulator_constructor(shape)
+    for _ in range((last - first) - len(sampled)):
+        accumulator.skip(step)
+    slab_layers = _calc_slab_layers(shape, max_slab_bytes)
+    for begin in range(sampled.start, sampled.stop, slab_layers):
+        slab_depths = depths[begin : min(sampled.stop, begin + slab_layers)]
+        coords = xp.reshape(screen_coords, (1, -1, 3)) + xp.reshape(
+            slab_depths, (-1, 1, 1)
+        ) * xp.reshape(depth_direction, (1, 1, 3))
+        samples, mask = _extract_orthogonal_view_volume(
+            volume,
+            coords=xp.reshape(coords, (-1, 3)),
+            sampling_method=sampling_method,
+            occupancy=occupancy,
+            precision=precision,
+        )
+        slab_shape = (slab_depths.shape[0], *shape)
+        _compose_view_volume_voxels(
+            xp.reshape(samples, slab_shape),
+            None if mask is None else xp.reshape(mask, slab_shape),
+            accumulator,
+            step,
+        )
     return accumulator.compose()
 
 
@@ -116,7 +213,16 @@ def create_renderer(
     step: float,
     accumulator_constructor: Callable[[tuple[int, int]], Composer],
     sampling_method: xpe.SamplingMethod,
+    max_slab_bytes: int = DEFAULT_MAX_SLAB_BYTES,
+    transfer_function: TransferFunction | None = None,
+    precision: xpe.Precision = "float64",
 ) -> Renderer:
+    occupancy = (
+        None
+        if transfer_function is None
+        else create_occupancy(volume, transfer_function)
+    )
+
     def _render(camera: Camera, spacing: float | None = None) -> RenderingResult:
         if spacing is None:
             spacing = step
@@ -126,19 +232,21 @@ def create_renderer(
             int(camera.view_volume.width / spacing),
         )
 
-        view_volume_voxels = _extract_orthogonal_view_volume(
+        composed_image = _render_view_volume(
             volume,
             camera=camera,
             step=step,
+            max_slab_bytes=max_slab_bytes,
+            accumulator_constructor=accumulator_constructor,
             sampling_method=sampling_method,
-        )
-
-        composed_image = _compose_view_volume_voxels(
-            view_volume_voxels, accumulator_constructor, step
+            occupancy=occupancy,
+            precision=precision,
         )
 
         return RenderingResult(
-            image=resize_image(composed_image, shape, method=sampling_method),
+            image=resize_image(
+                composed_image, shape, method=sampling_method, precision=precision
+            ),
             spacing=Vector(i=spacing, j=spacing, k=step),
             origin=camera.screen_origin,
             orientation=camera.screen_orientation,
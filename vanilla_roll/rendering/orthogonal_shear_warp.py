@@ -1,107 +1,47 @@
 import math
-from typing import Callable, Generic, Protocol, TypeVar
+from dataclasses import dataclass, replace
+from typing import Callable, Sequence
 
 import vanilla_roll.array_api as xp
 import vanilla_roll.array_api_extra as xpe
-from vanilla_roll.anatomy_orientation import create as create_anatomy_orientation
 from vanilla_roll.camera import Camera
+from vanilla_roll.chunked import ChunkedArray
 from vanilla_roll.geometry.conversion import (
+    Affine,
     Composition,
     Conversion,
-    Permutation,
     Transformation,
 )
-from vanilla_roll.geometry.element import (
-    Frame,
-    Orientation,
-    Vector,
-    as_array,
-    world_frame,
-)
+from vanilla_roll.geometry.element import Frame, Vector, world_frame
 from vanilla_roll.geometry.linalg import norm, normalize_vector
-from vanilla_roll.rendering.composition import Composer, Slice2d
+from vanilla_roll.rendering.composition import (
+    Composer,
+    Slice2d,
+    composite_in_slabs,
+)
+from vanilla_roll.rendering.empty_space import Occupancy, create_occupancy
 from vanilla_roll.rendering.image_proc import affine_image
+from vanilla_roll.rendering.run_length import ClassifiedVolume
+from vanilla_roll.rendering.shear_warp import (
+    PermutedCopies,
+    PrincipalAxis,
+    find_slice_region,
+    get_principal_axis,
+)
+from vanilla_roll.rendering.transfer_function import TransferFunction
 from vanilla_roll.rendering.types import Image, Renderer, RenderingResult
 from vanilla_roll.volume import Volume
 
-T = TypeVar("T")
-
-
-class HasIJK(Protocol, Generic[T]):
-    i: T
-    j: T
-    k: T
-
-
-def _permutate_kji(obj: HasIJK[T], order: tuple[int, int, int]) -> tuple[T, T, T]:
-    k, j, i = (
-        [
-            obj.k,
-            obj.j,
-            obj.i,
-        ][i]
-        for i in order
-    )
-    return (k, j, i)
+# Offsets are in voxels. Errors of the float64 affine matrices are around 1e-12
+# voxels for volumes of up to 1e4 voxels per axis, while a true fractional offset
+# within 1e-6 voxels of an integer shifts a slice far less than float32 sampling
+# weights resolve, so that snapping it does not change images.
+_OFFSET_TOLERANCE = 1e-6
 
 
-def _create_transformation(
-    src: Frame, dst: Frame
-) -> tuple[Transformation, Transformation]:
+def _create_transformation(src: Frame, dst: Frame) -> tuple[Affine, Affine]:
     src_to_dst = Transformation(src, dst)
-    dst_to_src = Transformation(dst, src)
-    return src_to_dst, dst_to_src
-
-
-def _find_principal_viewing_axis(viewing_direction: Vector) -> int:
-    return int(xp.argmax(xp.abs(as_array(viewing_direction))))
-
-
-def _create_permutation_from_principal_axis(
-    viewing_direction: Vector,
-) -> tuple[Permutation, Permutation]:
-    principal_axis = _find_principal_viewing_axis(viewing_direction)
-    match principal_axis:
-        case 0:
-            return (
-                Permutation((0, 1, 2)),
-                Permutation((0, 1, 2)),
-            )
-        case 1:
-            return (
-                Permutation((1, 2, 0)),
-                Permutation((2, 0, 1)),
-            )
-        case 2:
-            return (
-                Permutation((2, 0, 1)),
-                Permutation((1, 2, 0)),
-            )
-        case int() as x:
-            raise ValueError(f"Invalid principal axis: {x}")
-
-
-def _permute_volume(target: Volume, order: tuple[int, int, int]) -> Volume:
-    k, j, i = _permutate_kji(target.frame.orientation, order)
-    permutated_frame = Frame(
-        orientation=Orientation(
-            i=i,
-            j=j,
-            k=k,
-        ),
-        origin=target.frame.origin,
-    )
-
-    permutated_anatomy_orientation = target.anatomy_orientation
-    if permutated_anatomy_orientation is not None:
-        k, j, i = _permutate_kji(permutated_anatomy_orientation, order)
-        permutated_anatomy_orientation = create_anatomy_orientation(i=i, j=j, k=k)
-
-    return Volume(
-        data=xp.permute_dims(target.data, order),
-        frame=permutated_frame,
-        anatomy_orientation=permutated_anatomy_orientation,
-    )
+    return src_to_dst, src_to_dst.inverse
 
 
 def _calc_shearing(viewing_direction: Vector) -> Vector:
@@ -116,18 +56,21 @@ def _calc_translation(shearing_distance: Vector, shape: tuple[int, int]) -> Vect
     return Vector(i=ti, j=tj, k=0)
 
 
+def _floor(x: float) -> int:
+    # shearing offsets of axis aligned views are integers up to rounding errors
+    return int(math.floor(x + _OFFSET_TOLERANCE))
+
+
+def _ceil(x: float) -> int:
+    return int(math.ceil(x - _OFFSET_TOLERANCE))
+
+
 def _calc_intermediate_image_shape(
     shearing: Vector, translation: Vector, shape: tuple[int, int, int]
 ) -> tuple[int, int]:
     max_depth = shape[0]
-    width = (
-        int(math.ceil(translation.i) + max(0.0, math.floor(shearing.i * max_depth)))
-        + shape[2]
-    )
-    height = (
-        int(math.ceil(translation.j) + max(0.0, math.floor(shearing.j * max_depth)))
-        + shape[1]
-    )
+    width = _ceil(translation.i) + max(0, _floor(shearing.i * max_depth)) + shape[2]
+    height = _ceil(translation.j) + max(0, _floor(shearing.j * max_depth)) + shape[1]
     return (height, width)
 
 
@@ -142,15 +85,6 @@ def _create_direction_mat_in_world_frame(
     return xp.asarray([[k.k, j.k, i.k], [k.j, j.j, i.j], [k.i, j.i, i.i]])
 
 
-def _mesh_grid_from_origin(
-    origin: Vector, shape: tuple[int, int]
-) -> tuple[xp.Array, xp.Array]:
-    iss, jss = xp.meshgrid(xp.arange(shape[1]), xp.arange(shape[0]), indexing="xy")
-    iss = xp.astype(iss, xp.float32) - origin.i
-    jss = xp.astype(jss, xp.float32) - origin.j
-    return jss, iss
-
-
 def _create_viewv_volume_region(camera: Camera) -> tuple[xp.Array, xp.Array]:
     slab_length = camera.view_volume.far - camera.view_volume.near
     half_width = camera.view_volume.width / 2
@@ -160,12 +94,168 @@ def _create_viewv_volume_region(camera: Camera) -> tuple[xp.Array, xp.Array]:
     return min_point, max_point
 
 
+def _clip_polygon(
+    polygon: list[tuple[float, float]], a: float, b: float, c: float
+) -> list[tuple[float, float]]:
+    """Clip a convex polygon of (j, i) vertices by the half-plane a + b j + c i >= 0."""
+    clipped: list[tuple[float, float]] = []
+    for n, p in enumerate(polygon):
+        q = polygon[(n + 1) % len(polygon)]
+        fp = a + b * p[0] + c * p[1]
+        fq = a + b * q[0] + c * q[1]
+        if 0.0 <= fp:
+            clipped.append(p)
+        if (0.0 <= fp) != (0.0 <= fq):
+            t = fp / (fp - fq)
+            clipped.append((p[0] + t * (q[0] - p[0]), p[1] + t * (q[1] - p[1])))
+    return clipped
+
+
+@dataclass(frozen=True)
+class _ViewClip:
+    """View volume in the permuted volume.
+
+    A voxel (k, j, i) is in the view volume if lo < base + k dk + j dj + i di < hi
+    holds for each of the depth, vertical and horizontal axes of the view.
+    """
+
+    base: tuple[float, float, float]
+    dk: tuple[float, float, float]
+    dj: tuple[float, float, float]
+    di: tuple[float, float, float]
+    lo: tuple[float, float, float]
+    hi: tuple[float, float, float]
+
+    def clip(self, k: int, region: Slice2d) -> Slice2d | None:
+        """Find the bounding region of voxels in the view volume on the k-th slice.
+
+        Returns None if the slice and the view volume are disjoint in the region.
+        """
+        j0, j1 = float(region.j.start), float(region.j.stop - 1)
+        i0, i1 = float(region.i.start), float(region.i.stop - 1)
+        polygon = [(j0, i0), (j0, i1), (j1, i1), (j1, i0)]
+        for c in range(3):
+            a = self.base[c] + k * self.dk[c]
+            polygon = _clip_polygon(polygon, a - self.lo[c], self.dj[c], self.di[c])
+            polygon = _clip_polygon(polygon, self.hi[c] - a, -self.dj[c], -self.di[c])
+            if len(polygon) == 0:
+                return None
+
+        js = [p[0] for p in polygon]
+        iss = [p[1] for p in polygon]
+        clipped = Slice2d(
+            j=slice(
+                max(region.j.start, int(math.floor(min(js)))),
+                min(region.j.stop, int(math.ceil(max(js))) + 1),
+            ),
+            i=slice(
+                max(region.i.start, int(math.floor(min(iss)))),
+                min(region.i.stop, int(math.ceil(max(iss))) + 1),
+            ),
+        )
+        if clipped.j.stop <= clipped.j.start or clipped.i.stop <= clipped.i.start:
+            return None
+        return clipped
+
+    def mask(self, k: int, region: Slice2d) -> xp.Array:
+        """Create the mask of voxels in the view volume in region of the k-th slice."""
+        rows = xp.reshape(
+            xp.arange(region.j.start, region.j.stop, dtype=xp.float64), (-1, 1)
+        )
+        columns = xp.reshape(
+            xp.arange(region.i.start, region.i.stop, dtype=xp.float64), (1, -1)
+        )
+        mask = xp.ones((rows.shape[0], columns.shape[1]), dtype=xp.bool)
+        for c in range(3):
+            v = (
+                (self.base[c] + k * self.dk[c])
+                + self.dj[c] * rows
+                + self.di[c] * columns
+            )
+            mask = mask & (self.lo[c] < v) & (v < self.hi[c])
+        return mask
+
+
+def _create_view_clip(camera: Camera, inv_conversion: Conversion) -> _ViewClip:
+    dir_mat = _create_direction_mat_in_world_frame(camera, inv_conversion)
+    origin = camera.frame.origin
+    # the view coordinates are affine in the voxel indices
+    points = xp.asarray(
+        [
+            [-origin.k, -origin.j, -origin.i],
+            [1.0 - origin.k, -origin.j, -origin.i],
+            [-origin.k, 1.0 - origin.j, -origin.i],
+            [-origin.k, -origin.j, 1.0 - origin.i],
+        ],
+        dtype=xp.float64,
+    )
+    points_in_view = inv_conversion(points.T).T @ xp.astype(dir_mat, xp.float64)
+    base = points_in_view[0, :]
+    min_point, max_point = _create_viewv_volume_region(camera)
+
+    def _as_tuple(v: xp.Array) -> tuple[float, float, float]:
+        return (float(v[0]), float(v[1]), float(v[2]))
+
+    return _ViewClip(
+        base=_as_tuple(base),
+        dk=_as_tuple(points_in_view[1, :] - base),
+        dj=_as_tuple(points_in_view[2, :] - base),
+        di=_as_tuple(points_in_view[3, :] - base),
+        lo=_as_tuple(min_point),
+        hi=_as_tuple(max_point),
+    )
+
+
+def _crop(array: xp.Array, region: Slice2d, cropped: Slice2d) -> xp.Array:
+    return array[
+        cropped.j.start - region.j.start : cropped.j.stop - region.j.start,
+        cropped.i.start - region.i.start : cropped.i.stop - region.i.start,
+    ]
+
+
+def _read_visible_spans(
+    data: ChunkedArray, index: int, region: Slice2d, mask: xp.Array
+) -> xp.Array:
+    # Runs of visible voxels are read one by one, so that chunks between visible
+    # bricks are never decoded. Runs of consecutive rows of the same columns,
+    # e.g. those of a row of bricks, are read at once.
+    boundary = xp.zeros((mask.shape[0], 1), dtype=xp.bool)
+    previous = xp.concat([boundary, mask[:, :-1]], axis=1)
+    following = xp.concat([mask[:, 1:], boundary], axis=1)
+    rows, begins = xp.nonzero(mask & xp.logical_not(previous))
+    _, lasts = xp.nonzero(mask & xp.logical_not(following))
+
+    block = xp.zeros(mask.shape, dtype=data.dtype)
+
+    def _read(columns: tuple[int, int], first: int, last: int) -> None:
+        j, i = region.j.start, region.i.start
+        block[first : last + 1, columns[0] : columns[1]] = data[
+            index, j + first : j + last + 1, i + columns[0] : i + columns[1]
+        ]
+
+    spans: dict[tuple[int, int], tuple[int, int]] = {}
+    for n in range(rows.shape[0]):
+        row, columns = int(rows[n]), (int(begins[n]), int(lasts[n]) + 1)
+        if columns in spans and spans[columns][1] == row - 1:
+            spans[columns] = (spans[columns][0], row)
+            continue
+        if columns in spans:
+            _read(columns, *spans[columns])
+        spans[columns] = (row, row)
+    for columns, (first, last) in spans.items():
+        _read(columns, first, last)
+    return block
+
+
 def _calc_update_region_slice(
-    i: int, shearing: Vector, translation: Vector, shape: tuple[int, int]
+    i: int, shearing: Vector, translation: Vector, region: Slice2d
 ) -> Slice2d:
-    ox = int(math.floor(shearing.i * i) + math.ceil(translation.i))
-    oy = int(math.floor(shearing.j * i) + math.ceil(translation.j))
-    return Slice2d(j=slice(oy, oy + shape[0]), i=slice(ox, ox + shape[1]))
+    ox = _floor(shearing.i * i) + _ceil(translation.i)
+    oy = _floor(shearing.j * i) + _ceil(translation.j)
+    return Slice2d(
+        j=slice(oy + region.j.start, oy + region.j.stop),
+        i=slice(ox + region.i.start, ox + region.i.stop),
+    )
 
 
 def _get_slice_indices(volume: Volume, camera: Camera) -> range:
@@ -183,35 +273,67 @@ def _render_intermediate_image(
     perm_camera: Camera,
     inv_conversion: Conversion,
     accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    termination_threshold: float,
+    occupancy: Occupancy | None,
+    classified: ClassifiedVolume | None = None,
+    precision: xpe.Precision = "float64",
+    workers: int = 1,
 ) -> Image:
-    dir_mat = _create_direction_mat_in_world_frame(perm_camera, inv_conversion)
-
-    grid_j, grid_i = _mesh_grid_from_origin(
-        perm_camera.frame.origin, perm_volume.data.shape[1:]
-    )
-    min_point, max_point = _create_viewv_volume_region(perm_camera)
-
-    def _create_mask(idx: int, shape: tuple[int, int]) -> xp.Array:
-        grid_k = idx * xp.ones(shape, dtype=xp.float32) - perm_camera.frame.origin.k
-        grid = xp.stack([grid_k, grid_j, grid_i], axis=2)
-        grid_in_world = xp.reshape(
-            inv_conversion(xp.reshape(grid, (-1, 3)).T).T, grid.shape
-        )
-        points_in_view = grid_in_world @ dir_mat
-        masks = (min_point < points_in_view) & (points_in_view < max_point)
-        return masks[:, :, 0] & masks[:, :, 1] & masks[:, :, 2]
-
-    accumulator = accumulator_constructor(
-        _calc_intermediate_image_shape(shearing, translation, perm_volume.data.shape)
+    view_clip = _create_view_clip(perm_camera, inv_conversion)
+    shape = _calc_intermediate_image_shape(
+        shearing, translation, perm_volume.data.shape
     )
     thickness = norm(perm_volume.frame.orientation.k)
 
-    for i in _get_slice_indices(perm_volume, perm_camera):
-        s = xp.astype(perm_volume.data[i, :, :], xp.float64)
-        mask = _create_mask(i, s.shape)
-        slice = _calc_update_region_slice(i, shearing, translation, s.shape)
-        accumulator.add(s, thickness, mask=mask, slice=slice)
-    return accumulator.compose()
+    def _composite(accumulator: Composer, slice_indices: Sequence[int]) -> None:
+        for i in slice_indices:
+            encoded = None if classified is None else classified.slices[i]
+            if classified is None:
+                found = find_slice_region(i, perm_volume.data.shape[1:], occupancy)
+            else:
+                found = None if encoded is None else (encoded.region, None)
+            if found is None:
+                continue
+            region, visible_mask = found
+            clipped = view_clip.clip(i, region)
+            if clipped is None:
+                accumulator.skip(thickness)
+                continue
+            slice = _calc_update_region_slice(i, shearing, translation, clipped)
+
+            saturated = accumulator.saturated(termination_threshold, slice=slice)
+            if saturated is not None and xp.all(saturated):
+                whole = accumulator.saturated(termination_threshold)
+                if whole is not None and xp.all(whole):
+                    break
+                continue
+
+            if encoded is None:
+                data = perm_volume.data
+                if isinstance(data, ChunkedArray) and visible_mask is not None:
+                    s = _read_visible_spans(
+                        data, i, clipped, _crop(visible_mask, region, clipped)
+                    )
+                else:
+                    s = data[i, clipped.j, clipped.i]
+                s = xp.astype(s, xpe.get_dtype(precision))
+            else:
+                # transparent runs are skipped without reading the volume
+                s, visible_mask = encoded.decode()
+                s = _crop(s, region, clipped)
+            mask = view_clip.mask(i, clipped)
+            if visible_mask is not None:
+                mask = mask & _crop(visible_mask, region, clipped)
+            if saturated is not None:
+                mask = mask & xp.logical_not(saturated)
+            accumulator.add(s, thickness, mask=mask, slice=slice)
+
+    return composite_in_slabs(
+        _get_slice_indices(perm_volume, perm_camera),
+        workers,
+        lambda: accumulator_constructor(shape),
+        _composite,
+    ).compose()
 
 
 def _calc_warp_matrix(
@@ -247,10 +369,15 @@ def _warp(
     warped_shape: tuple[int, int],
     dst_shape: tuple[int, int],
     sampling_method: xpe.SamplingMethod,
+    precision: xpe.Precision = "float64",
 ) -> Image:
     warp_mat = _calc_warp_matrix(view_matrix, translation, warped_shape, dst_shape)
     return affine_image(
-        intermediate_image, xp.linalg.inv(warp_mat.T), dst_shape, method=sampling_method
+        intermediate_image,
+        xp.linalg.inv(warp_mat.T),
+        dst_shape,
+        method=sampling_method,
+        precision=precision,
     )
 
 
@@ -273,7 +400,31 @@ def create_renderer(
     /,
     accumulator_constructor: Callable[[tuple[int, int]], Composer],
     sampling_method: xpe.SamplingMethod,
+    termination_threshold: float = 1.0,
+    transfer_function: TransferFunction | None = None,
+    classifier: TransferFunction | None = None,
+    max_permuted_bytes: int | None = None,
+    precision: xpe.Precision = "float64",
+    workers: int = 1,
 ) -> Renderer:
+    """Create an orthogonal renderer by the shear-warp factorization.
+
+    The volume permuted for each principal axis is prepared on its first use and
+    shared by later cameras. Its data is copied to be contiguous unless copies exceed
+    max_permuted_bytes. If classifier is given, the prepared volume is also
+    classified into runs of non-transparent voxels by it, and only these runs are
+    composited. It must be given only if transparent voxels make no contribution
+    to the image. Slices are composited and warped in precision, which must match
+    the precision of composers. Depth slabs of slices are composited by workers
+    threads in parallel and merged.
+    """
+    occupancy = (
+        None
+        if transfer_function is None
+        else create_occupancy(volume, transfer_function)
+    )
+    prepared: dict[int, PrincipalAxis] = {}
+    permuted_copies = PermutedCopies(volume.data, max_bytes=max_permuted_bytes)
     to_volume = Transformation(src=world_frame, dst=volume.frame)
     rotate_to_volume, inv_rotate_to_volume = _create_transformation(
         src=Frame(
@@ -293,11 +444,14 @@ def create_renderer(
         )
 
         viewing_direction = rotate_to_volume(camera.screen_orientation).k
-        perm, inv_perm = _create_permutation_from_principal_axis(viewing_direction)
-        inv_conversion = Composition(inv_perm, inv_rotate_to_volume)
+        axis = get_principal_axis(
+            prepared, volume, viewing_direction, occupancy, classifier, precision
+        )
+        perm = axis.perm
+        perm_volume = replace(axis.volume, data=permuted_copies.get(perm.order))
+        inv_conversion = Composition(axis.inv_perm, inv_rotate_to_volume)
 
         perm_camera = _apply_conversion(_apply_conversion(camera, to_volume), perm)
-        perm_volume = _permute_volume(volume, perm.order)
         perm_viewing_direction = perm(viewing_direction)
 
         shearing = _calc_shearing(perm_viewing_direction)
@@ -310,6 +464,11 @@ def create_renderer(
             perm_camera,
             inv_conversion,
             accumulator_constructor,
+            termination_threshold,
+            axis.occupancy,
+            axis.classified,
+            precision,
+            workers,
         )
 
         result_image = _warp(
@@ -319,6 +478,7 @@ def create_renderer(
             warped_shape=_calc_warped_shape(camera),
             dst_shape=shape,
             sampling_method=sampling_method,
+            precision=precision,
         )
 
         return RenderingResult(
@@ -0,0 +1,410 @@
+import math
+from dataclasses import dataclass, replace
+from typing import Callable, Sequence
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.camera import Camera
+from vanilla_roll.geometry.conversion import Composition, Conversion, Transformation
+from vanilla_roll.geometry.element import Frame, Vector, as_array, world_frame
+from vanilla_roll.geometry.linalg import norm, normalize_vector
+from vanilla_roll.rendering.composition import Composer, Slice2d, composite_in_slabs
+from vanilla_roll.rendering.empty_space import Occupancy, create_occupancy
+from vanilla_roll.rendering.image_proc import projective_image
+from vanilla_roll.rendering.shear_warp import (
+    PermutedCopies,
+    PrincipalAxis,
+    find_slice_region,
+    get_principal_axis,
+)
+from vanilla_roll.rendering.transfer_function import TransferFunction
+from vanilla_roll.rendering.types import Image, Renderer, RenderingResult
+from vanilla_roll.volume import Volume
+
+MAX_INTERMEDIATE_IMAGE_SCALE = 4
+
+# Intermediate image is a grid on a plane of constant k in the permuted volume, and
+# its pixel (row, col) is the point (k0, origin_j + row * step, origin_i + col * step).
+# Each slice is scaled around the eye and projected onto the plane, so that the ray
+# through an intermediate pixel passes the same pixel of every projected slice.
+
+
+def _convert_point(conversion: Conversion, point: Vector) -> xp.Array:
+    return xp.reshape(conversion(xp.astype(as_array(point), xp.float64)), (-1,))
+
+
+def _get_slice_indices(
+    shape: tuple[int, int, int], eye: xp.Array, sign: int
+) -> list[int]:
+    indices = range(shape[0]) if 0 < sign else range(shape[0] - 1, -1, -1)
+    return [k for k in indices if 0.0 < (k - float(eye[0])) * sign]
+
+
+def _calc_ray_matrix(
+    camera: Camera, to_perm: Conversion, eye: xp.Array, spacing: float
+) -> xp.Array:
+    """Map homogeneous screen pixel (v, u, 1) to the ray direction from the eye."""
+    origin = camera.screen_origin
+    dir_i = spacing * normalize_vector(camera.screen_orientation.i)
+    dir_j = spacing * normalize_vector(camera.screen_orientation.j)
+    base = _convert_point(to_perm, origin)
+    return xp.stack(
+        [
+            _convert_point(to_perm, origin + dir_j) - base,
+            _convert_point(to_perm, origin + dir_i) - base,
+            base - eye,
+        ]
+    )
+
+
+@dataclass(frozen=True)
+class _Plane:
+    """Grid of the intermediate image on the plane of constant k.
+
+    distance is the signed distance from the eye to the plane along k.
+    """
+
+    distance: float
+    origin: tuple[float, float]
+    step: float
+    shape: tuple[int, int]
+
+    def ratio(self, k: int, eye: xp.Array) -> float:
+        """Scale from the plane to the k-th slice around the eye."""
+        return (k - float(eye[0])) / self.distance
+
+
+def _calc_plane_matrix(
+    eye: xp.Array, distance: float, origin: tuple[float, float], step: float
+) -> xp.Array:
+    """Map a ray direction (k, j, i) to homogeneous intermediate image coordinates."""
+    return xp.asarray(
+        [
+            [
+                (float(eye[1]) - origin[0]) / step,
+                (float(eye[2]) - origin[1]) / step,
+                1.0,
+            ],
+            [distance / step, 0.0, 0.0],
+            [0.0, distance / step, 0.0],
+        ],
+        dtype=xp.float64,
+    )
+
+
+def _project(mat: xp.Array, pixels: list[tuple[float, float]]) -> xp.Array | None:
+    coords = xp.asarray([[v, u, 1.0] for v, u in pixels], dtype=xp.float64) @ mat
+    if not xp.all(0.0 < coords[:, 2]):
+        return None
+    return coords[:, :2] / coords[:, 2:]
+
+
+def _calc_screen_step(mat: xp.Array, shape: tuple[int, int]) -> float:
+    v, u = shape[0] / 2.0, shape[1] / 2.0
+    projected = _project(mat, [(v, u), (v + 1.0, u), (v, u + 1.0)])
+    if projected is None:
+        return 1.0
+    lengths = xp.linalg.vector_norm(projected[1:, :] - projected[:1, :], axis=1)
+    return float(xp.min(lengths))
+
+
+def _calc_volume_footprint(
+    shape: tuple[int, int, int], eye: xp.Array, ratios: tuple[float, float]
+) -> tuple[float, float, float, float]:
+    ej, ei = float(eye[1]), float(eye[2])
+    js = [ej + (p - ej) / r for p in (-1.0, float(shape[1])) for r in ratios]
+    iss = [ei + (p - ei) / r for p in (-1.0, float(shape[2])) for r in ratios]
+    return (min(js), max(js), min(iss), max(iss))
+
+
+def _calc_frustum_footprint(
+    mat: xp.Array, shape: tuple[int, int]
+) -> tuple[float, float, float, float] | None:
+    h, w = float(shape[0] - 1), float(shape[1] - 1)
+    projected = _project(mat, [(0.0, 0.0), (0.0, w), (h, 0.0), (h, w)])
+    if projected is None:
+        return None
+    return (
+        float(xp.min(projected[:, 0])) - 1.0,
+        float(xp.max(projected[:, 0])) + 1.0,
+        float(xp.min(projected[:, 1])) - 1.0,
+        float(xp.max(projected[:, 1])) + 1.0,
+    )
+
+
+def _create_plane(
+    volume_shape: tuple[int, int, int],
+    eye: xp.Array,
+    slice_indices: list[int],
+    ray_mat: xp.Array,
+    screen_shape: tuple[int, int],
+) -> _Plane | None:
+    # The plane is put on the first slice like the orthogonal shear-warp, but not too
+    # close to the eye, where the screen shrinks to a point.
+    sign = 1.0 if float(eye[0]) < slice_indices[0] else -1.0
+    distance = sign * max(1.0, abs(slice_indices[0] - float(eye[0])))
+    unit_mat = ray_mat @ _calc_plane_matrix(eye, distance, (0.0, 0.0), 1.0)
+
+    j0, j1, i0, i1 = _calc_volume_footprint(
+        volume_shape,
+        eye,
+        (
+            (slice_indices[0] - float(eye[0])) / distance,
+            (slice_indices[-1] - float(eye[0])) / distance,
+        ),
+    )
+    if (frustum := _calc_frustum_footprint(unit_mat, screen_shape)) is not None:
+        j0, j1 = max(j0, frustum[0]), min(j1, frustum[1])
+        i0, i1 = max(i0, frustum[2]), min(i1, frustum[3])
+    if j1 <= j0 or i1 <= i0:
+        return None
+
+    max_pixels = MAX_INTERMEDIATE_IMAGE_SCALE * screen_shape[0] * screen_shape[1]
+    step = max(
+        min(1.0, _calc_screen_step(unit_mat, screen_shape)),
+        math.sqrt((j1 - j0) * (i1 - i0) / max_pixels),
+    )
+    return _Plane(
+        distance=distance,
+        origin=(j0, i0),
+        step=step,
+        shape=(
+            int(math.ceil((j1 - j0) / step)) + 1,
+            int(math.ceil((i1 - i0) / step)) + 1,
+        ),
+    )
+
+
+def _calc_depth_image(
+    from_perm: Conversion, camera: Camera, eye: xp.Array, plane: _Plane
+) -> xp.Array:
+    plane_k = float(eye[0]) + plane.distance
+    oj, oi = plane.origin
+    points = xp.asarray(
+        [
+            [plane_k, oj, oi],
+            [plane_k, oj + plane.step, oi],
+            [plane_k, oj, oi + plane.step],
+        ],
+        dtype=xp.float64,
+    )
+    camera_origin = xp.astype(as_array(camera.frame.origin), xp.float64)
+    forward = xp.astype(as_array(normalize_vector(camera.forward)), xp.float64)
+    # depth is affine on the plane
+    z00, z10, z01 = (
+        float(z) for z in (from_perm(points.T).T - camera_origin) @ forward
+    )
+
+    rows = xp.reshape(xp.arange(plane.shape[0], dtype=xp.float64), (-1, 1))
+    cols = xp.reshape(xp.arange(plane.shape[1], dtype=xp.float64), (1, -1))
+    return z00 + rows * (z10 - z00) + cols * (z01 - z00)
+
+
+def _sample_slice(
+    data: xp.Array,
+    update: Slice2d,
+    eye: xp.Array,
+    plane: _Plane,
+    ratio: float,
+    sampling_method: xpe.SamplingMethod,
+    precision: xpe.Precision = "float64",
+) -> xp.Array:
+    ej, ei = float(eye[1]), float(eye[2])
+    rows = xp.arange(update.j.start, update.j.stop, dtype=xp.float64)
+    cols = xp.arange(update.i.start, update.i.stop, dtype=xp.float64)
+    pj = ej + ratio * (plane.origin[0] + plane.step * rows - ej)
+    pi = ei + ratio * (plane.origin[1] + plane.step * cols - ei)
+    jss, iss = xp.meshgrid(pj, pi, indexing="ij")
+    coords = xp.stack([xp.reshape(jss, (-1,)), xp.reshape(iss, (-1,))], axis=1)
+    samples = xpe.sample(
+        data, coordinates=coords, method=sampling_method, precision=precision
+    )
+    if samples.dtype != xpe.get_dtype(precision):
+        samples = xp.astype(samples, xpe.get_dtype(precision))
+    return xp.reshape(samples, jss.shape)
+
+
+def _calc_update_region_slice(
+    region: Slice2d, eye: xp.Array, plane: _Plane, ratio: float
+) -> Slice2d:
+    def _calc_range(s: slice, e: float, o: float, size: int) -> slice:
+        # linear sampling gives non-zero values in (start - 1, stop) of the slice
+        lo = (e + (s.start - 1 - e) / ratio - o) / plane.step
+        hi = (e + (s.stop - e) / ratio - o) / plane.step
+        return slice(max(0, int(math.floor(lo)) + 1), min(size, int(math.ceil(hi))))
+
+    return Slice2d(
+        j=_calc_range(region.j, float(eye[1]), plane.origin[0], plane.shape[0]),
+        i=_calc_range(region.i, float(eye[2]), plane.origin[1], plane.shape[1]),
+    )
+
+
+def _render_intermediate_image(
+    perm_volume: Volume,
+    camera: Camera,
+    eye: xp.Array,
+    slice_indices: list[int],
+    plane: _Plane,
+    depth_image: xp.Array,
+    accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    termination_threshold: float,
+    sampling_method: xpe.SamplingMethod,
+    occupancy: Occupancy | None,
+    precision: xpe.Precision = "float64",
+    workers: int = 1,
+) -> Image:
+    near, far = camera.view_volume.near, camera.view_volume.far
+    min_depth, max_depth = float(xp.min(depth_image)), float(xp.max(depth_image))
+    thickness = norm(perm_volume.frame.orientation.k)
+
+    def _composite(accumulator: Composer, slice_indices: Sequence[int]) -> None:
+        for n, k in enumerate(slice_indices):
+            ratio = plane.ratio(k, eye)
+            if ratio * max_depth < near:
+                accumulator.skip(thickness)
+                continue
+            if far < ratio * min_depth:
+                # slices clipped by the view volume are still counted
+                for _ in range(len(slice_indices) - n):
+                    accumulator.skip(thickness)
+                break
+
+            found = find_slice_region(k, perm_volume.data.shape[1:], occupancy)
+            if found is None:
+                continue
+            slice = _calc_update_region_slice(found[0], eye, plane, ratio)
+            if slice.j.stop <= slice.j.start or slice.i.stop <= slice.i.start:
+                accumulator.skip(thickness)
+                continue
+
+            saturated = accumulator.saturated(termination_threshold, slice=slice)
+            if saturated is not None and xp.all(saturated):
+                whole = accumulator.saturated(termination_threshold)
+                if whole is not None and xp.all(whole):
+                    break
+                continue
+
+            depth = ratio * depth_image[slice.j, slice.i]
+            mask = (near <= depth) & (depth <= far)
+            if saturated is not None:
+                mask = mask & xp.logical_not(saturated)
+            if not xp.any(mask):
+                accumulator.skip(thickness)
+                continue
+
+            # a contiguous slice, which is taken several times by the sampler
+            data = xpe.ascontiguous(perm_volume.data[k, :, :])
+            s = _sample_slice(
+                data, slice, eye, plane, ratio, sampling_method, precision
+            )
+            accumulator.add(s, thickness, mask=mask, slice=slice)
+
+    return composite_in_slabs(
+        slice_indices,
+        workers,
+        lambda: accumulator_constructor(plane.shape),
+        _composite,
+    ).compose()
+
+
+def create_renderer(
+    volume: Volume,
+    /,
+    accumulator_constructor: Callable[[tuple[int, int]], Composer],
+    sampling_method: xpe.SamplingMethod,
+    termination_threshold: float = 1.0,
+    transfer_function: TransferFunction | None = None,
+    max_permuted_bytes: int | None = None,
+    precision: xpe.Precision = "float64",
+    workers: int = 1,
+) -> Renderer:
+    """Create a perspective renderer by the shear-warp factorization.
+
+    The eye is at the camera origin and the screen of view_volume.width x
+    view_volume.height is at the near plane, so that near must be greater than 0.
+    Slices are composited in the order of the principal axis of camera.forward,
+    so rays deviating more than 90 degrees from the axis are not rendered.
+    The volume permuted for each axis is copied to be contiguous unless copies
+    exceed max_permuted_bytes. Slices are sampled and warped in precision, and
+    depth slabs of them are composited by workers threads in parallel.
+    """
+    occupancy = (
+        None
+        if transfer_function is None
+        else create_occupancy(volume, transfer_function)
+    )
+    prepared: dict[int, PrincipalAxis] = {}
+    permuted_copies = PermutedCopies(volume.data, max_bytes=max_permuted_bytes)
+    to_volume = Transformation(src=world_frame, dst=volume.frame)
+    to_world = to_volume.inverse
+    rotate_to_volume = Transformation(
+        src=Frame(orientation=world_frame.orientation, origin=volume.frame.origin),
+        dst=volume.frame,
+    )
+
+    def _render(camera: Camera, spacing: float | None = None) -> RenderingResult:
+        if spacing is None:
+            spacing = 1.0
+        if camera.view_volume.near <= 0.0:
+            raise ValueError(
+                "near must be greater than 0 for perspective projection. "
+                f"Got {camera.view_volume.near}"
+            )
+
+        shape = (
+            int(camera.view_volume.height / spacing),
+            int(camera.view_volume.width / spacing),
+        )
+
+        viewing_direction = rotate_to_volume(camera.screen_orientation).k
+        axis = get_principal_axis(prepared, volume, viewing_direction, occupancy, None)
+        perm_volume = replace(axis.volume, data=permuted_copies.get(axis.perm.order))
+        to_perm = Composition(to_volume, axis.perm)
+        from_perm = Composition(axis.inv_perm, to_world)
+
+        eye = _convert_point(to_perm, camera.frame.origin)
+        ahead = _convert_point(to_perm, camera.frame.origin + camera.forward)
+        sign = 1 if float(eye[0]) < float(ahead[0]) else -1
+        slice_indices = _get_slice_indices(perm_volume.data.shape, eye, sign)
+
+        ray_mat = sign * _calc_ray_matrix(camera, to_perm, eye, spacing)
+        plane = (
+            _create_plane(perm_volume.data.shape, eye, slice_indices, ray_mat, shape)
+            if slice_indices
+            else None
+        )
+
+        if plane is None:
+            result_image = accumulator_constructor(shape).compose()
+        else:
+            intermediate_image = _render_intermediate_image(
+                perm_volume,
+                camera,
+                eye,
+                slice_indices,
+                plane,
+                _calc_depth_image(from_perm, camera, eye, plane),
+                accumulator_constructor,
+                termination_threshold,
+                sampling_method,
+                axis.occupancy,
+                precision,
+                workers,
+            )
+            result_image = projective_image(
+                intermediate_image,
+                ray_mat
+                @ _calc_plane_matrix(eye, plane.distance, plane.origin, plane.step),
+                shape,
+                method=sampling_method,
+                precision=precision,
+            )
+
+        return RenderingResult(
+            image=result_image,
+            spacing=Vector(i=spacing, j=spacing, k=perm_volume.spacing.k),
+            origin=camera.screen_origin,
+            orientation=camera.screen_orientation,
+        )
+
+    return _render
@@ -0,0 +1,168 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.anatomy_orientation import AnatomyOrientation
+from vanilla_roll.camera import Camera
+from vanilla_roll.chunked import asarray
+from vanilla_roll.geometry.element import Frame
+from vanilla_roll.rendering.algorithm import Algorithm, ShearWarp
+from vanilla_roll.rendering.mode import Mode
+from vanilla_roll.rendering.projection import Projection
+from vanilla_roll.rendering.rendering import create_renderer
+from vanilla_roll.rendering.types import (
+    ColorImage,
+    Image,
+    MonoImage,
+    Renderer,
+    RenderingResult,
+)
+from vanilla_roll.volume import Volume
+
+
+@dataclass(frozen=True)
+class _SharedVolume:
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+    frame: Frame
+    anatomy_orientation: AnatomyOrientation | None
+
+
+@dataclass(frozen=True)
+class _RendererOptions:
+    projection: Projection
+    rendering_method: Mode
+    sampling_method: xpe.SamplingMethod
+    algorithm: Algorithm
+    precision: xpe.Precision
+
+
+# state of a worker process, which lives as long as the process
+_shared_memory: SharedMemory | None = None
+_renderer: Renderer | None = None
+
+
+def _share_volume(volume: Volume) -> tuple[SharedMemory, _SharedVolume]:
+    data = xpe.asnumpy(asarray(volume.data))
+    shared_memory = SharedMemory(create=True, size=max(data.nbytes, 1))
+    shared_data: npt.NDArray[Any] = np.ndarray(
+        data.shape, dtype=data.dtype, buffer=shared_memory.buf
+    )
+    shared_data[...] = data
+    return shared_memory, _SharedVolume(
+        name=shared_memory.name,
+        shape=data.shape,
+        dtype=data.dtype.str,
+        frame=volume.frame,
+        anatomy_orientation=volume.anatomy_orientation,
+    )
+
+
+def _initialize_worker(shared_volume: _SharedVolume, options: _RendererOptions) -> None:
+    global _shared_memory, _renderer
+
+    _shared_memory = SharedMemory(name=shared_volume.name)
+    data: npt.NDArray[Any] = np.ndarray(
+        shared_volume.shape, dtype=shared_volume.dtype, buffer=_shared_memory.buf
+    )
+    volume = Volume(
+        xpe.from_numpy(data),
+        shared_volume.frame,
+        shared_volume.anatomy_orientation,
+    )
+    _renderer = create_renderer(
+        volume,
+        options.projection,
+        options.rendering_method,
+        sampling_method=options.sampling_method,
+        algorithm=options.algorithm,
+        precision=options.precision,
+    )
+
+
+def _convert_image(image: Image, convert: Any) -> Image:
+    match image:
+        case MonoImage(l):
+            return MonoImage(l=convert(l))
+        case ColorImage(r, g, b):
+            return ColorImage(r=convert(r), g=convert(g), b=convert(b))
+
+
+def _render(camera: Camera, spacing: float | None) -> RenderingResult:
+    if _renderer is None:
+        raise RuntimeError("Worker process is not initialized")
+
+    # arrays of backends are not picklable, so that images are sent as numpy
+    result = _renderer(camera, spacing=spacing)
+    return RenderingResult(
+        image=_convert_image(result.image, xpe.asnumpy),
+        spacing=result.spacing,
+        origin=result.origin,
+        orientation=result.orientation,
+    )
+
+
+def _get_mp_context() -> Any:
+    # forked workers inherit transfer functions, which are not always picklable
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def render_in_processes(
+    volume: Volume,
+    cameras: Iterable[Camera],
+    projection: Projection,
+    rendering_method: Mode,
+    spacing: float | None = None,
+    processes: int | None = None,
+    sampling_method: xpe.SamplingMethod = "linear",
+    algorithm: Algorithm = ShearWarp(),
+    precision: xpe.Precision = "float32",
+) -> Iterator[RenderingResult]:
+    """Render cameras of volume by a pool of worker processes.
+
+    Volume data is placed in shared memory once and attached by every worker
+    without copies. Results are yielded in the order of cameras.
+    """
+    if processes is not None and processes < 1:
+        raise ValueError(f"processes must be greater than 0, got {processes}")
+
+    shared_memory, shared_volume = _share_volume(volume)
+    try:
+        options = _RendererOptions(
+            projection=projection,
+            rendering_method=rendering_method,
+            sampling_method=sampling_method,
+            algorithm=algorithm,
+            precision=precision,
+        )
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=_get_mp_context(),
+            initializer=_initialize_worker,
+            initargs=(shared_volume, options),
+        ) as executor:
+            futures = [executor.submit(_render, camera, spacing) for camera in cameras]
+            try:
+                for future in futures:
+                    result = future.result()
+                    yield RenderingResult(
+                        image=_convert_image(result.image, xpe.from_numpy),
+                        spacing=result.spacing,
+                        origin=result.origin,
+                        orientation=result.orientation,
+                    )
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
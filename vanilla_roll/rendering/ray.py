@@ -0,0 +1,36 @@
+import math
+
+import vanilla_roll.array_api as xp
+
+
+def calc_step_range(
+    origins: xp.Array, ray_step: xp.Array, shape: tuple[int, int, int]
+) -> tuple[int, int]:
+    """Find the range of steps d at which origins + d * ray_step of any ray is
+    in the volume of shape.
+
+    The range is not bounded by the view volume, so that steps clipped by it are
+    also counted. Returns an empty range if no ray passes through the volume.
+    """
+    enter = -float("inf") * xp.ones(origins.shape[0], dtype=origins.dtype)
+    exit = float("inf") * xp.ones(origins.shape[0], dtype=origins.dtype)
+    for axis in range(3):
+        o = origins[:, axis]
+        d = float(ray_step[axis])
+        if d == 0.0:
+            outside = xp.logical_or(o < 0.0, shape[axis] <= o)
+            exit = xp.where(outside, -float("inf") * xp.ones_like(exit), exit)
+            continue
+
+        t0 = (0.0 - o) / d
+        t1 = (shape[axis] - o) / d
+        near, far = (t0, t1) if 0.0 < d else (t1, t0)
+        enter = xp.where(enter < near, near, enter)
+        exit = xp.where(far < exit, far, exit)
+
+    hit = enter < exit
+    if not xp.any(hit):
+        return (0, 0)
+    begin = int(math.ceil(float(xp.min(enter[hit]))))
+    end = int(math.ceil(float(xp.max(exit[hit]))))
+    return (begin, max(begin, end))
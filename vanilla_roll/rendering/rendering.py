@@ -1,66 +1,275 @@
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 
 import vanilla_roll.array_api as xp
 import vanilla_roll.array_api_extra as xpe
-from vanilla_roll.rendering.algorithm import Algorithm, Sampling, ShearWarp
-from vanilla_roll.rendering.composition import AccMax, AccMean, AccMin, AccVR, Composer
+from vanilla_roll.camera import Camera
+from vanilla_roll.chunked import ChunkedArray
+from vanilla_roll.rendering.algorithm import Algorithm, Raycast, Sampling, ShearWarp
+from vanilla_roll.rendering.composition import (
+    AccMax,
+    AccMean,
+    AccMin,
+    AccPreIntegratedVR,
+    AccVR,
+    Composer,
+)
 from vanilla_roll.rendering.mode import MIP, VR, Average, MinP, Mode
+from vanilla_roll.rendering.orthogonal_raycast import (
+    create_renderer as create_orthogonal_raycast,
+)
 from vanilla_roll.rendering.orthogonal_sampling import (
     create_renderer as create_orthogonal_sampling,
 )
 from vanilla_roll.rendering.orthogonal_shear_warp import (
     create_renderer as create_orthogonal_shear_warp,
 )
-from vanilla_roll.rendering.projection import Orthogoal, Projection
-from vanilla_roll.rendering.types import ColorImage, Image, MonoImage, Renderer
+from vanilla_roll.rendering.perspective_shear_warp import (
+    create_renderer as create_perspective_shear_warp,
+)
+from vanilla_roll.rendering.projection import Orthogoal, Perspective, Projection
+from vanilla_roll.rendering.shear_warp import find_principal_axis
+from vanilla_roll.rendering.transfer_function import (
+    TransferFunction,
+    TransferFunctionTable,
+)
+from vanilla_roll.rendering.types import (
+    BatchRenderer,
+    ColorImage,
+    Image,
+    MonoImage,
+    Renderer,
+    RenderingResult,
+)
 from vanilla_roll.volume import Volume
 
 
 def _get_accumulator_constructor(
     rendering_mode: Mode,
     sampling_method: xpe.SamplingMethod = "linear",
+    precision: xpe.Precision = "float32",
 ) -> Callable[[tuple[int, int]], Composer]:
     match rendering_mode:
         case MinP():
-            return lambda shape: AccMin(shape, sampling_method=sampling_method)
+            return lambda shape: AccMin(
+                shape, sampling_method=sampling_method, precision=precision
+            )
         case MIP():
-            return lambda shape: AccMax(shape, sampling_method=sampling_method)
+            return lambda shape: AccMax(
+                shape, sampling_method=sampling_method, precision=precision
+            )
         case Average():
-            return lambda shape: AccMean(shape, sampling_method=sampling_method)
+            return lambda shape: AccMean(
+                shape, sampling_method=sampling_method, precision=precision
+            )
+        case VR(TransferFunctionTable() as table, True):
+            return lambda shape: AccPreIntegratedVR(
+                shape, table, sampling_method=sampling_method, precision=precision
+            )
         case VR(transfer_function):
             return lambda shape: AccVR(
-                shape, transfer_function, sampling_method=sampling_method
+                shape,
+                transfer_function,
+                sampling_method=sampling_method,
+                precision=precision,
             )
         case _:
             raise NotImplementedError(f"{rendering_mode}")
 
 
-def create_renderer(
+def _get_skipping_transfer_function(rendering_mode: Mode) -> TransferFunction | None:
+    # Both empty space skipping and run-length classification drop transparent
+    # voxels. Pre-integrated segments between a transparent sample and a visible
+    # one are not transparent, so that no voxel is skipped for them.
+    match rendering_mode:
+        case VR(transfer_function, False):
+            return transfer_function
+        case _:
+            return None
+
+
+def _select_level(volume: Volume, spacing: float | None) -> int:
+    # the coarsest level whose voxels are not larger than the output pixels
+    if spacing is None or isinstance(volume.data, ChunkedArray):
+        return 0
+    voxel_spacing = max(volume.spacing.i, volume.spacing.j, volume.spacing.k)
+    level = 0
+    while voxel_spacing * 2 ** (level + 1) <= spacing * (1.0 + 1e-6) and 2 ** (
+        level + 1
+    ) < min(volume.shape):
+        level += 1
+    return level
+
+
+def _create_level_renderer(
     volume: Volume,
     projection: Projection,
     rendering_method: Mode,
-    sampling_method: xpe.SamplingMethod = "linear",
-    algorithm: Algorithm = ShearWarp(),
+    sampling_method: xpe.SamplingMethod,
+    algorithm: Algorithm,
+    precision: xpe.Precision,
 ) -> Renderer:
-    accumulator_constructor = _get_accumulator_constructor(rendering_method)
+    accumulator_constructor = _get_accumulator_constructor(
+        rendering_method, precision=precision
+    )
+    # macrocells and classification would decode every chunk of chunked data,
+    # though bounded chunks give macrocells without decoding
+    lazy = isinstance(volume.data, ChunkedArray)
+    bounded = not isinstance(volume.data, ChunkedArray) or volume.data.bounded
+    skipping = _get_skipping_transfer_function(rendering_method)
+    transfer_function = skipping if bounded else None
+    classifier = None if lazy else skipping
     match (projection, algorithm):
-        case (Orthogoal(), Sampling(step)):
+        case (Orthogoal(), Sampling(step, max_slab_bytes)):
             return create_orthogonal_sampling(
                 volume,
                 step=step,
+                max_slab_bytes=max_slab_bytes,
                 accumulator_constructor=accumulator_constructor,
                 sampling_method=sampling_method,
+                transfer_function=transfer_function,
+                precision=precision,
             )
-        case (Orthogoal(), ShearWarp()):
+        case (
+            Orthogoal(),
+            ShearWarp(termination_threshold, max_permuted_bytes, workers),
+        ):
             return create_orthogonal_shear_warp(
                 volume,
+                termination_threshold=termination_threshold,
+                max_permuted_bytes=max_permuted_bytes,
+                workers=workers,
+                accumulator_constructor=accumulator_constructor,
+                sampling_method=sampling_method,
+                transfer_function=transfer_function,
+                classifier=classifier,
+                precision=precision,
+            )
+        case (Orthogoal(), Raycast(step, termination_threshold)):
+            return create_orthogonal_raycast(
+                volume,
+                step=step,
+                termination_threshold=termination_threshold,
+                accumulator_constructor=accumulator_constructor,
+                sampling_method=sampling_method,
+                transfer_function=transfer_function,
+                precision=precision,
+            )
+        case (
+            Perspective(),
+            ShearWarp(termination_threshold, max_permuted_bytes, workers),
+        ):
+            return create_perspective_shear_warp(
+                volume,
+                termination_threshold=termination_threshold,
+                max_permuted_bytes=max_permuted_bytes,
+                workers=workers,
                 accumulator_constructor=accumulator_constructor,
                 sampling_method=sampling_method,
+                transfer_function=transfer_function,
+                precision=precision,
             )
         case _:
             raise NotImplementedError(f"{projection}")
 
 
+def create_renderer(
+    volume: Volume,
+    projection: Projection,
+    rendering_method: Mode,
+    sampling_method: xpe.SamplingMethod = "linear",
+    algorithm: Algorithm = ShearWarp(),
+    precision: xpe.Precision = "float32",
+    multi_resolution: bool = True,
+) -> Renderer:
+    """Create a renderer of volume.
+
+    Sampling, classification, composition and warping are calculated in precision.
+    If multi_resolution is True, the coarsest level of the volume pyramid which
+    meets the requested spacing is rendered.
+    """
+    renderers: dict[int, Renderer] = {
+        0: _create_level_renderer(
+            volume, projection, rendering_method, sampling_method, algorithm, precision
+        )
+    }
+
+    def _render(camera: Camera, spacing: float | None = None) -> RenderingResult:
+        level = _select_level(volume, spacing) if multi_resolution else 0
+        if level not in renderers:
+            renderers[level] = _create_level_renderer(
+                volume.level(level),
+                projection,
+                rendering_method,
+                sampling_method,
+                algorithm,
+                precision,
+            )
+        return renderers[level](camera, spacing=spacing)
+
+    return _render
+
+
+def create_batch_renderer(
+    volume: Volume,
+    projection: Projection,
+    rendering_method: Mode,
+    sampling_method: xpe.SamplingMethod = "linear",
+    algorithm: Algorithm = ShearWarp(),
+    precision: xpe.Precision = "float32",
+) -> BatchRenderer:
+    """Create a renderer of multiple cameras.
+
+    Cameras are rendered in the order of their principal viewing axes, so that
+    state prepared for an axis is shared by all cameras of the axis. Results are
+    returned in the order of cameras.
+    """
+    render = create_renderer(
+        volume,
+        projection,
+        rendering_method,
+        sampling_method=sampling_method,
+        algorithm=algorithm,
+        precision=precision,
+    )
+
+    def _render(
+        cameras: Iterable[Camera], spacing: float | None = None
+    ) -> list[RenderingResult]:
+        cameras = list(cameras)
+        order = sorted(
+            range(len(cameras)),
+            key=lambda n: find_principal_axis(volume, cameras[n]),
+        )
+        results: dict[int, RenderingResult] = {
+            n: render(cameras[n], spacing=spacing) for n in order
+        }
+        return [results[n] for n in range(len(cameras))]
+
+    return _render
+
+
+def render_progressive(
+    renderer: Renderer, camera: Camera, spacing: float = 1.0, steps: int = 3
+) -> Iterator[RenderingResult]:
+    """Render camera coarse to fine.
+
+    Each of steps results halves the spacing of the previous one and the last
+    one is rendered in spacing. Coarse results are rendered from coarse levels of
+    the volume pyramid by multi-resolution renderers. Consumers can stop iterating
+    at any time, e.g. when the camera moves.
+
+    Every result is rendered from scratch, so that no work of coarse results is
+    reused by finer ones. Since a coarser result has a quarter of the pixels and
+    an eighth of the voxels, all steps cost up to about a third more than the
+    last one alone.
+    """
+    if steps < 1:
+        raise ValueError(f"steps must be greater than 0, got {steps}")
+
+    for n in reversed(range(steps)):
+        yield renderer(camera, spacing=spacing * 2**n)
+
+
 def convert_image_to_array(image: Image) -> xp.Array:
     match image:
         case MonoImage(l):
@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+from vanilla_roll.rendering.composition import Slice2d
+from vanilla_roll.rendering.transfer_function import TransferFunction
+
+
+@dataclass(frozen=True)
+class EncodedSlice:
+    """EncodedSlice holds runs of non-transparent voxels on scanlines of a slice.
+
+    The n-th run covers columns [begins[n], ends[n]) of the rows[n]-th scanline.
+    Runs are in the row-major order, and values holds intensities of their voxels
+    in the same order. region is the bounding region of all runs.
+    """
+
+    region: Slice2d
+    rows: xp.Array
+    begins: xp.Array
+    ends: xp.Array
+    values: xp.Array
+
+    def decode(self) -> tuple[xp.Array, xp.Array]:
+        """Decode runs into the image and the mask of non-transparent voxels in region.
+
+        >>> from vanilla_roll.rendering.transfer_function import Result
+        >>> data = xp.asarray([[0.0, 1.0, 1.0, 0.0], [2.0, 0.0, 0.0, 3.0]])
+        >>> encoded = encode_slice(data, lambda x: Result(x, x, x, x))
+        >>> encoded.region
+        Slice2d(i=slice(0, 4, None), j=slice(0, 2, None))
+        >>> image, mask = encoded.decode()
+        >>> [float(v) for v in xp.reshape(image, (-1,))]
+        [0.0, 1.0, 1.0, 0.0, 2.0, 0.0, 0.0, 3.0]
+        >>> [bool(v) for v in xp.reshape(mask, (-1,))]
+        [False, True, True, False, True, False, False, True]
+        """
+        height = self.region.j.stop - self.region.j.start
+        width = self.region.i.stop - self.region.i.start
+
+        # index of the run which each voxel belongs to
+        lengths = self.ends - self.begins
+        offsets = xpe.cumsum(lengths) - lengths
+        starts = xp.zeros(self.values.shape[0], dtype=xp.int64)
+        xpe.put(starts, indices=offsets, values=xp.ones_like(offsets))
+        runs = xpe.cumsum(starts) - 1
+
+        positions = xp.arange(self.values.shape[0], dtype=xp.int64) - xpe.take(
+            offsets, indices=runs
+        )
+        rows = xpe.take(self.rows, indices=runs) - self.region.j.start
+        columns = xpe.take(self.begins, indices=runs) + positions - self.region.i.start
+        indices = rows * width + columns
+
+        image = xp.zeros(height * width, dtype=self.values.dtype)
+        xpe.put(image, indices=indices, values=self.values)
+        mask = xp.zeros(height * width, dtype=xp.bool)
+        xpe.put(mask, indices=indices, values=xp.ones_like(indices, dtype=xp.bool))
+        return xp.reshape(image, (height, width)), xp.reshape(mask, (height, width))
+
+
+def encode_slice(
+    data: xp.Array,
+    transfer_function: TransferFunction,
+    precision: xpe.Precision = "float64",
+) -> EncodedSlice | None:
+    """Encode non-transparent voxels of a slice into runs.
+
+    Values are held in precision. Returns None if all voxels are transparent.
+    """
+    values = xp.astype(data, xpe.get_dtype(precision))
+    positive = 0.0 < transfer_function(values).opacity
+
+    boundary = xp.zeros((positive.shape[0], 1), dtype=xp.bool)
+    previous = xp.concat([boundary, positive[:, :-1]], axis=1)
+    following = xp.concat([positive[:, 1:], boundary], axis=1)
+    rows, begins = xp.nonzero(positive & xp.logical_not(previous))
+    _, lasts = xp.nonzero(positive & xp.logical_not(following))
+    if rows.shape[0] == 0:
+        return None
+
+    ends = lasts + 1
+    return EncodedSlice(
+        region=Slice2d(
+            j=slice(int(rows[0]), int(rows[-1]) + 1),
+            i=slice(int(xp.min(begins)), int(xp.max(ends))),
+        ),
+        rows=xp.astype(rows, xp.int64),
+        begins=xp.astype(begins, xp.int64),
+        ends=xp.astype(ends, xp.int64),
+        values=values[positive],
+    )
+
+
+@dataclass(frozen=True)
+class ClassifiedVolume:
+    """ClassifiedVolume holds slices along the first axis of a volume encoded by
+    runs of non-transparent voxels under a transfer function.
+
+    Transparent voxels make no contribution to VR, so that they can be skipped
+    without reading them.
+    """
+
+    slices: tuple[EncodedSlice | None, ...]
+
+
+def classify_volume(
+    data: xp.Array,
+    transfer_function: TransferFunction,
+    precision: xpe.Precision = "float64",
+) -> ClassifiedVolume:
+    return ClassifiedVolume(
+        slices=tuple(
+            encode_slice(data[k, :, :], transfer_function, precision)
+            for k in range(data.shape[0])
+        )
+    )
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Protocol, TypeVar
+
+import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
+import vanilla_roll.chunked as chunked
+from vanilla_roll.anatomy_orientation import create as create_anatomy_orientation
+from vanilla_roll.camera import Camera
+from vanilla_roll.chunked import ChunkedArray
+from vanilla_roll.geometry.conversion import Permutation, Transformation
+from vanilla_roll.geometry.element import (
+    Frame,
+    Orientation,
+    Vector,
+    as_array,
+    world_frame,
+)
+from vanilla_roll.rendering.composition import Slice2d
+from vanilla_roll.rendering.empty_space import Occupancy
+from vanilla_roll.rendering.run_length import ClassifiedVolume, classify_volume
+from vanilla_roll.rendering.transfer_function import TransferFunction
+from vanilla_roll.volume import Volume
+
+T = TypeVar("T")
+
+
+class HasIJK(Protocol, Generic[T]):
+    i: T
+    j: T
+    k: T
+
+
+def _permutate_kji(obj: HasIJK[T], order: tuple[int, int, int]) -> tuple[T, T, T]:
+    k, j, i = (
+        [
+            obj.k,
+            obj.j,
+            obj.i,
+        ][i]
+        for i in order
+    )
+    return (k, j, i)
+
+
+def _find_principal_viewing_axis(viewing_direction: Vector) -> int:
+    return int(xp.argmax(xp.abs(as_array(viewing_direction))))
+
+
+def _create_permutation_from_principal_axis(
+    principal_axis: int,
+) -> tuple[Permutation, Permutation]:
+    match principal_axis:
+        case 0:
+            return (
+                Permutation((0, 1, 2)),
+                Permutation((0, 1, 2)),
+            )
+        case 1:
+            return (
+                Permutation((1, 2, 0)),
+                Permutation((2, 0, 1)),
+            )
+        case 2:
+            return (
+                Permutation((2, 0, 1)),
+                Permutation((1, 2, 0)),
+            )
+        case int() as x:
+            raise ValueError(f"Invalid principal axis: {x}")
+
+
+def _permute_volume(target: Volume, order: tuple[int, int, int]) -> Volume:
+    k, j, i = _permutate_kji(target.frame.orientation, order)
+    permutated_frame = Frame(
+        orientation=Orientation(
+            i=i,
+            j=j,
+            k=k,
+        ),
+        origin=target.frame.origin,
+    )
+
+    permutated_anatomy_orientation = target.anatomy_orientation
+    if permutated_anatomy_orientation is not None:
+        k, j, i = _permutate_kji(permutated_anatomy_orientation, order)
+        permutated_anatomy_orientation = create_anatomy_orientation(i=i, j=j, k=k)
+
+    return Volume(
+        data=chunked.permute_dims(target.data, order),
+        frame=permutated_frame,
+        anatomy_orientation=permutated_anatomy_orientation,
+    )
+
+
+@dataclass(frozen=True)
+class PrincipalAxis:
+    """State shared by cameras of the same principal viewing axis."""
+
+    perm: Permutation
+    inv_perm: Permutation
+    volume: Volume
+    occupancy: Occupancy | None
+    classified: ClassifiedVolume | None
+
+
+def get_principal_axis(
+    prepared: dict[int, PrincipalAxis],
+    volume: Volume,
+    viewing_direction: Vector,
+    occupancy: Occupancy | None,
+    classifier: TransferFunction | None,
+    precision: xpe.Precision = "float64",
+) -> PrincipalAxis:
+    """Get the state of the principal axis of viewing_direction.
+
+    The state is prepared on the first use and stored in prepared.
+    """
+    principal_axis = _find_principal_viewing_axis(viewing_direction)
+    if principal_axis not in prepared:
+        perm, inv_perm = _create_permutation_from_principal_axis(principal_axis)
+        perm_volume = _permute_volume(volume, perm.order)
+        prepared[principal_axis] = PrincipalAxis(
+            perm=perm,
+            inv_perm=inv_perm,
+            volume=perm_volume,
+            occupancy=None if occupancy is None else occupancy.permute(perm.order),
+            classified=(
+                None
+                if classifier is None
+                else classify_volume(perm_volume.data, classifier, precision)
+            ),
+        )
+    return prepared[principal_axis]
+
+
+class PermutedCopies:
+    """Contiguous copies of the data of a volume permuted for principal axes.
+
+    Copies are made on the first use, so that slices along the first axis are
+    contiguous. The least recently used copies are dropped to keep their total size
+    within max_bytes, and data which does not fit is left as the permuted view.
+    Chunked data is always left as the permuted view, which stays lazy.
+    """
+
+    _data: xp.Array | ChunkedArray
+    _max_bytes: int | None
+    _copies: OrderedDict[tuple[int, int, int], xp.Array]
+
+    def __init__(
+        self, data: xp.Array | ChunkedArray, /, *, max_bytes: int | None = None
+    ) -> None:
+        self._data = data
+        self._max_bytes = max_bytes
+        self._copies = OrderedDict()
+
+    def get(self, order: tuple[int, int, int]) -> xp.Array | ChunkedArray:
+        if order == (0, 1, 2):
+            return self._data
+        if isinstance(self._data, ChunkedArray):
+            return self._data.permute_dims(order)
+        if order in self._copies:
+            self._copies.move_to_end(order)
+            return self._copies[order]
+
+        permuted = xp.permute_dims(self._data, order)
+        size = xpe.nbytes(self._data)
+        if self._max_bytes is not None:
+            if self._max_bytes < size:
+                return permuted
+            while self._max_bytes < size * (len(self._copies) + 1):
+                self._copies.popitem(last=False)
+        self._copies[order] = xpe.ascontiguous(permuted)
+        return self._copies[order]
+
+
+def find_principal_axis(volume: Volume, camera: Camera) -> int:
+    """Find the axis of volume along which slices are composited for camera."""
+    rotate_to_volume = Transformation(
+        src=Frame(orientation=world_frame.orientation, origin=volume.frame.origin),
+        dst=volume.frame,
+    )
+    return _find_principal_viewing_axis(rotate_to_volume(camera.screen_orientation).k)
+
+
+def find_slice_region(
+    i: int, shape: tuple[int, int], occupancy: Occupancy | None
+) -> tuple[Slice2d, xp.Array | None] | None:
+    if occupancy is None:
+        return Slice2d(j=slice(0, shape[0]), i=slice(0, shape[1])), None
+    return occupancy.find_slice_region(i, shape)
@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property, lru_cache
 from typing import Callable, Iterable, TypeAlias
 
 import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_extra as xpe
 
 
 @dataclass(frozen=True)
@@ -31,14 +33,155 @@ class ColorControlPoint:
 
 TransferFunction: TypeAlias = Callable[[xp.Array], Result]
 
+DEFAULT_TABLE_RESOLUTION = 8192
 
-def make_transfer_function(
-    opacity_control_points: Iterable[OpacityControlPoint],
-    color_control_points: Iterable[ColorControlPoint],
-) -> TransferFunction:
-    color_control_points = list(color_control_points)
-    opacity_control_points = list(opacity_control_points)
 
+@dataclass(frozen=True)
+class TransferFunctionTable:
+    """TransferFunctionTable is a transfer function compiled into a lookup table.
+
+    The n-th entry holds the values at intensity_range[0] + n * step, and intensities
+    are looked up by the nearest entry. Intensities out of the range are transparent.
+    Values are classified in float32 for float32 intensities and float64 otherwise.
+
+    >>> table = TransferFunctionTable(
+    ...     intensity_range=(0.0, 2.0),
+    ...     r=xp.asarray([0.0, 0.5, 1.0]),
+    ...     g=xp.asarray([0.0, 0.5, 1.0]),
+    ...     b=xp.asarray([0.0, 0.5, 1.0]),
+    ...     opacity=xp.asarray([0.0, 0.25, 0.5]),
+    ... )
+    >>> [float(v) for v in table(xp.asarray([-1.0, 0.9, 2.0, 3.0])).opacity]
+    [0.0, 0.25, 0.5, 0.0]
+    """
+
+    intensity_range: tuple[float, float]
+    r: xp.Array
+    g: xp.Array
+    b: xp.Array
+    opacity: xp.Array
+
+    @property
+    def resolution(self) -> int:
+        return self.opacity.shape[0]
+
+    @property
+    def step(self) -> float:
+        lo, hi = self.intensity_range
+        return (hi - lo) / max(1, self.resolution - 1)
+
+    @cached_property
+    def _padded_tables(self) -> tuple[xp.Array, xp.Array, xp.Array, xp.Array]:
+        zero = xp.zeros(1, dtype=xp.float64)
+        return tuple(  # type: ignore
+            xp.concat([zero, xp.astype(t, xp.float64), zero])
+            for t in (self.r, self.g, self.b, self.opacity)
+        )
+
+    @cached_property
+    def _padded_tables_float32(
+        self,
+    ) -> tuple[xp.Array, xp.Array, xp.Array, xp.Array]:
+        return tuple(  # type: ignore
+            xp.astype(t, xp.float32) for t in self._padded_tables
+        )
+
+    def _tables_of(self, x: xp.Array) -> tuple[xp.Array, xp.Array, xp.Array, xp.Array]:
+        if x.dtype == xp.float32:
+            return self._padded_tables_float32
+        return self._padded_tables
+
+    @cached_property
+    def _prefix_sums(self) -> tuple[xp.Array, xp.Array, xp.Array, xp.Array]:
+        r, g, b, opacity = self._padded_tables
+        zero = xp.zeros(1, dtype=xp.float64)
+        return tuple(  # type: ignore
+            xp.concat([zero, xpe.cumsum(t)])
+            for t in (opacity * r, opacity * g, opacity * b, opacity)
+        )
+
+    def _lookup_indices(self, x: xp.Array) -> xp.Array:
+        lo, hi = self.intensity_range
+        scale = 0.0 if hi <= lo else 1.0 / self.step
+        indices = xp.round((xp.astype(x, xp.float64) - lo) * scale) + 1.0
+        indices = xpe.clip(indices, a_min=0.0, a_max=float(self.resolution + 1))
+        return xp.reshape(xp.astype(indices, xp.int64), (-1,))
+
+    def __call__(self, x: xp.Array) -> Result:
+        indices = self._lookup_indices(x)
+        r, g, b, opacity = (
+            xp.reshape(xpe.take(t, indices=indices), x.shape)
+            for t in self._tables_of(x)
+        )
+        return Result(r=r, g=g, b=b, opacity=opacity)
+
+    def pre_integrate(self, front: xp.Array, back: xp.Array) -> Result:
+        """Classify segments between front and back intensities.
+
+        Opacity is the mean over the segment, and colors are the means weighted by
+        opacity, so that a segment is composited like a sample of the same thickness.
+        Entries of the (front, back) table are calculated on demand from prefix sums.
+
+        >>> table = TransferFunctionTable(
+        ...     intensity_range=(0.0, 2.0),
+        ...     r=xp.asarray([0.0, 0.5, 1.0]),
+        ...     g=xp.asarray([0.0, 0.5, 1.0]),
+        ...     b=xp.asarray([0.0, 0.5, 1.0]),
+        ...     opacity=xp.asarray([0.0, 0.2, 0.4]),
+        ... )
+        >>> ret = table.pre_integrate(xp.asarray([0.0, 1.0]), xp.asarray([2.0, 1.0]))
+        >>> [round(float(v), 6) for v in ret.opacity]
+        [0.2, 0.2]
+        >>> [round(float(v), 6) for v in ret.r]
+        [0.833333, 0.5]
+        """
+        front_indices = self._lookup_indices(front)
+        back_indices = self._lookup_indices(back)
+        first = xp.where(front_indices < back_indices, front_indices, back_indices)
+        last = xp.where(front_indices < back_indices, back_indices, front_indices) + 1
+        counts = xp.astype(last - first, xp.float64)
+
+        def _integrate(prefix_sum: xp.Array) -> xp.Array:
+            return xpe.take(prefix_sum, indices=last) - xpe.take(
+                prefix_sum, indices=first
+            )
+
+        sum_r, sum_g, sum_b, sum_opacity = (_integrate(t) for t in self._prefix_sums)
+        positive = 0.0 < sum_opacity
+        denominator = xp.where(positive, sum_opacity, xp.ones_like(sum_opacity))
+        r, g, b = (
+            xp.reshape(xp.where(positive, c / denominator, sum_opacity), front.shape)
+            for c in (sum_r, sum_g, sum_b)
+        )
+        opacity = xp.reshape(sum_opacity / counts, front.shape)
+        if front.dtype == xp.float32:
+            # differences of prefix sums are taken in float64 to keep them accurate
+            r, g, b, opacity = (xp.astype(c, xp.float32) for c in (r, g, b, opacity))
+        return Result(r=r, g=g, b=b, opacity=opacity)
+
+
+def tabulate(
+    transfer_function: TransferFunction,
+    intensity_range: tuple[float, float],
+    resolution: int = DEFAULT_TABLE_RESOLUTION,
+) -> TransferFunctionTable:
+    """Compile transfer function into a lookup table over intensity_range."""
+    if resolution < 1:
+        raise ValueError(f"resolution must be greater than 0. Got {resolution}")
+    lo, hi = intensity_range
+    if hi < lo:
+        raise ValueError(f"Invalid intensity range: {intensity_range}")
+
+    ret = transfer_function(xp.linspace(lo, hi, resolution, dtype=xp.float64))
+    return TransferFunctionTable(
+        intensity_range=(lo, hi), r=ret.r, g=ret.g, b=ret.b, opacity=ret.opacity
+    )
+
+
+def _make_piecewise_linear_function(
+    opacity_control_points: list[OpacityControlPoint],
+    color_control_points: list[ColorControlPoint],
+) -> TransferFunction:
     def _f(x: xp.Array) -> Result:
         absorption = xp.zeros_like(x)
         for beg, end in zip(opacity_control_points, opacity_control_points[1:]):
@@ -61,6 +204,27 @@ def make_transfer_function(
     return _f
 
 
+def make_transfer_function(
+    opacity_control_points: Iterable[OpacityControlPoint],
+    color_control_points: Iterable[ColorControlPoint],
+    resolution: int = DEFAULT_TABLE_RESOLUTION,
+) -> TransferFunctionTable:
+    """Make a piecewise linear transfer function compiled into a lookup table."""
+    color_control_points = list(color_control_points)
+    opacity_control_points = list(opacity_control_points)
+    intensities = [p.intensity for p in opacity_control_points] + [
+        p.intensity for p in color_control_points
+    ]
+    if not intensities:
+        raise ValueError("At least one control point is required")
+
+    return tabulate(
+        _make_piecewise_linear_function(opacity_control_points, color_control_points),
+        (min(intensities), max(intensities)),
+        resolution,
+    )
+
+
 class Preset(Enum):
     CT_AAA = "CT-AAA"
     CT_AAA2 = "CT-AAA2"
@@ -89,7 +253,8 @@ class Preset(Enum):
     DTI_FA_BRAIN = "DTI-FA-Brain"
 
 
-def get_preset(preset: Preset) -> TransferFunction:
+@lru_cache(maxsize=None)
+def get_preset(preset: Preset) -> TransferFunctionTable:
     opacity_control_points, color_control_points = _preset_control_points[preset]
     return make_transfer_function(opacity_control_points, color_control_points)
 
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Protocol, TypeAlias
+from typing import Iterable, Protocol, TypeAlias
 
 import vanilla_roll.array_api as xp
 from vanilla_roll.camera import Camera
@@ -36,3 +36,12 @@ class Renderer(Protocol):
         spacing: float | None = ...,
     ) -> RenderingResult:
         ...
+
+
+class BatchRenderer(Protocol):
+    def __call__(
+        self,
+        cameras: Iterable[Camera],
+        spacing: float | None = ...,
+    ) -> list[RenderingResult]:
+        ...
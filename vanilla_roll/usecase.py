@@ -15,6 +15,7 @@ from vanilla_roll.geometry.element import Orientation, Vector, as_array
 from vanilla_roll.rendering import create_renderer
 from vanilla_roll.rendering.algorithm import ShearWarp
 from vanilla_roll.rendering.mode import Average, Mode
+from vanilla_roll.rendering.process_pool import render_in_processes
 from vanilla_roll.rendering.projection import Orthogoal
 from vanilla_roll.rendering.types import RenderingResult
 from vanilla_roll.volume import Volume
@@ -45,7 +46,11 @@ def render(
 
 
 def render_horizontal_rotations(
-    target: Volume, mode: Mode = Average(), n: int = 16, spacing: float | None = None
+    target: Volume,
+    mode: Mode = Average(),
+    n: int = 16,
+    spacing: float | None = None,
+    processes: int = 1,
 ) -> Iterator[RenderingResult]:
     yield from _render_rotations(
         target,
@@ -54,12 +59,17 @@ def render_horizontal_rotations(
         mode=mode,
         n=n,
         spacing=spacing,
+        processes=processes,
         up_rot=1.0,
     )
 
 
 def render_vertical_rotations(
-    target: Volume, mode: Mode = Average(), n: int = 16, spacing: float | None = None
+    target: Volume,
+    mode: Mode = Average(),
+    n: int = 16,
+    spacing: float | None = None,
+    processes: int = 1,
 ) -> Iterator[RenderingResult]:
     yield from _render_rotations(
         target,
@@ -68,6 +78,7 @@ def render_vertical_rotations(
         mode=mode,
         n=n,
         spacing=spacing,
+        processes=processes,
         up_rot=0.0,
     )
 
@@ -91,13 +102,8 @@ def _render_rotations(
     mode: Mode,
     n: int,
     spacing: float | None,
+    processes: int,
 ) -> Iterator[RenderingResult]:
-    renderer = create_renderer(
-        target,
-        projection=Orthogoal(),
-        rendering_method=mode,
-        algorithm=ShearWarp(),
-    )
     anatomy_orientation = (
         target.anatomy_orientation
         if target.anatomy_orientation is not None
@@ -110,7 +116,23 @@ def _render_rotations(
     initial = _get_direction_in_world(
         target.frame.orientation, anatomy_orientation, initial_axis
     )
-    for camera in create_circular(
-        target, n=n, axis=axis, initial=initial, up_rot=up_rot
-    ):
+    cameras = create_circular(target, n=n, axis=axis, initial=initial, up_rot=up_rot)
+    if 1 < processes:
+        yield from render_in_processes(
+            target,
+            cameras,
+            projection=Orthogoal(),
+            rendering_method=mode,
+            spacing=spacing,
+            processes=processes,
+        )
+        return
+
+    renderer = create_renderer(
+        target,
+        projection=Orthogoal(),
+        rendering_method=mode,
+        algorithm=ShearWarp(),
+    )
+    for camera in cameras:
         yield renderer(camera, spacing=spacing)
@@ -3,14 +3,37 @@ from functools import cached_property
 from typing import NoReturn
 
 import vanilla_roll.array_api as xp
+import vanilla_roll.array_api_image as xpi
 from vanilla_roll.anatomy_orientation import AnatomyOrientation
-from vanilla_roll.geometry.element import Frame, Vector
+from vanilla_roll.chunked import ChunkedArray, asarray
+from vanilla_roll.geometry.element import Frame, Orientation, Vector
 from vanilla_roll.geometry.linalg import norm
+from vanilla_roll.macrocell import MacrocellHierarchy, build_macrocell_hierarchy
+
+# number of source slices downsampled at once, which must be even
+_DOWNSAMPLE_SLAB_SLICES = 16
+
+
+def _downsample(data: xp.Array | ChunkedArray) -> xp.Array:
+    # slab by slab, so that memory-mapped data is never loaded at once
+    n = data.shape[0]
+    dtype = data.dtype
+    downsampled = xp.empty(
+        ((n + 1) // 2, (data.shape[1] + 1) // 2, (data.shape[2] + 1) // 2),
+        dtype=dtype,
+    )
+    for begin in range(0, n, _DOWNSAMPLE_SLAB_SLICES):
+        end = min(n, begin + _DOWNSAMPLE_SLAB_SLICES)
+        slab = xpi.downsample(asarray(data[begin:end, :, :]))
+        if dtype not in (xp.float32, xp.float64):
+            slab = xp.round(slab)
+        downsampled[begin // 2 : (end + 1) // 2, :, :] = xp.astype(slab, dtype)
+    return downsampled
 
 
 @dataclass(frozen=True)
 class Volume:
-    data: xp.Array
+    data: xp.Array | ChunkedArray
     frame: Frame
     anatomy_orientation: AnatomyOrientation | None = None
 
@@ -37,3 +60,40 @@ class Volume:
             + (self.spacing.j * self.shape[1]) ** 2
             + (self.spacing.i * self.shape[2]) ** 2
         ) ** 0.5
+
+    @cached_property
+    def macrocells(self) -> MacrocellHierarchy:
+        if isinstance(self.data, ChunkedArray) and self.data.bounded:
+            return self.data.macrocells()
+        return build_macrocell_hierarchy(asarray(self.data))
+
+    @cached_property
+    def downsampled(self) -> "Volume":
+        """Volume of half resolution, which is anti-aliased by a box filter.
+
+        The data keeps the dtype of the source, whose slabs are read one by one.
+        """
+        orientation = self.frame.orientation
+        return Volume(
+            _downsample(self.data),
+            Frame(
+                # voxels of the new volume are centered on 2x2x2 voxels
+                origin=self.frame.origin
+                + 0.5 * (orientation.i + orientation.j + orientation.k),
+                orientation=Orientation(
+                    i=2.0 * orientation.i,
+                    j=2.0 * orientation.j,
+                    k=2.0 * orientation.k,
+                ),
+            ),
+            self.anatomy_orientation,
+        )
+
+    def level(self, n: int) -> "Volume":
+        """Return level n of the pyramid, whose voxels are 2 ** n times larger.
+
+        Levels are built lazily and cached.
+        """
+        if n < 0:
+            raise ValueError(f"Expected non-negative level, got {n}")
+        return self if n == 0 else self.downsampled.level(n - 1)